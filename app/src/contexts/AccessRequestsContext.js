@@ -1,4 +1,6 @@
-import React, { createContext, useContext, useState, useCallback } from 'react';
+import React, { createContext, useContext, useState, useCallback, useEffect, useRef } from 'react';
+import { useAuth } from './AuthContext';
+import { openEventStream } from '../eventStream';
 
 /**
  * One organization + permission within a request (item-level status for withdraw/approve).
@@ -6,7 +8,7 @@ import React, { createContext, useContext, useState, useCallback } from 'react';
  */
 
 /**
- * A single access request (queued for approval).
+ * A single access request (queued for approval). Persisted by the backend (/api/access-requests).
  * @typedef {{
  *   id: string,
  *   items: AccessRequestItem[],
@@ -16,9 +18,6 @@ import React, { createContext, useContext, useState, useCallback } from 'react';
 
 const AccessRequestsContext = createContext(null);
 
-let requestIdCounter = 10000;
-const generateShortId = () => `req-${++requestIdCounter}`;
-
 /**
  * Parse rowId (e.g. 'req-10001' or 'req-10001.2') into requestId and item index.
  */
@@ -38,66 +37,243 @@ export const useAccessRequests = () => {
 };
 
 export const AccessRequestsProvider = ({ children }) => {
+  const { user, isAuthenticated, authHeaders, apiBaseUrl } = useAuth();
   const [requests, setRequests] = useState([]);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+  // authHeaders is recreated every render; keep the latest without re-running effects
+  const authHeadersRef = useRef(authHeaders);
+  authHeadersRef.current = authHeaders;
 
-  const addRequest = useCallback((items) => {
-    if (!items || !items.length) return null;
-    const request = {
-      id: generateShortId(),
-      requestedAt: new Date().toISOString(),
-      items: items.map(({ orgId, orgName, permission }) => ({
-        orgId,
-        orgName,
-        permission: permission === 'write' ? 'write' : 'read',
-        status: 'pending',
-        approvedAt: null,
-      })),
-    };
-    setRequests((prev) => [request, ...prev]);
-    return request.id;
-  }, []);
-
-  const updateRequestStatus = useCallback((id, status, approvedAt = null) => {
-    setRequests((prev) =>
-      prev.map((r) =>
-        r.id === id
-          ? {
-              ...r,
-              items: r.items.map((item) => ({
-                ...item,
-                status,
-                approvedAt: approvedAt ?? item.approvedAt,
-              })),
-            }
-          : r
-      )
-    );
-  }, []);
-
-  const updateItemStatus = useCallback((rowId, status, approvedAt = null) => {
-    const { requestId, itemIndex } = parseRequestRowId(rowId);
-    if (!requestId) return;
-    setRequests((prev) =>
-      prev.map((r) => {
-        if (r.id !== requestId) return r;
-        const next = [...r.items];
-        if (itemIndex >= 0 && itemIndex < next.length) {
-          next[itemIndex] = {
-            ...next[itemIndex],
-            status,
-            approvedAt: approvedAt ?? next[itemIndex].approvedAt,
-          };
+  const apiFetch = useCallback(
+    async (path, options = {}) => {
+      const res = await fetch(`${apiBaseUrl}/api/access-requests${path}`, {
+        ...options,
+        headers: authHeadersRef.current(),
+      });
+      const data = await res.json().catch(() => ({}));
+      if (!res.ok) throw new Error(data.error || `Request failed (${res.status})`);
+      return data;
+    },
+    [apiBaseUrl]
+  );
+
+  const refresh = useCallback(async () => {
+    setLoading(true);
+    try {
+      const data = await apiFetch('?scope=mine');
+      setRequests(data.items || []);
+      setError(null);
+    } catch (err) {
+      setError(err.message || 'Failed to load access requests');
+    } finally {
+      setLoading(false);
+    }
+  }, [apiFetch]);
+
+  useEffect(() => {
+    if (isAuthenticated) {
+      refresh();
+    } else {
+      setRequests([]);
+    }
+  }, [isAuthenticated, refresh]);
+
+  // Live updates: the backend pushes request and grant changes, so the list never polls
+  const userEmail = (user?.email || '').toLowerCase();
+  useEffect(() => {
+    if (!isAuthenticated) return undefined;
+    const patchItems = (changes, patch) =>
+      setRequests((prev) =>
+        prev.map((r) => {
+          const mine = changes.filter((c) => c.requestId === r.id);
+          if (!mine.length) return r;
+          const next = [...r.items];
+          mine.forEach((change) => {
+            const index =
+              change.itemIndex ?? next.findIndex((item) => item.rowId === change.rowId);
+            if (index >= 0 && index < next.length) next[index] = patch(next[index], change);
+          });
+          return { ...r, items: next };
+        })
+      );
+    return openEventStream(
+      `${apiBaseUrl}/api/events`,
+      () => authHeadersRef.current(),
+      (type, data) => {
+        if (type === 'resync') {
+          refresh();
+        } else if (type === 'access-request' && data.action === 'created') {
+          if (data.request?.requester?.email !== userEmail) return;
+          setRequests((prev) =>
+            prev.some((r) => r.id === data.request.id) ? prev : [data.request, ...prev]
+          );
+        } else if (type === 'access-request') {
+          patchItems(data.items || [], (item, change) => ({
+            ...item,
+            status: change.status,
+            approvedAt: change.approvedAt,
+          }));
+        } else if (type === 'grant') {
+          patchItems(data.items || [], (item, change) => ({
+            ...item,
+            provisioning: change.provisioning,
+          }));
         }
-        return { ...r, items: next };
-      })
+      }
     );
-  }, []);
+  }, [isAuthenticated, apiBaseUrl, userEmail, refresh]);
+
+  const addRequest = useCallback(
+    async (items) => {
+      if (!items || !items.length) return null;
+      const created = await apiFetch('', {
+        method: 'POST',
+        body: JSON.stringify({
+          items: items.map(({ orgId, orgName, permission }) => ({
+            orgId,
+            orgName,
+            permission: permission === 'write' ? 'write' : 'read',
+          })),
+        }),
+      });
+      setRequests((prev) => [created, ...prev]);
+      return created.id;
+    },
+    [apiFetch]
+  );
+
+  const updateRequestStatus = useCallback(
+    async (id, status, approvedAt = null) => {
+      // Optimistic update; the server's copy replaces it (or a reload undoes it on error)
+      setRequests((prev) =>
+        prev.map((r) =>
+          r.id === id
+            ? {
+                ...r,
+                items: r.items.map((item) => ({
+                  ...item,
+                  status,
+                  approvedAt: approvedAt ?? item.approvedAt,
+                })),
+              }
+            : r
+        )
+      );
+      try {
+        const updated = await apiFetch(`/${encodeURIComponent(id)}/status`, {
+          method: 'PUT',
+          body: JSON.stringify({ status, approvedAt }),
+        });
+        setRequests((prev) => prev.map((r) => (r.id === id ? updated : r)));
+      } catch (err) {
+        setError(err.message || 'Failed to update access request');
+        refresh();
+      }
+    },
+    [apiFetch, refresh]
+  );
+
+  const updateItemStatus = useCallback(
+    async (rowId, status, approvedAt = null) => {
+      const { requestId, itemIndex } = parseRequestRowId(rowId);
+      if (!requestId) return;
+      setRequests((prev) =>
+        prev.map((r) => {
+          if (r.id !== requestId) return r;
+          const next = [...r.items];
+          if (itemIndex >= 0 && itemIndex < next.length) {
+            next[itemIndex] = {
+              ...next[itemIndex],
+              status,
+              approvedAt: approvedAt ?? next[itemIndex].approvedAt,
+            };
+          }
+          return { ...r, items: next };
+        })
+      );
+      try {
+        const updated = await apiFetch(`/rows/${encodeURIComponent(rowId)}/status`, {
+          method: 'PUT',
+          body: JSON.stringify({ status, approvedAt }),
+        });
+        setRequests((prev) =>
+          prev.map((r) => {
+            if (r.id !== requestId) return r;
+            const next = [...r.items];
+            const { requestId: _requestId, requester: _requester, ...item } = updated;
+            next[itemIndex] = item;
+            return { ...r, items: next };
+          })
+        );
+      } catch (err) {
+        setError(err.message || 'Failed to update access request');
+        refresh();
+      }
+    },
+    [apiFetch, refresh]
+  );
+
+  const updateItemsStatus = useCallback(
+    async (rowIds, status, approvedAt = null) => {
+      if (!rowIds || !rowIds.length) return null;
+      const targets = rowIds
+        .map((rowId) => ({ rowId, ...parseRequestRowId(rowId) }))
+        .filter((t) => t.requestId);
+      const applyItems = (prev, itemFor) =>
+        prev.map((r) => {
+          const mine = targets.filter((t) => t.requestId === r.id);
+          if (!mine.length) return r;
+          const next = [...r.items];
+          mine.forEach(({ rowId, itemIndex }) => {
+            if (itemIndex >= 0 && itemIndex < next.length) {
+              const item = itemFor(next[itemIndex], rowId);
+              if (item) next[itemIndex] = item;
+            }
+          });
+          return { ...r, items: next };
+        });
+      setRequests((prev) =>
+        applyItems(prev, (item) => ({ ...item, status, approvedAt: approvedAt ?? item.approvedAt }))
+      );
+      try {
+        // One request for the whole selection; the server applies it in one transaction
+        const data = await apiFetch('/bulk-status', {
+          method: 'POST',
+          body: JSON.stringify({ rowIds, status, approvedAt }),
+        });
+        if (data.failed) {
+          setError(`${data.failed} of ${rowIds.length} items could not be updated`);
+          refresh();
+        } else {
+          setRequests((prev) =>
+            applyItems(prev, (_item, rowId) => {
+              const result = data.results[rowId];
+              if (!result || !result.ok) return null;
+              const { requestId: _requestId, requester: _requester, ...item } = result.item;
+              return item;
+            })
+          );
+        }
+        return data;
+      } catch (err) {
+        setError(err.message || 'Failed to update access requests');
+        refresh();
+        return null;
+      }
+    },
+    [apiFetch, refresh]
+  );
 
   const value = {
     requests,
+    loading,
+    error,
+    refresh,
     addRequest,
     updateRequestStatus,
     updateItemStatus,
+    updateItemsStatus,
   };
 
   return (
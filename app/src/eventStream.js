@@ -0,0 +1,74 @@
+/**
+ * Read the backend's server-sent events (/api/events) with fetch, so the
+ * Authorization header can be sent (EventSource cannot send headers).
+ * Reconnects after errors, resuming from the last event ID; when the server
+ * is at its stream limit (503) it waits for the Retry-After it sends.
+ *
+ * @param {string} url
+ * @param {() => object} getHeaders - called on every (re)connect
+ * @param {(type: string, data: object) => void} onEvent
+ * @returns {() => void} stop
+ */
+export function openEventStream(url, getHeaders, onEvent) {
+  const controller = new AbortController();
+  let lastEventId = null;
+  let retryMs = 3000;
+
+  const dispatch = (frame) => {
+    let type = 'message';
+    let id = null;
+    const data = [];
+    for (const line of frame.split('\n')) {
+      if (!line || line.startsWith(':')) continue;
+      const colon = line.indexOf(':');
+      const field = colon === -1 ? line : line.slice(0, colon);
+      const value = colon === -1 ? '' : line.slice(colon + 1).replace(/^ /, '');
+      if (field === 'event') type = value;
+      else if (field === 'data') data.push(value);
+      else if (field === 'id') id = value;
+      else if (field === 'retry' && /^\d+$/.test(value)) retryMs = parseInt(value, 10);
+    }
+    if (id) lastEventId = id;
+    if (!data.length) return;
+    try {
+      onEvent(type, JSON.parse(data.join('\n')));
+    } catch (err) {
+      // Ignore malformed frames
+    }
+  };
+
+  const run = async () => {
+    while (!controller.signal.aborted) {
+      let waitMs = retryMs;
+      try {
+        const headers = { ...getHeaders(), Accept: 'text/event-stream' };
+        if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+        const res = await fetch(url, { headers, signal: controller.signal });
+        if (!res.ok || !res.body) {
+          const retryAfter = parseInt(res.headers.get('Retry-After'), 10);
+          if (retryAfter > 0) waitMs = retryAfter * 1000;
+          throw new Error(`Event stream failed (${res.status})`);
+        }
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true }).replace(/\r\n?/g, '\n');
+          let end;
+          while ((end = buffer.indexOf('\n\n')) !== -1) {
+            dispatch(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return;
+      }
+      await new Promise((resolve) => setTimeout(resolve, waitMs));
+    }
+  };
+
+  run();
+  return () => controller.abort();
+}
@@ -26,10 +26,23 @@ const statusLabel = (status) => {
     rejected: 'Rejected',
     cancelled: 'Cancelled',
     withdrawn: 'Withdrawn',
+    'approved:queued': 'Approved (provisioning)',
+    'approved:submitting': 'Approved (provisioning)',
+    'approved:submitted': 'Approved (provisioning)',
+    'approved:active': 'Active',
+    'approved:failed': 'Approved (provisioning failed)',
+    'approved:expiring': 'Expiring',
+    'approved:revoking': 'Expiring',
+    'approved:revoke_submitted': 'Expiring',
+    'approved:expired': 'Expired',
   };
   return map[status] || status;
 };
 
+/** Item status, refined by its Meraki provisioning state once approved. */
+const itemStatus = (item) =>
+  item.status === 'approved' && item.provisioning ? `approved:${item.provisioning.status}` : item.status;
+
 /** If all items have the same value for key, return it; otherwise return '(multiple)'. */
 function uniformOrMultiple(items, getValue) {
   if (!items.length) return '';
@@ -55,7 +68,7 @@ function buildTableRows(requests) {
         scope: item.orgName,
         permission: item.permission,
         approvalAt: item.approvedAt,
-        status: item.status,
+        status: itemStatus(item),
       });
     } else {
       const children = req.items.map((item, i) => ({
@@ -64,7 +77,7 @@ function buildTableRows(requests) {
         scope: item.orgName,
         permission: item.permission,
         approvalAt: item.approvedAt,
-        status: item.status,
+        status: itemStatus(item),
       }));
       rows.push({
         rowId: req.id,
@@ -72,7 +85,7 @@ function buildTableRows(requests) {
         scope: uniformOrMultiple(req.items, (i) => i.orgName),
         permission: uniformOrMultiple(req.items, (i) => i.permission),
         approvalAt: uniformOrMultiple(req.items, (i) => i.approvedAt),
-        status: uniformOrMultiple(req.items, (i) => i.status),
+        status: uniformOrMultiple(req.items, itemStatus),
         children,
       });
     }
@@ -106,7 +119,7 @@ function BulkWithdrawButton({ onWithdraw, table }) {
 }
 
 const ApprovalsPage = () => {
-  const { requests, updateItemStatus } = useAccessRequests();
+  const { requests, updateItemsStatus } = useAccessRequests();
   const [rowSelection, setRowSelection] = useState({});
   const [tableMounted, setTableMounted] = useState(false);
 
@@ -231,11 +244,10 @@ const ApprovalsPage = () => {
         }
       };
       rows.forEach(visit);
-      const at = new Date().toISOString();
-      ids.forEach((rowId) => updateItemStatus(rowId, 'withdrawn', at));
+      updateItemsStatus(ids, 'withdrawn', new Date().toISOString());
       setRowSelection({});
     },
-    [table, updateItemStatus]
+    [table, updateItemsStatus]
   );
 
   return (
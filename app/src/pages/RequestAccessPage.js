@@ -80,7 +80,7 @@ const RequestAccessPage = () => {
     label: org.name || org.id,
   }));
 
-  const handleSubmit = (e) => {
+  const handleSubmit = async (e) => {
     e.preventDefault();
     if (!selectedOrgIds.length) return;
     setSubmitting(true);
@@ -90,10 +90,16 @@ const RequestAccessPage = () => {
       orgName: (idToOrg[orgId] && idToOrg[orgId].name) || orgId,
       permission,
     }));
-    addRequest(items);
-    setSubmitted(true);
-    setSubmitting(false);
-    onOrgsClear();
+    try {
+      await addRequest(items);
+      setError(null);
+      setSubmitted(true);
+      onOrgsClear();
+    } catch (err) {
+      setError(err.message || 'Failed to submit request');
+    } finally {
+      setSubmitting(false);
+    }
   };
 
   return (
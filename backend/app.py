@@ -5,13 +5,14 @@ Flask application providing SAML SSO authentication with Duo Security
 for Just-in-Time admin access provisioning.
 """
 
-from flask import Flask, jsonify, session
+from flask import Flask, g, jsonify, session
 from flask_cors import CORS
 from flask_session import Session
 from dotenv import load_dotenv
 import os
 import sys
 import logging
+import time
 from datetime import timedelta
 
 # Known placeholder values that must not be used in production
@@ -24,8 +25,20 @@ _INSECURE_SECRET_KEY_PLACEHOLDERS = (
 load_dotenv()
 
 # Import routes
-from routes.auth import auth_bp
-from routes.meraki import meraki_bp
+from routes.auth import auth_bp, configure_code_store
+from routes.meraki import (
+    ORGANIZATIONS_PENDING_HEADER, meraki_bp, configure_organizations_cache, configure_rate_limiter,
+    start_membership_index, start_organizations_refresh, start_provisioning,
+)
+from routes.access_requests import access_requests_bp
+from routes.audit import audit_bp
+from routes.events import events_bp
+from routes.metrics import metrics_bp
+from routes.profiling import (
+    profiling_bp, begin_request_profile, discard_request_profile, end_request_profile,
+)
+from services.events import configure_event_relay
+from services.metrics import HTTP_REQUEST_SECONDS
 
 
 def create_app():
@@ -71,6 +84,22 @@ def create_app():
     # Optional: Redis session store
     if app.config['SESSION_TYPE'] == 'redis':
         app.config['SESSION_REDIS'] = os.getenv('SESSION_REDIS', 'redis://localhost:6379')
+
+    # Optional: one-time SAML->JWT codes in Redis so any worker can redeem them
+    if os.getenv('ONE_TIME_CODE_BACKEND', 'memory').lower() == 'redis':
+        configure_code_store(os.getenv('SESSION_REDIS', 'redis://localhost:6379'))
+
+    # Optional: share the Meraki organizations cache between workers (same Redis URL)
+    if os.getenv('ORGANIZATIONS_CACHE_BACKEND', 'memory').lower() == 'redis':
+        configure_organizations_cache(os.getenv('SESSION_REDIS', 'redis://localhost:6379'))
+
+    # Optional: one Meraki rate-limit budget shared by all workers (same Redis URL)
+    if os.getenv('MERAKI_RATE_LIMIT_BACKEND', 'memory').lower() == 'redis':
+        configure_rate_limiter(os.getenv('SESSION_REDIS', 'redis://localhost:6379'))
+
+    # Optional: deliver /api/events to streams on every worker via Redis pub/sub (same Redis URL)
+    if os.getenv('EVENTS_BACKEND', 'memory').lower() == 'redis':
+        configure_event_relay(os.getenv('SESSION_REDIS', 'redis://localhost:6379'))
     
     # ===================
     # CORS Configuration
@@ -83,6 +112,7 @@ def create_app():
          origins=allowed_origins,
          supports_credentials=True,
          allow_headers=['Content-Type', 'Authorization'],
+         expose_headers=['X-Organizations-Stale', 'Retry-After'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
     
     # ===================
@@ -115,6 +145,23 @@ def create_app():
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(meraki_bp)
+    app.register_blueprint(access_requests_bp)
+    app.register_blueprint(events_bp)
+    app.register_blueprint(profiling_bp)
+    app.register_blueprint(audit_bp)
+    metrics_enabled = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    if metrics_enabled:
+        app.register_blueprint(metrics_bp)
+
+    # Warm the organizations cache now and keep it refreshed ahead of expiry
+    if os.getenv('ORGANIZATIONS_REFRESH_ENABLED', 'true').lower() == 'true':
+        start_organizations_refresh()
+
+    # Crawl organization admins so /my-organizations can answer per user
+    start_membership_index()
+
+    # Resume JIT grants that were queued or in flight when the last process stopped
+    start_provisioning()
     
     # ===================
     # Health Check Endpoint
@@ -143,7 +190,12 @@ def create_app():
                 'saml_acs': '/api/auth/saml/acs',
                 'current_user': '/api/auth/me',
                 'logout': '/api/auth/logout',
-                'metadata': '/api/auth/metadata'
+                'metadata': '/api/auth/metadata',
+                'access_requests': '/api/access-requests',
+                'events': '/api/events',
+                'metrics': '/metrics',
+                'profiles': '/api/profiles',
+                'audit': '/api/audit'
             }
         })
     
@@ -175,7 +227,9 @@ def create_app():
     def log_request():
         """Log incoming requests"""
         from flask import request
+        g.request_started = time.perf_counter()
         logger.debug(f"{request.method} {request.path} from {request.remote_addr}")
+        begin_request_profile()
     
     @app.after_request
     def log_response(response):
@@ -184,13 +238,33 @@ def create_app():
         
         # Log response
         logger.debug(f"{request.method} {request.path} -> {response.status_code}")
+
+        # asgi.py swallows this internal response and replays the request: only the replay is recorded
+        if ORGANIZATIONS_PENDING_HEADER in response.headers:
+            discard_request_profile()
+            return response
+
+        # Latency by URL rule (not raw path) so IDs don't explode the label set
+        started = g.get('request_started')
+        if metrics_enabled and started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            HTTP_REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(
+                time.perf_counter() - started
+            )
         
+        end_request_profile(response)
+
         # Add security headers
         response.headers['X-Content-Type-Options'] = 'nosniff'
         response.headers['X-Frame-Options'] = 'DENY'
         response.headers['X-XSS-Protection'] = '1; mode=block'
         
         return response
+
+    @app.teardown_request
+    def finish_request(exc):
+        """Drop any profile the response hooks did not finish (e.g. unhandled errors)"""
+        discard_request_profile(exc)
     
     return app
 
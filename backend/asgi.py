@@ -0,0 +1,107 @@
+"""
+ASGI entry point (async serving mode).
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+The app is the same create_app() Flask application, so CORS, sessions,
+security headers, metrics and profiling behave exactly as under a WSGI
+server. Requests run on a bounded thread pool (ASGI_WSGI_THREADS, see
+services/wsgi_bridge.py), and the I/O-bound part is taken off it: when
+/api/meraki/organizations or /api/meraki/my-organizations misses the cache,
+the view answers an internal pending response within microseconds, this
+layer awaits the upstream getOrganizations on the async Meraki engine
+(routes.meraki.load_organizations_async) and replays the request, which is
+then served from the cache. The load shares the single-flight of synchronous
+fetches, and only the replay is measured and profiled. A slow Meraki day
+therefore holds event-loop tasks rather than worker threads, and one process
+can wait on many upstream calls at once.
+
+Requests that reach Meraki synchronously elsewhere (provisioning runs in
+the background scheduler) are unchanged.
+"""
+
+import logging
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import create_app
+from routes.meraki import (
+    ORGANIZATIONS_PENDING_HEADER, defer_organization_misses, load_organizations_async, replaying_organization_miss,
+)
+from services.circuit_breaker import CircuitOpen
+from services.wsgi_bridge import ClientDisconnected, WsgiBridge, read_body
+
+logger = logging.getLogger(__name__)
+
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', 32))
+# Routes whose cache misses are awaited instead of fetched on a worker thread
+DEFERRED_ORGANIZATION_PATHS = ('/api/meraki/organizations', '/api/meraki/my-organizations')
+_PENDING_HEADER = ORGANIZATIONS_PENDING_HEADER.lower().encode('latin-1')
+
+
+class AsyncMerakiApp:
+    """ASGI app: the Flask app over WsgiBridge, with organization misses awaited on the event loop."""
+
+    def __init__(self, flask_app, max_threads: int = ASGI_WSGI_THREADS):
+        self.flask_app = flask_app
+        self.bridge = WsgiBridge(flask_app, max_threads)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http' and scope['path'] in DEFERRED_ORGANIZATION_PATHS:
+            return await self._organizations(scope, receive, send)
+        return await self.bridge(scope, receive, send)
+
+    async def _organizations(self, scope, receive, send):
+        try:
+            body = await read_body(receive)
+        except ClientDisconnected:
+            return
+        pending = []
+
+        async def send_unless_pending(message):
+            if message['type'] == 'http.response.start':
+                value = dict(message.get('headers', [])).get(_PENDING_HEADER)
+                if value is not None:
+                    pending.append(value.decode('latin-1'))
+                    return
+            if not pending:
+                await send(message)
+
+        token = defer_organization_misses.set(True)
+        try:
+            await self.bridge(scope, receive, send_unless_pending, body=body)
+        finally:
+            defer_organization_misses.reset(token)
+        if not pending:
+            return
+
+        try:
+            await load_organizations_async(pending[0])
+        except CircuitOpen:
+            pass  # the replay serves the last good list (or a 502) without calling Meraki
+        except Exception:
+            # The replay below then fetches synchronously and renders the usual 502 on failure
+            logger.exception("Async organizations load failed; falling back to the sync path")
+        token = replaying_organization_miss.set(True)
+        try:
+            await self.bridge(scope, receive, send, body=body)
+        finally:
+            replaying_organization_miss.reset(token)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.bridge.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = AsyncMerakiApp(create_app())
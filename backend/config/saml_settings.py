@@ -3,14 +3,31 @@ SAML Configuration for Duo SSO Integration
 
 This module configures SAML settings for authentication with Duo Security.
 It reads configuration from environment variables.
+
+get_saml_settings_object() returns a parsed and validated OneLogin_Saml2_Settings
+shared between requests, so python3-saml does not re-parse the settings and the
+Duo X.509 certificate on every login. It is rebuilt when any of the settings
+environment variables (including the certificate) change; once the settings
+are frozen (config/settings.py) they never do.
 """
 
-import os
+import threading
+from collections import OrderedDict
+
 from dotenv import load_dotenv
+from onelogin.saml2.settings import OneLogin_Saml2_Settings
+
+from config.settings import get_settings
 
 # Load environment variables
 load_dotenv()
 
+_SETTINGS_CACHE_MAX_ENTRIES = 16
+
+# (env fingerprint, https, http_host) -> { 'settings': OneLogin_Saml2_Settings, 'metadata': (xml, errors) }
+_settings_cache = OrderedDict()
+_settings_cache_lock = threading.Lock()
+
 
 def get_saml_settings():
     """
@@ -19,14 +36,15 @@ def get_saml_settings():
     Returns:
         dict: SAML configuration dictionary
     """
-    app_url = os.getenv('APP_URL', 'http://localhost:5001')
+    config = get_settings()
+    app_url = config.app_url
     
     settings = {
         # Strict mode - set to True in production
-        "strict": os.getenv('FLASK_ENV') == 'production',
+        "strict": config.flask_env == 'production',
         
         # Debug mode - set to False in production
-        "debug": os.getenv('FLASK_ENV') == 'development',
+        "debug": config.flask_env == 'development',
         
         # Service Provider (SP) Configuration - Your Application
         "sp": {
@@ -54,22 +72,22 @@ def get_saml_settings():
         
         # Identity Provider (IdP) Configuration - Duo SSO
         "idp": {
-            "entityId": os.getenv('DUO_ENTITY_ID', ''),
+            "entityId": config.duo_entity_id,
             
             # Single Sign-On Service
             "singleSignOnService": {
-                "url": os.getenv('DUO_SSO_URL', ''),
+                "url": config.duo_sso_url,
                 "binding": "urn:oasis:names:tc:SAML:2.0:bindings:HTTP-Redirect"
             },
             
             # Single Logout Service
             "singleLogoutService": {
-                "url": os.getenv('DUO_SLO_URL', ''),
+                "url": config.duo_slo_url,
                 "binding": "urn:oasis:names:tc:SAML:2.0:bindings:HTTP-Redirect"
             },
             
             # Duo's X.509 certificate for validating SAML assertions
-            "x509cert": os.getenv('DUO_X509_CERT', '')
+            "x509cert": config.duo_x509_cert
         },
         
         # Security settings
@@ -119,3 +137,58 @@ def prepare_flask_request(request):
         'query_string': request.query_string.decode('utf-8')
     }
 
+
+
+def _settings_cache_entry(req):
+    """Cache entry for the current environment and the request's external scheme/host."""
+    key = (get_settings().saml_fingerprint, req.get('https'), req.get('http_host'))
+    with _settings_cache_lock:
+        entry = _settings_cache.get(key)
+        if entry is not None:
+            _settings_cache.move_to_end(key)
+            return entry
+    # Parse and validate outside the lock; a racing request may build a duplicate
+    entry = {'settings': OneLogin_Saml2_Settings(get_saml_settings()), 'metadata': None}
+    with _settings_cache_lock:
+        entry = _settings_cache.setdefault(key, entry)
+        # Entries for an old fingerprint are never hit again; bound by LRU eviction
+        while len(_settings_cache) > _SETTINGS_CACHE_MAX_ENTRIES:
+            _settings_cache.popitem(last=False)
+    return entry
+
+
+def get_saml_settings_object(req):
+    """
+    Get a parsed, validated OneLogin_Saml2_Settings shared between requests.
+    Pass it to OneLogin_Saml2_Auth instead of the settings dict.
+
+    Args:
+        req: Request data from prepare_flask_request()
+
+    Returns:
+        OneLogin_Saml2_Settings: Cached settings (treat as read-only)
+    """
+    return _settings_cache_entry(req)['settings']
+
+
+def get_sp_metadata(req):
+    """
+    Get SP metadata XML and its validation errors, generated once per settings object.
+
+    Returns:
+        tuple: (metadata_xml, errors)
+    """
+    entry = _settings_cache_entry(req)
+    metadata = entry['metadata']
+    if metadata is None:
+        settings = entry['settings']
+        xml = settings.get_sp_metadata()
+        metadata = (xml, settings.validate_metadata(xml))
+        entry['metadata'] = metadata
+    return metadata
+
+
+def clear_saml_settings_cache():
+    """Drop all cached settings objects (e.g. after rotating the Duo certificate in place)."""
+    with _settings_cache_lock:
+        _settings_cache.clear()
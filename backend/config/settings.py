@@ -0,0 +1,98 @@
+"""
+Settings read at request time.
+
+Most configuration is read into module constants when routes and services
+are imported. The values below used to be read with os.getenv on every
+request (SAML settings, frontend redirects, approver checks, Meraki keys);
+they now come from one immutable Settings object.
+
+get_settings() re-reads the environment on each call until
+freeze_settings() is called, so the development server still sees .env
+edits. The production entry point (wsgi.py) freezes the settings once
+before preloading the app, so every worker shares one parsed copy.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass, field
+
+# Settings that feed the SAML configuration (config/saml_settings.py)
+_SAML_FIELDS = ('app_url', 'flask_env', 'duo_entity_id', 'duo_sso_url', 'duo_slo_url', 'duo_x509_cert')
+
+
+@dataclass(frozen=True)
+class Settings:
+    app_url: str = 'http://localhost:5001'
+    frontend_url: str = 'http://localhost:3000'
+    flask_env: str = 'development'
+    duo_entity_id: str = ''
+    duo_sso_url: str = ''
+    duo_slo_url: str = ''
+    duo_x509_cert: str = field(default='', repr=False)
+    approver_emails: frozenset = frozenset()
+    meraki_dashboard_api_key: str = field(default='', repr=False)
+    meraki_user_api_key: str = field(default='', repr=False)
+    meraki_service_api_key: str = field(default='', repr=False)
+    meraki_provisioning_api_key: str = field(default='', repr=False)
+    # Hash of the SAML fields; config/saml_settings.py keys its cache on it
+    saml_fingerprint: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        digest = hashlib.sha256()
+        for name in _SAML_FIELDS:
+            digest.update(f"{name}={getattr(self, name)}\0".encode())
+        object.__setattr__(self, 'saml_fingerprint', digest.hexdigest())
+
+    @classmethod
+    def from_env(cls, environ=None) -> 'Settings':
+        env = os.environ if environ is None else environ
+        return cls(
+            app_url=env.get('APP_URL', 'http://localhost:5001'),
+            frontend_url=env.get('FRONTEND_URL', 'http://localhost:3000'),
+            flask_env=env.get('FLASK_ENV', 'development'),
+            duo_entity_id=env.get('DUO_ENTITY_ID', ''),
+            duo_sso_url=env.get('DUO_SSO_URL', ''),
+            duo_slo_url=env.get('DUO_SLO_URL', ''),
+            duo_x509_cert=env.get('DUO_X509_CERT', ''),
+            approver_emails=frozenset(
+                e.strip().lower() for e in env.get('APPROVER_EMAILS', '').split(',') if e.strip()
+            ),
+            meraki_dashboard_api_key=env.get('MERAKI_DASHBOARD_API_KEY', ''),
+            meraki_user_api_key=env.get('MERAKI_USER_API_KEY', ''),
+            meraki_service_api_key=env.get('MERAKI_SERVICE_API_KEY', ''),
+            meraki_provisioning_api_key=env.get('MERAKI_PROVISIONING_API_KEY', ''),
+        )
+
+    @property
+    def user_api_key(self) -> str:
+        """My Access page key: MERAKI_USER_API_KEY, else MERAKI_DASHBOARD_API_KEY."""
+        return self.meraki_user_api_key or self.meraki_dashboard_api_key
+
+    @property
+    def service_api_key(self) -> str:
+        """Request Access page key: MERAKI_SERVICE_API_KEY, else MERAKI_DASHBOARD_API_KEY."""
+        return self.meraki_service_api_key or self.meraki_dashboard_api_key
+
+    @property
+    def provisioning_api_key(self) -> str:
+        """Admin-provisioning key: MERAKI_PROVISIONING_API_KEY, else the service key."""
+        return self.meraki_provisioning_api_key or self.service_api_key
+
+
+_frozen = None
+
+
+def get_settings() -> Settings:
+    """The frozen settings, or a fresh read of the environment if not frozen."""
+    return _frozen if _frozen is not None else Settings.from_env()
+
+
+def freeze_settings(environ=None) -> Settings:
+    """Parse the environment once; later get_settings() calls return this object."""
+    global _frozen
+    _frozen = Settings.from_env(environ)
+    return _frozen
+
+
+def settings_frozen() -> bool:
+    return _frozen is not None
@@ -0,0 +1,34 @@
+"""
+gunicorn settings for the production entry point (wsgi.py):
+
+    cd backend && gunicorn -c gunicorn.conf.py
+
+The app is preloaded and warmed in the master (see wsgi.py), then forked
+into WEB_CONCURRENCY workers that share it copy-on-write.
+"""
+
+import os
+
+wsgi_app = 'wsgi:application'
+preload_app = True
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', '5001')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+# Threaded workers: /api/events streams hold a thread each (at most EVENTS_MAX_STREAMS per worker)
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+
+
+def post_fork(server, worker):
+    import wsgi
+    wsgi.post_fork()
+
+
+def post_worker_init(worker):
+    import wsgi
+    wsgi.worker_ready()
+
+
+def child_exit(server, worker):
+    from services.metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
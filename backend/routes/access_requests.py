@@ -0,0 +1,396 @@
+"""
+Access request routes.
+
+Access requests used to live only in the browser (AccessRequestsContext);
+they are now persisted server-side (services/access_requests.py, SQLite in
+WAL mode at DATABASE_PATH) so every approver sees the same queue.
+
+- Requesters see and withdraw/cancel their own requests.
+- Approvers (role 'admin' or 'approver', or an email listed in
+  APPROVER_EMAILS) see all requests and approve/reject items.
+
+List endpoints are keyset-paginated: pass the returned next_before as
+?before= to get the next (older) page. POST /bulk-status changes many rows
+(e.g. an Approvals page selection) in one request and one transaction.
+
+Every change is also pushed to /api/events (routes/events.py).
+
+Approved items are handed to the provisioning pipeline (routes/meraki.py);
+each item carries its grant's progress as provisioning: { status, error,
+adminId, expiresAt } (null until approved). Grants are revoked again once
+expiresAt passes (status 'expiring' -> 'expired').
+"""
+
+import logging
+from flask import Blueprint, jsonify, request
+
+from config.settings import get_settings
+from routes.meraki import provision_grants, provisioning_statuses
+from services.access_requests import (
+    ITEM_STATUSES, AccessRequestNotFound, AccessRequestStore, InvalidTransition,
+    parse_request_id, parse_row_id,
+)
+from services.audit import record as record_audit
+from services.database import get_database
+from services.events import publish as publish_event
+
+access_requests_bp = Blueprint('access_requests', __name__, url_prefix='/api/access-requests')
+logger = logging.getLogger(__name__)
+
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 500
+MAX_ITEMS_PER_REQUEST = 200
+MAX_BULK_ROWS = 1000
+APPROVER_ROLES = ('admin', 'approver')
+# Statuses only approvers may set; requesters may withdraw/cancel their own items
+APPROVER_STATUSES = ('approved', 'rejected')
+
+_store = None
+
+
+def get_access_request_store() -> AccessRequestStore:
+    """Process-wide store on the configured database (created on first use)."""
+    global _store
+    if _store is None:
+        _store = AccessRequestStore(get_database())
+    return _store
+
+
+def _user_from_request():
+    """Require auth; returns (user_data, error_response)."""
+    from routes.auth import _user_from_request as auth_user
+    return auth_user()
+
+
+def _email(user_data) -> str:
+    return (user_data.get('email') or '').strip().lower()
+
+
+def _is_approver(user_data) -> bool:
+    return (
+        (user_data.get('role') or '').lower() in APPROVER_ROLES
+        or _email(user_data) in get_settings().approver_emails
+    )
+
+
+def _require_user():
+    user_data, err = _user_from_request()
+    if err:
+        return None, err
+    if not user_data:
+        return None, (jsonify({"error": "Not authenticated"}), 401)
+    return user_data, None
+
+
+def _check_status_change(user_data, requester: dict, status):
+    """Error response if user_data may not set status on requester's items, else None."""
+    if status not in ITEM_STATUSES or status == 'pending':
+        return jsonify({"error": f"Invalid status '{status}'"}), 400
+    own = (requester.get('email') or '').strip().lower() == _email(user_data)
+    if _is_approver(user_data):
+        if status in APPROVER_STATUSES and own:
+            return jsonify({"error": "Approvers cannot approve or reject their own requests"}), 403
+        return None
+    if status in APPROVER_STATUSES or not own:
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+
+def _with_provisioning(requests: list) -> list:
+    """Add each item's provisioning state (or None) to serialized requests."""
+    nums = [parse_request_id(r['id']) for r in requests]
+    statuses = provisioning_statuses(nums)
+    for num, r in zip(nums, requests):
+        for position, item in enumerate(r['items']):
+            item['provisioning'] = statuses.get((num, position))
+    return requests
+
+
+def _publish_items(action: str, requester_email: str, items: list, snapshot: dict = None):
+    """Push item changes to the requester's and approvers' event streams (/api/events)."""
+    data = {
+        'action': action,
+        'items': [
+            {'requestId': i['requestId'], 'rowId': i['rowId'], 'status': i['status'], 'approvedAt': i['approvedAt']}
+            for i in items
+        ],
+    }
+    if snapshot is not None:
+        data['request'] = snapshot
+    publish_event('access-request', data, {'emails': [requester_email], 'approvers': True})
+
+
+def _audit_items(action: str, user_data, items: list, status: str = None):
+    """One audit event per access request touched, listing its changed items."""
+    by_request = {}
+    for item in items:
+        by_request.setdefault(item['requestId'], []).append(
+            {'rowId': item['rowId'], 'orgId': item['orgId'], 'permission': item['permission'], 'status': item['status']}
+        )
+    for request_id, request_items in by_request.items():
+        details = {'items': request_items}
+        if status:
+            details['status'] = status
+        record_audit(action, actor=_email(user_data), target=request_id, details=details, ip=request.remote_addr)
+
+
+def _grant(num: int, position: int, requester: dict, item: dict) -> dict:
+    return {
+        'request_num': num,
+        'position': position,
+        'org_id': item['orgId'],
+        'email': requester['email'],
+        'name': requester.get('name'),
+        'permission': item['permission'],
+    }
+
+
+@access_requests_bp.route('', methods=['GET'])
+def list_access_requests():
+    """
+    List access requests, newest first.
+    Query: scope=mine|all (all requires approver), status, org_id,
+    since/until (ISO 8601 UTC), limit, before.
+    Returns { items, next_before }.
+    """
+    user_data, err = _require_user()
+    if err:
+        return err
+
+    args = request.args
+    scope = args.get('scope', 'mine')
+    if scope not in ('mine', 'all'):
+        return jsonify({"error": "scope must be 'mine' or 'all'"}), 400
+    if scope == 'all' and not _is_approver(user_data):
+        return jsonify({"error": "Forbidden"}), 403
+    status = args.get('status') or None
+    if status is not None and status not in ITEM_STATUSES:
+        return jsonify({"error": f"status must be one of: {', '.join(ITEM_STATUSES)}"}), 400
+    try:
+        limit = int(args.get('limit', LIST_DEFAULT_LIMIT))
+        before = int(args['before']) if args.get('before') else None
+    except ValueError:
+        return jsonify({"error": "limit and before must be integers"}), 400
+    if not 1 <= limit <= LIST_MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {LIST_MAX_LIMIT}"}), 400
+
+    items, next_before = get_access_request_store().list(
+        requester=_email(user_data) if scope == 'mine' else None,
+        status=status,
+        org_id=args.get('org_id') or None,
+        since=args.get('since') or None,
+        until=args.get('until') or None,
+        limit=limit,
+        before=before,
+    )
+    return jsonify({"items": _with_provisioning(items), "next_before": next_before})
+
+
+@access_requests_bp.route('', methods=['POST'])
+def create_access_request():
+    """
+    Create an access request for the current user.
+    Body: { items: [{ orgId, orgName, permission: 'read'|'write' }] }.
+    Returns the created request (201).
+    """
+    user_data, err = _require_user()
+    if err:
+        return err
+
+    body = request.get_json(silent=True) or {}
+    items = body.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "items must be a non-empty list"}), 400
+    if len(items) > MAX_ITEMS_PER_REQUEST:
+        return jsonify({"error": f"At most {MAX_ITEMS_PER_REQUEST} items per request"}), 400
+    for item in items:
+        if not isinstance(item, dict) or not item.get('orgId'):
+            return jsonify({"error": "Each item needs an orgId"}), 400
+        if item.get('permission', 'read') not in ('read', 'write'):
+            return jsonify({"error": "permission must be 'read' or 'write'"}), 400
+
+    created = get_access_request_store().create(
+        _email(user_data),
+        user_data.get('name') or user_data.get('email'),
+        [{**item, 'orgId': str(item['orgId'])} for item in items],
+    )
+    logger.info(f"Access request {created['id']} created by {user_data.get('email')} ({len(items)} items)")
+    created = _with_provisioning([created])[0]
+    _publish_items('created', created['requester']['email'],
+                   [{**i, 'requestId': created['id']} for i in created['items']], snapshot=created)
+    _audit_items('access_request.created', user_data, [{**i, 'requestId': created['id']} for i in created['items']])
+    return jsonify(created), 201
+
+
+@access_requests_bp.route('/bulk-status', methods=['POST'])
+def bulk_update_access_request_status():
+    """
+    Set the status of many items by row ID in one transaction.
+    Body: { rowIds: [...], status, approvedAt?, atomic? }. With atomic=true
+    nothing changes unless every row can (409 otherwise).
+    Returns { status, updated, failed, results: { rowId: { ok, item } | { ok, error, code } } }.
+    """
+    user_data, err = _require_user()
+    if err:
+        return err
+    body = request.get_json(silent=True) or {}
+    row_ids = body.get('rowIds')
+    status = body.get('status')
+    if not isinstance(row_ids, list) or not row_ids or not all(isinstance(r, str) for r in row_ids):
+        return jsonify({"error": "rowIds must be a non-empty list of row IDs"}), 400
+    if len(row_ids) > MAX_BULK_ROWS:
+        return jsonify({"error": f"At most {MAX_BULK_ROWS} rows per request"}), 400
+    if status not in ITEM_STATUSES or status == 'pending':
+        return jsonify({"error": f"Invalid status '{status}'"}), 400
+    row_ids = list(dict.fromkeys(row_ids))
+    atomic = bool(body.get('atomic'))
+    store = get_access_request_store()
+
+    # Authorization depends only on each row's requester, so check it before the write transaction
+    results = {}
+    allowed = []
+    for row_id, item in store.get_items(row_ids).items():
+        if isinstance(item, AccessRequestNotFound):
+            results[row_id] = {"ok": False, "error": "Access request not found", "code": 404}
+            continue
+        denied = _check_status_change(user_data, item['requester'], status)
+        if denied:
+            response, code = denied
+            results[row_id] = {"ok": False, "error": response.get_json()['error'], "code": code}
+            continue
+        allowed.append(row_id)
+    if atomic and results:
+        return jsonify(_bulk_response(status, row_ids, results)), 409
+
+    changed = store.update_items_status(
+        allowed, status, actor=_email(user_data),
+        stamp_approved_at=body.get('approvedAt') is not None, atomic=atomic,
+    ) if allowed else {}
+    updated = []
+    for row_id, item in changed.items():
+        if isinstance(item, AccessRequestNotFound):
+            results[row_id] = {"ok": False, "error": "Access request not found", "code": 404}
+        elif isinstance(item, InvalidTransition):
+            results[row_id] = {"ok": False, "error": str(item), "code": 409}
+        else:
+            updated.append((row_id, item))
+    if atomic and results:
+        return jsonify(_bulk_response(status, row_ids, results)), 409
+
+    if status == 'approved' and updated:
+        # One enqueue for the whole selection: the pipeline batches per organization
+        provision_grants([
+            _grant(*parse_row_id(row_id), item['requester'], item) for row_id, item in updated
+        ])
+    by_requester = {}
+    for _, item in updated:
+        by_requester.setdefault(item['requester']['email'], []).append(item)
+    for email, items in by_requester.items():
+        _publish_items('status', email, items)
+    _audit_items('access_request.status', user_data, [item for _, item in updated], status)
+    statuses = provisioning_statuses(sorted({parse_row_id(row_id)[0] for row_id, _ in updated}))
+    for row_id, item in updated:
+        item['provisioning'] = statuses.get(parse_row_id(row_id))
+        results[row_id] = {"ok": True, "item": item}
+    logger.info(f"Bulk status -> {status} by {user_data.get('email')}: "
+                f"{len(updated)} updated, {len(row_ids) - len(updated)} failed")
+    return jsonify(_bulk_response(status, row_ids, results))
+
+
+def _bulk_response(status, row_ids: list, results: dict) -> dict:
+    ok = sum(1 for r in results.values() if r['ok'])
+    return {
+        "status": status,
+        "updated": ok,
+        "failed": len(row_ids) - ok,
+        "results": {row_id: results.get(row_id, {"ok": False, "error": "Not applied", "code": 409})
+                    for row_id in row_ids},
+    }
+
+
+@access_requests_bp.route('/<request_id>', methods=['GET'])
+def get_access_request(request_id):
+    """One access request (own requests, or any for approvers)."""
+    user_data, err = _require_user()
+    if err:
+        return err
+    try:
+        found = get_access_request_store().get(request_id)
+    except AccessRequestNotFound:
+        return jsonify({"error": "Access request not found"}), 404
+    if found['requester']['email'] != _email(user_data) and not _is_approver(user_data):
+        return jsonify({"error": "Access request not found"}), 404
+    return jsonify(_with_provisioning([found])[0])
+
+
+@access_requests_bp.route('/<request_id>/status', methods=['PUT'])
+def update_access_request_status(request_id):
+    """
+    Set the status of every pending item of a request.
+    Body: { status, approvedAt? } (a non-null approvedAt stamps the server time).
+    """
+    user_data, err = _require_user()
+    if err:
+        return err
+    body = request.get_json(silent=True) or {}
+    store = get_access_request_store()
+    try:
+        found = store.get(request_id)
+        denied = _check_status_change(user_data, found['requester'], body.get('status'))
+        if denied:
+            return denied
+        updated = store.update_request_status(
+            request_id, body['status'], actor=_email(user_data),
+            stamp_approved_at=body.get('approvedAt') is not None,
+        )
+    except AccessRequestNotFound:
+        return jsonify({"error": "Access request not found"}), 404
+    except InvalidTransition as e:
+        return jsonify({"error": str(e)}), 409
+    logger.info(f"Access request {request_id} -> {body['status']} by {user_data.get('email')}")
+    if body['status'] == 'approved':
+        num = parse_request_id(request_id)
+        provision_grants([
+            _grant(num, position, updated['requester'], item)
+            for position, item in enumerate(updated['items']) if item['status'] == 'approved'
+        ])
+    _publish_items('status', updated['requester']['email'],
+                   [{**i, 'requestId': updated['id']} for i in updated['items']])
+    _audit_items('access_request.status', user_data,
+                 [{**i, 'requestId': updated['id']} for i in updated['items'] if i['status'] == body['status']],
+                 body['status'])
+    return jsonify(_with_provisioning([updated])[0])
+
+
+@access_requests_bp.route('/rows/<row_id>/status', methods=['PUT'])
+def update_access_request_item_status(row_id):
+    """
+    Set the status of one item by row ID ('req-10001' or 'req-10001.2').
+    Body: { status, approvedAt? }. Returns the updated item.
+    """
+    user_data, err = _require_user()
+    if err:
+        return err
+    body = request.get_json(silent=True) or {}
+    store = get_access_request_store()
+    try:
+        item = store.get_item(row_id)
+        denied = _check_status_change(user_data, item['requester'], body.get('status'))
+        if denied:
+            return denied
+        updated = store.update_item_status(
+            row_id, body['status'], actor=_email(user_data),
+            stamp_approved_at=body.get('approvedAt') is not None,
+        )
+    except AccessRequestNotFound:
+        return jsonify({"error": "Access request not found"}), 404
+    except InvalidTransition as e:
+        return jsonify({"error": str(e)}), 409
+    logger.info(f"Access request row {row_id} -> {body['status']} by {user_data.get('email')}")
+    num, position = parse_row_id(row_id)
+    if body['status'] == 'approved':
+        provision_grants([_grant(num, position, updated['requester'], updated)])
+    _publish_items('status', updated['requester']['email'], [updated])
+    _audit_items('access_request.status', user_data, [updated], body['status'])
+    updated['provisioning'] = provisioning_statuses([num]).get((num, position))
+    return jsonify(updated)
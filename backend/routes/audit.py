@@ -0,0 +1,67 @@
+"""
+Audit trail routes (services/audit.py). Approvers only.
+
+- GET /api/audit: events, newest first. Query: since/until (ISO 8601 UTC),
+  actor (email), action ('auth.login', or a prefix ending in '.' such as
+  'grant.'), limit, before. Returns { items, next_before }; pass next_before
+  as ?before= for the next (older) page.
+- GET /api/audit/stats: this worker's writer counters (recorded, written,
+  dropped, failed, batches), queue depth and last flush time.
+
+Events are written by a background thread about once a second
+(AUDIT_FLUSH_SECONDS), so the newest ones may take that long to show up.
+"""
+
+from flask import Blueprint, jsonify, request
+
+from routes.access_requests import _is_approver, _require_user
+from services.audit import AUDIT_ENABLED, get_audit_log
+
+audit_bp = Blueprint('audit', __name__, url_prefix='/api/audit')
+
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+
+
+def _require_approver():
+    user_data, err = _require_user()
+    if err:
+        return err
+    if not _is_approver(user_data):
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+
+@audit_bp.route('', methods=['GET'])
+def list_audit_events():
+    """Audit events, newest first, filtered by time range, actor and action."""
+    err = _require_approver()
+    if err:
+        return err
+    args = request.args
+    try:
+        limit = int(args.get('limit', LIST_DEFAULT_LIMIT))
+        before = int(args['before']) if args.get('before') else None
+    except ValueError:
+        return jsonify({"error": "limit and before must be integers"}), 400
+    if not 1 <= limit <= LIST_MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {LIST_MAX_LIMIT}"}), 400
+
+    items, next_before = get_audit_log().store.list(
+        since=args.get('since') or None,
+        until=args.get('until') or None,
+        actor=(args.get('actor') or '').strip().lower() or None,
+        action=args.get('action') or None,
+        limit=limit,
+        before=before,
+    )
+    return jsonify({"items": items, "next_before": next_before})
+
+
+@audit_bp.route('/stats', methods=['GET'])
+def audit_stats():
+    """Writer counters for this worker."""
+    err = _require_approver()
+    if err:
+        return err
+    return jsonify({'enabled': AUDIT_ENABLED, **get_audit_log().stats()})
@@ -13,21 +13,44 @@ import time
 from urllib.parse import quote
 
 import jwt
-from flask import Blueprint, request, redirect, session, jsonify, url_for
+from flask import Blueprint, current_app, request, redirect, session, jsonify, url_for
 from onelogin.saml2.auth import OneLogin_Saml2_Auth
 from onelogin.saml2.utils import OneLogin_Saml2_Utils
-from config.saml_settings import get_saml_settings, prepare_flask_request
+from config.settings import get_settings
+from config.saml_settings import get_saml_settings_object, get_sp_metadata, prepare_flask_request
+from services import audit
+from services.code_store import MemoryCodeStore, RedisCodeStore
+from services.metrics import JWT_VERIFICATION_SECONDS, ONE_TIME_CODES, SAML_ACS_SECONDS, timed
+from services.token_cache import VerifiedTokenCache
 
 # Create blueprint for auth routes
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 logger = logging.getLogger(__name__)
 
-# One-time codes for token exchange (code -> { user_data, expires_at })
-# In production, use Redis or similar with TTL
-_ONE_TIME_CODES = {}
+# One-time codes for token exchange (code -> { user_data, expires_at }).
+# In-memory by default; configure_code_store() switches to Redis so any worker can redeem.
+_one_time_codes = MemoryCodeStore()
 _CODE_TTL_SECONDS = 60
 _JWT_EXPIRY_SECONDS = int(os.getenv('JWT_EXPIRY_SECONDS', 43200))  # 12 hours default
 _JWT_ALGORITHM = 'HS256'
+# Already-verified Bearer tokens (0 disables the cache)
+_verified_tokens = VerifiedTokenCache(int(os.getenv('JWT_VERIFY_CACHE_SIZE', 4096)))
+
+
+def configure_code_store(redis_url: str = None):
+    """Use a Redis-backed one-time code store (shared by all workers), or in-memory when None."""
+    global _one_time_codes
+    _one_time_codes = RedisCodeStore(redis_url) if redis_url else MemoryCodeStore()
+    logger.info(f"One-time code store: {'Redis' if redis_url else 'in-memory'}")
+
+
+def update_code_gauge(scrape: bool = False):
+    """
+    Set the one_time_codes gauge. In-memory counts are cheap and follow every
+    put/pop; counting Redis codes takes a SCAN, so only scrapes do it.
+    """
+    if scrape or isinstance(_one_time_codes, MemoryCodeStore):
+        ONE_TIME_CODES.set(len(_one_time_codes))
 
 
 def _safe_user(user_data):
@@ -47,22 +70,34 @@ def _safe_user(user_data):
 def _user_from_request():
     """
     Resolve authenticated user from request: Bearer token first, then session.
+    Verified tokens are cached until they expire, so repeat calls skip jwt.decode.
     Returns (user_data_dict or None, error_response or None).
     """
     auth_header = request.headers.get('Authorization')
     if auth_header and auth_header.startswith('Bearer '):
         token = auth_header[7:].strip()
-        try:
-            payload = jwt.decode(
-                token,
-                os.getenv('SECRET_KEY'),
-                algorithms=[_JWT_ALGORITHM],
-            )
-            return (_safe_user(payload), None)
-        except jwt.ExpiredSignatureError:
-            return (None, (jsonify({"error": "Token expired"}), 401))
-        except jwt.InvalidTokenError:
-            return (None, (jsonify({"error": "Invalid token"}), 401))
+        secret = current_app.config['SECRET_KEY']
+        with timed(JWT_VERIFICATION_SECONDS, {}) as outcome:
+            cached = _verified_tokens.get(token, secret)
+            if cached is not None:
+                outcome['outcome'] = 'cached'
+                return (cached, None)
+            try:
+                payload = jwt.decode(
+                    token,
+                    secret,
+                    algorithms=[_JWT_ALGORITHM],
+                )
+                user = _safe_user(payload)
+                _verified_tokens.put(token, secret, user, payload.get('exp'))
+                outcome['outcome'] = 'valid'
+                return (user, None)
+            except jwt.ExpiredSignatureError:
+                outcome['outcome'] = 'expired'
+                return (None, (jsonify({"error": "Token expired"}), 401))
+            except jwt.InvalidTokenError:
+                outcome['outcome'] = 'invalid'
+                return (None, (jsonify({"error": "Invalid token"}), 401))
     if session.get('authenticated') and session.get('user'):
         return (_safe_user(session.get('user')), None)
     return (None, None)
@@ -76,7 +111,7 @@ def saml_login():
     """
     try:
         req = prepare_flask_request(request)
-        auth = OneLogin_Saml2_Auth(req, get_saml_settings())
+        auth = OneLogin_Saml2_Auth(req, get_saml_settings_object(req))
         
         # Store the intended destination after login
         return_to = request.args.get('return_to', '/')
@@ -98,9 +133,18 @@ def saml_acs():
     Assertion Consumer Service (ACS) endpoint.
     Receives and validates SAML assertion from Duo after successful authentication.
     """
+    with timed(SAML_ACS_SECONDS, {}) as outcome:
+        response = _process_saml_response()
+        status = response[1] if isinstance(response, tuple) else response.status_code
+        outcome['outcome'] = 'success' if status < 400 else 'rejected' if status < 500 else 'error'
+        return response
+
+
+def _process_saml_response():
+    """Validate the posted assertion; redirect to the frontend with a one-time code, or an error response."""
     try:
         req = prepare_flask_request(request)
-        auth = OneLogin_Saml2_Auth(req, get_saml_settings())
+        auth = OneLogin_Saml2_Auth(req, get_saml_settings_object(req))
         
         # Process the SAML response
         auth.process_response()
@@ -109,6 +153,8 @@ def saml_acs():
         if errors:
             logger.error(f"SAML authentication errors: {errors}")
             logger.error(f"Error reason: {auth.get_last_error_reason()}")
+            audit.record('auth.login', outcome='rejected', ip=request.remote_addr,
+                         details={'errors': errors, 'reason': auth.get_last_error_reason()})
             return jsonify({
                 "error": "SAML authentication failed",
                 "details": errors
@@ -117,6 +163,8 @@ def saml_acs():
         # Check if authentication was successful
         if not auth.is_authenticated():
             logger.error("SAML authentication failed: User not authenticated")
+            audit.record('auth.login', outcome='rejected', ip=request.remote_addr,
+                         details={'reason': 'not authenticated'})
             return jsonify({"error": "Authentication failed"}), 401
         
         # Get user attributes from SAML assertion
@@ -146,15 +194,18 @@ def saml_acs():
         session.permanent = True
 
         logger.info(f"Session created for user: {user_data['email']}")
+        audit.record('auth.login', actor=user_data['email'], ip=request.remote_addr,
+                     details={'role': user_data['role']})
 
         # Issue one-time code for token exchange (no cookie needed)
         return_to = session.pop('saml_return_to', '/')
-        frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+        frontend_url = get_settings().frontend_url
         code = secrets.token_urlsafe(32)
-        _ONE_TIME_CODES[code] = {
+        _one_time_codes.put(code, {
             'user_data': user_data,
             'expires_at': time.time() + _CODE_TTL_SECONDS,
-        }
+        }, _CODE_TTL_SECONDS)
+        update_code_gauge()
         safe_return = quote(return_to, safe='')
         return redirect(f"{frontend_url}/auth/callback?code={code}&return_to={safe_return}")
         
@@ -171,7 +222,7 @@ def saml_sls():
     """
     try:
         req = prepare_flask_request(request)
-        auth = OneLogin_Saml2_Auth(req, get_saml_settings())
+        auth = OneLogin_Saml2_Auth(req, get_saml_settings_object(req))
         
         # Process the logout request
         url = auth.process_slo(delete_session_cb=lambda: session.clear())
@@ -183,13 +234,13 @@ def saml_sls():
             logger.info("User logged out via SAML SLS")
         
         # Redirect to frontend
-        frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+        frontend_url = get_settings().frontend_url
         return redirect(f"{frontend_url}/login")
         
     except Exception as e:
         logger.error(f"Error processing SAML logout: {str(e)}")
         session.clear()
-        frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
+        frontend_url = get_settings().frontend_url
         return redirect(f"{frontend_url}/login")
 
 
@@ -203,10 +254,14 @@ def exchange_code_for_token():
     code = data.get('code')
     if not code:
         return jsonify({"error": "Missing code"}), 400
-    entry = _ONE_TIME_CODES.pop(code, None)
+    entry = _one_time_codes.pop(code)
+    update_code_gauge()
     if not entry:
+        audit.record('auth.token', outcome='rejected', ip=request.remote_addr, details={'reason': 'invalid code'})
         return jsonify({"error": "Invalid or expired code"}), 401
     if time.time() > entry['expires_at']:
+        audit.record('auth.token', actor=entry['user_data'].get('email'), outcome='rejected',
+                     ip=request.remote_addr, details={'reason': 'expired code'})
         return jsonify({"error": "Code expired"}), 401
     user_data = entry['user_data']
     safe = _safe_user(user_data)
@@ -216,9 +271,10 @@ def exchange_code_for_token():
     payload['iat'] = int(time.time())
     token = jwt.encode(
         payload,
-        os.getenv('SECRET_KEY'),
+        current_app.config['SECRET_KEY'],
         algorithm=_JWT_ALGORITHM,
     )
+    audit.record('auth.token', actor=user_data.get('email'), ip=request.remote_addr)
     return jsonify({
         'access_token': token,
         'user': safe,
@@ -248,12 +304,13 @@ def logout():
     try:
         user_data, _ = _user_from_request()
         email = (user_data or {}).get('email', 'unknown')
+        audit.record('auth.logout', actor=(user_data or {}).get('email'), ip=request.remote_addr)
 
         # If authenticated via session, support SAML SLO
         use_saml_slo = request.json.get('saml_logout', False) if request.is_json else False
         if use_saml_slo and session.get('saml_session_index'):
             req = prepare_flask_request(request)
-            auth = OneLogin_Saml2_Auth(req, get_saml_settings())
+            auth = OneLogin_Saml2_Auth(req, get_saml_settings_object(req))
             name_id = session.get('saml_name_id')
             session_index = session.get('saml_session_index')
             session.clear()
@@ -278,10 +335,7 @@ def metadata():
     """
     try:
         req = prepare_flask_request(request)
-        auth = OneLogin_Saml2_Auth(req, get_saml_settings())
-        settings = auth.get_settings()
-        metadata = settings.get_sp_metadata()
-        errors = settings.validate_metadata(metadata)
+        metadata, errors = get_sp_metadata(req)
         
         if errors:
             logger.error(f"Metadata validation errors: {errors}")
@@ -0,0 +1,108 @@
+"""
+Server-sent events.
+
+GET /api/events streams status changes to the signed-in user so pages do
+not have to re-fetch (services/events.py):
+
+- access-request: a request was created or items changed status
+  ({ action: 'created'|'status', items: [{ requestId, rowId, status, approvedAt }],
+  request (on create) });
+- grant: an approved item's provisioning state changed
+  ({ items: [{ requestId, itemIndex, provisioning: { status, error, adminId, expiresAt } }] });
+- organizations: a cached organization list was loaded or changed on refresh
+  ({ lists, count, refreshedAt }, plus added/removed/renamed/relinked IDs
+  (up to 100 each) and truncated once the list had been loaded before);
+- resync: events were missed (slow client or unknown Last-Event-ID); reload.
+
+Requesters receive events for their own requests; approvers for all.
+Authenticate like any other API call (Bearer token or session), so clients
+read the stream with fetch() rather than EventSource, which cannot send
+headers. A comment line is sent every EVENTS_HEARTBEAT_SECONDS to keep
+proxies from closing idle streams.
+
+Each open stream holds one server thread (a gthread worker thread, or an
+ASGI_WSGI_THREADS thread under uvicorn) for as long as it is open. At most
+EVENTS_MAX_STREAMS streams are open per process, so streams cannot take
+every thread and starve ordinary requests; beyond that /api/events answers
+503 with Retry-After and the client reconnects later. Keep it below the
+threads per process (GUNICORN_THREADS, default 8, or ASGI_WSGI_THREADS);
+total capacity is EVENTS_MAX_STREAMS x workers.
+"""
+
+import json
+import logging
+import os
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from routes.access_requests import _is_approver, _require_user
+from services.events import TooManySubscribers, get_event_bus
+
+events_bp = Blueprint('events', __name__, url_prefix='/api/events')
+logger = logging.getLogger(__name__)
+
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+# Open streams per process; the rest of the threads stay free for API requests
+EVENTS_MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', 4))
+# Reconnect delay suggested to clients (SSE retry field)
+EVENTS_RETRY_MS = 3000
+# Retry-After (seconds) when every stream slot is taken
+EVENTS_FULL_RETRY_SECONDS = 30
+
+
+def _format(event_id, event_type, data) -> str:
+    head = f"id: {event_id}\n" if event_id else ''
+    return f"{head}event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@events_bp.route('', methods=['GET'])
+def stream_events():
+    """Event stream for the current user (text/event-stream)."""
+    user_data, err = _require_user()
+    if err:
+        return err
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        sub, missed = get_event_bus().subscribe(
+            user_data.get('email'), approver=_is_approver(user_data), last_event_id=last_event_id,
+            max_subscribers=EVENTS_MAX_STREAMS,
+        )
+    except TooManySubscribers:
+        logger.warning(f"Refusing event stream for {user_data.get('email')}: {EVENTS_MAX_STREAMS} already open")
+        response = jsonify({"error": "Too many open event streams; retry later"})
+        response.headers['Retry-After'] = str(EVENTS_FULL_RETRY_SECONDS)
+        return response, 503
+
+    def generate():
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n"
+            if missed is None:
+                yield _format(None, 'resync', {})
+            else:
+                for event in missed:
+                    yield _format(*event)
+            while True:
+                event = sub.get(EVENTS_HEARTBEAT_SECONDS)
+                if sub.overflowed:
+                    sub.overflowed = False
+                    yield _format(None, 'resync', {})
+                if event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield _format(*event)
+        finally:
+            sub.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@events_bp.route('/stats', methods=['GET'])
+def event_stats():
+    """Open streams in this process and the per-process limit."""
+    _, err = _require_user()
+    if err:
+        return err
+    return jsonify({"subscribers": get_event_bus().subscriber_count(), "max_subscribers": EVENTS_MAX_STREAMS})
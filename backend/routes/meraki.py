@@ -5,14 +5,95 @@ Uses two API keys when set:
 - MERAKI_USER_API_KEY: used for My Access page (getOrganizations / my-organizations).
 - MERAKI_SERVICE_API_KEY: used for Request Access page (organizations dropdown).
 Falls back to MERAKI_DASHBOARD_API_KEY for either if the specific key is not set.
-Organizations response is cached in-memory per key to avoid slow/repeated Meraki API calls.
+Organizations response is cached per key to avoid slow/repeated Meraki API calls:
+an in-process LRU tier, optionally backed by a Redis tier shared by all workers
+(ORGANIZATIONS_CACHE_BACKEND=redis, reusing SESSION_REDIS). Concurrent misses for
+the same key are coalesced so only one getOrganizations call runs per key (per
+process, and across workers when the Redis tier is enabled). Expired lists are
+served stale while a background scheduler refreshes them, and configured keys are
+refreshed ahead of expiry so requests stay off the slow path in steady state.
+
+Every outbound Meraki call (pooled sync clients and the async engine) is
+metered by a token-bucket RateLimiter per API key and organization, with
+interactive requests queued ahead of background refresh/provisioning; the
+buckets can be shared by all workers through Redis
+(MERAKI_RATE_LIMIT_BACKEND=redis). GET /api/meraki/rate-limit reports queue depth.
+
+Approved access request items are provisioned as Meraki admins through
+per-organization action batches (services/provisioning.py), submitted and
+polled by a background scheduler with MERAKI_PROVISIONING_API_KEY (fallback:
+MERAKI_SERVICE_API_KEY, then MERAKI_DASHBOARD_API_KEY). Grants expire after
+GRANT_DURATION_SECONDS: an in-memory expiry heap (services/grant_expiry.py,
+reloaded from the database at startup) wakes when the next grant is due and
+the same pipeline revokes it.
+
+Both organization endpoints accept optional limit/cursor/q/match/sort query
+parameters, served from a search index built once per cached list; without
+them they return the full list as before, from JSON bytes (with ETag and
+gzip/brotli variants) serialized once per cached list, answering If-None-Match
+with 304.
+
+A refresh does not replace the cached list wholesale: the fetched list is
+diffed against the cached one (services/org_changes.py), unchanged entries are
+reused, and if nothing changed the cached list object is kept, so its search
+index, payload and per-user views are not rebuilt. Each diff is published on
+organization_changes (in-process subscribe()); the 'organizations' event and
+the membership crawl are driven from it.
+
+When Meraki is degraded, getOrganizations goes through a circuit breaker
+per API key (services/circuit_breaker.py): after a failure further misses
+fail fast for ORGANIZATIONS_ERROR_CACHE_SECONDS, repeated failures open the
+circuit, and a single half-open probe decides when to close it again.
+Meanwhile both endpoints serve the last good list for the key, flagged with
+X-Organizations-Stale: unavailable (an expired list served while it is
+refreshed is flagged 'expired'), and only answer 502 if there never was one.
+
+/my-organizations answers per user: a background crawl of
+getOrganizationAdmins over the service key's organizations
+(services/memberships.py) maintains admin email -> organizations and
+privileges, and the view looks up the caller's email (the JWT sub) there,
+with no Meraki call per request. Until the first full crawl has finished
+(or with MEMBERSHIP_INDEX_ENABLED=false) it returns the MERAKI_USER_API_KEY
+list as before.
+
+Under the ASGI serving mode (asgi.py) a cache miss does not block a thread:
+with defer_organization_misses set, the views answer an internal "pending"
+response instead, the ASGI layer awaits load_organizations_async() (the
+upstream call runs on the async engine, inside the same single-flight as
+synchronous fetches) and replays the request, which is then a cache hit.
+The pending response is not measured or profiled, and the replay is not
+counted as a second cache lookup.
 """
 
 import os
 import logging
-import time
+import contextvars
 import hashlib
-from flask import Blueprint, jsonify
+import threading
+import time
+from flask import Blueprint, jsonify, make_response, request
+
+from config.settings import get_settings
+from services.cache import LRUCache, RedisCache, TieredCache
+from services.circuit_breaker import CircuitBreaker, CircuitOpen
+from services.access_requests import format_request_id, utc_now_iso
+from services.audit import record as record_audit
+from services.database import get_database
+from services.events import publish as publish_event
+from services.grant_expiry import GrantExpiry
+from services.meraki_async import AsyncMerakiEngine
+from services.meraki_clients import DashboardClientPool
+from services.memberships import MembershipCrawler, MembershipIndex
+from services.metrics import ORGANIZATIONS_CACHE_REQUESTS
+from services.org_changes import ChangeFeed, merge_organizations
+from services.org_index import (
+    MATCH_MODES, SORT_KEYS, OrganizationIndex, decode_cursor, encode_cursor,
+)
+from services.payloads import PreparedPayload
+from services.provisioning import GrantStore, ProvisioningPipeline
+from services.rate_limit import PRIORITY_BACKGROUND, RateLimiter, RedisBuckets, request_priority
+from services.scheduler import Scheduler
+from services.singleflight import SingleFlight, RedisSingleFlight
 
 logger = logging.getLogger(__name__)
 meraki_bp = Blueprint('meraki', __name__, url_prefix='/api/meraki')
@@ -20,21 +101,149 @@ meraki_bp = Blueprint('meraki', __name__, url_prefix='/api/meraki')
 # Base URL for organization dashboard links
 MERAKI_DASHBOARD_ORG_BASE = 'https://dashboard.meraki.com/o'
 
-# In-memory cache for getOrganizations: { cache_key: (result_list, expiry_timestamp) }
-_organizations_cache = {}
-ORGANIZATIONS_CACHE_TTL_SECONDS = 3600  # 1 hour
+# Cache for getOrganizations: cache_key -> CacheEntry(result_list, expires_at)
+ORGANIZATIONS_CACHE_TTL_SECONDS = int(os.getenv('ORGANIZATIONS_CACHE_TTL_SECONDS', 3600))  # 1 hour
+ORGANIZATIONS_CACHE_MAX_ENTRIES = int(os.getenv('ORGANIZATIONS_CACHE_MAX_ENTRIES', 32))
+# How long an expired list may still be served while it is refreshed in the background
+ORGANIZATIONS_CACHE_STALE_SECONDS = int(os.getenv('ORGANIZATIONS_CACHE_STALE_SECONDS', 86400))
+# Background refresh starts this long before expiry (capped at half the TTL)
+ORGANIZATIONS_REFRESH_AHEAD_SECONDS = min(
+    int(os.getenv('ORGANIZATIONS_REFRESH_AHEAD_SECONDS', 300)),
+    ORGANIZATIONS_CACHE_TTL_SECONDS // 2,
+)
+ORGANIZATIONS_REFRESH_MIN_INTERVAL_SECONDS = 30
+ORGANIZATIONS_CACHE_REDIS_PREFIX = 'meraki-admin-jit:organizations:'
+ORGANIZATIONS_FETCH_LOCK_PREFIX = 'meraki-admin-jit:organizations-lock:'
+_organizations_cache = TieredCache(
+    LRUCache(max_entries=ORGANIZATIONS_CACHE_MAX_ENTRIES, stale_ttl=ORGANIZATIONS_CACHE_STALE_SECONDS)
+)
+# Diff of every refresh that changed a list (subscribe with organization_changes.subscribe(fn))
+organization_changes = ChangeFeed()
+# Derived views per cache key, rebuilt whenever the cached list object changes:
+# cache_key -> (orgs_list, OrganizationIndex, PreparedPayload)
+_organization_views = {}
+_organization_views_lock = threading.Lock()
+ORGANIZATIONS_PAGE_DEFAULT_LIMIT = 100
+ORGANIZATIONS_PAGE_MAX_LIMIT = 1000
+_PAGING_PARAMS = ('limit', 'cursor', 'q', 'match', 'sort')
+# Background refresh of expiring/stale lists (one thread per process)
+_refresh_scheduler = Scheduler('organizations-refresh')
+# In-flight fetch deduplication: per process, plus across workers when Redis is configured
+_organizations_flight = SingleFlight()
+_organizations_shared_flight = None
+# ASGI mode: misses answer PENDING_HEADER and are loaded by load_organizations_async();
+# the replay after the load is not counted as a second cache lookup
+defer_organization_misses = contextvars.ContextVar('defer_organization_misses', default=False)
+replaying_organization_miss = contextvars.ContextVar('replaying_organization_miss', default=False)
+ORGANIZATIONS_PENDING_HEADER = 'X-Organizations-Pending'
+# Per-user My Access lists from a background getOrganizationAdmins crawl
+MEMBERSHIP_INDEX_ENABLED = os.getenv('MEMBERSHIP_INDEX_ENABLED', 'true').lower() == 'true'
+# Re-crawl each organization's admins after this long
+MEMBERSHIP_REFRESH_SECONDS = float(os.getenv('MEMBERSHIP_REFRESH_SECONDS', 3600))
+# Organizations crawled per run, and concurrent getOrganizationAdmins calls within a run
+MEMBERSHIP_CRAWL_BATCH = int(os.getenv('MEMBERSHIP_CRAWL_BATCH', 200))
+MEMBERSHIP_CRAWL_CONCURRENCY = int(os.getenv('MEMBERSHIP_CRAWL_CONCURRENCY', 5))
+MEMBERSHIP_JOB = 'memberships'
+MEMBERSHIP_VIEWS_MAX_ENTRIES = 1024
+_memberships = MembershipIndex()
+# email -> (memberships, all-organizations index, OrganizationIndex, PreparedPayload) for that user's list
+_membership_views = LRUCache(max_entries=MEMBERSHIP_VIEWS_MAX_ENTRIES)
+# getOrganizations circuit breaker per API key; the last good list is served while it is open
+ORGANIZATIONS_BREAKER_FAILURES = int(os.getenv('ORGANIZATIONS_BREAKER_FAILURES', 3))
+ORGANIZATIONS_BREAKER_RESET_SECONDS = float(os.getenv('ORGANIZATIONS_BREAKER_RESET_SECONDS', 30))
+ORGANIZATIONS_BREAKER_MAX_RESET_SECONDS = float(os.getenv('ORGANIZATIONS_BREAKER_MAX_RESET_SECONDS', 300))
+# After a failed fetch, misses fail fast (served the last good list) for this long
+ORGANIZATIONS_ERROR_CACHE_SECONDS = float(os.getenv('ORGANIZATIONS_ERROR_CACHE_SECONDS', 10))
+ORGANIZATIONS_STALE_HEADER = 'X-Organizations-Stale'
+_organizations_breaker = CircuitBreaker(
+    'organizations',
+    failure_threshold=ORGANIZATIONS_BREAKER_FAILURES,
+    reset_timeout=ORGANIZATIONS_BREAKER_RESET_SECONDS,
+    max_reset_timeout=ORGANIZATIONS_BREAKER_MAX_RESET_SECONDS,
+    failure_ttl=ORGANIZATIONS_ERROR_CACHE_SECONDS,
+)
+# Meraki Dashboard API base URL (override to point at a local fake server)
+MERAKI_BASE_URL = os.getenv('MERAKI_BASE_URL', 'https://api.meraki.com/api/v1')
 # Request timeout for Meraki SDK (seconds)
 MERAKI_REQUEST_TIMEOUT = 30
+# Max concurrent requests per fan-out over many organizations (async engine)
+MERAKI_FAN_OUT_CONCURRENCY = int(os.getenv('MERAKI_FAN_OUT_CONCURRENCY', 10))
+# Token buckets metering all outbound Meraki calls (per API key and per organization)
+MERAKI_RATE_LIMIT_ENABLED = os.getenv('MERAKI_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+MERAKI_RATE_LIMIT_KEY_RPS = float(os.getenv('MERAKI_RATE_LIMIT_KEY_RPS', 100))
+MERAKI_RATE_LIMIT_ORG_RPS = float(os.getenv('MERAKI_RATE_LIMIT_ORG_RPS', 10))
+MERAKI_RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv('MERAKI_RATE_LIMIT_MAX_WAIT_SECONDS', 60))
+MERAKI_RATE_LIMIT_REDIS_PREFIX = 'meraki-admin-jit:ratelimit:'
+_rate_limiter = RateLimiter(
+    key_rate=MERAKI_RATE_LIMIT_KEY_RPS,
+    org_rate=MERAKI_RATE_LIMIT_ORG_RPS,
+    max_wait=MERAKI_RATE_LIMIT_MAX_WAIT_SECONDS,
+) if MERAKI_RATE_LIMIT_ENABLED else None
+# Pooled DashboardAPI clients (one per API key, reused across requests)
+MERAKI_CLIENT_POOL_SIZE = int(os.getenv('MERAKI_CLIENT_POOL_SIZE', 16))
+MERAKI_CLIENT_IDLE_SECONDS = int(os.getenv('MERAKI_CLIENT_IDLE_SECONDS', 600))
+# JIT grant provisioning via action batches (own scheduler thread, state in the database)
+PROVISIONING_ENABLED = os.getenv('PROVISIONING_ENABLED', 'true').lower() == 'true'
+PROVISIONING_POLL_SECONDS = float(os.getenv('PROVISIONING_POLL_SECONDS', 5))
+PROVISIONING_BATCH_TIMEOUT_SECONDS = int(os.getenv('PROVISIONING_BATCH_TIMEOUT_SECONDS', 900))
+PROVISIONING_NO_KEY_RETRY_SECONDS = 60
+PROVISIONING_JOB = 'provisioning'
+# How long a provisioned grant stays active before it is revoked
+GRANT_DURATION_SECONDS = int(os.getenv('GRANT_DURATION_SECONDS', 4 * 3600))
+GRANT_EXPIRY_JOB = 'grant-expiry'
+_provisioning_scheduler = Scheduler('provisioning')
+_provisioning = None
+_grant_expiry = None
 
 
 def _get_user_api_key():
     """API key for My Access page (user view). Prefer MERAKI_USER_API_KEY, else MERAKI_DASHBOARD_API_KEY."""
-    return os.getenv('MERAKI_USER_API_KEY') or os.getenv('MERAKI_DASHBOARD_API_KEY')
+    return get_settings().user_api_key
 
 
 def _get_service_api_key():
     """API key for Request Access page (organizations dropdown). Prefer MERAKI_SERVICE_API_KEY, else MERAKI_DASHBOARD_API_KEY."""
-    return os.getenv('MERAKI_SERVICE_API_KEY') or os.getenv('MERAKI_DASHBOARD_API_KEY')
+    return get_settings().service_api_key
+
+
+def _get_provisioning_api_key():
+    """API key that creates/updates admins. Prefer MERAKI_PROVISIONING_API_KEY, else the service key."""
+    return get_settings().provisioning_api_key
+
+
+class OrganizationsPending(Exception):
+    """Cache miss while defer_organization_misses is set; the ASGI layer loads the list."""
+
+
+def configure_organizations_cache(redis_url: str = None):
+    """
+    (Re)build the organizations cache. With redis_url, add a shared Redis tier behind
+    the in-process LRU so N workers cost one upstream call per TTL instead of N.
+    """
+    global _organizations_cache, _organizations_shared_flight
+    shared = RedisCache(
+        redis_url, ORGANIZATIONS_CACHE_REDIS_PREFIX, stale_ttl=ORGANIZATIONS_CACHE_STALE_SECONDS
+    ) if redis_url else None
+    _organizations_cache = TieredCache(
+        LRUCache(max_entries=ORGANIZATIONS_CACHE_MAX_ENTRIES, stale_ttl=ORGANIZATIONS_CACHE_STALE_SECONDS),
+        shared,
+    )
+    # A leader may spend up to (retries + 1) request timeouts upstream before it gives up
+    _organizations_shared_flight = RedisSingleFlight(
+        redis_url,
+        ORGANIZATIONS_FETCH_LOCK_PREFIX,
+        lock_ttl=MERAKI_REQUEST_TIMEOUT * 3 + 10,
+        wait_timeout=MERAKI_REQUEST_TIMEOUT * 3,
+    ) if redis_url else None
+    logger.info(f"Organizations cache: in-process LRU{' + Redis' if shared else ''}")
+
+
+def configure_rate_limiter(redis_url: str):
+    """Share the Meraki rate-limit buckets between workers through Redis."""
+    if _rate_limiter is None:
+        return
+    _rate_limiter.use_buckets(RedisBuckets(redis_url, MERAKI_RATE_LIMIT_REDIS_PREFIX))
+    logger.info("Meraki rate limiter: Redis buckets")
 
 
 def _user_from_request():
@@ -48,55 +257,574 @@ def _cache_key(api_key: str) -> str:
     return hashlib.sha256(api_key.encode()).hexdigest()[:32]
 
 
-def _fetch_organizations_from_meraki(api_key: str):
-    """Call Meraki API and return list of org dicts. No caching."""
+def _new_dashboard_client(api_key: str):
+    """Build a DashboardAPI client; use _dashboard_client() to get a pooled one."""
     from meraki import DashboardAPI
-    dashboard = DashboardAPI(
+    return DashboardAPI(
         api_key=api_key,
+        base_url=MERAKI_BASE_URL,
         suppress_logging=True,
         single_request_timeout=MERAKI_REQUEST_TIMEOUT,
         maximum_retries=2,
     )
-    raw = dashboard.organizations.getOrganizations()
-    return list(raw) if raw is not None else []
-
-
-def _build_organizations_response(orgs: list) -> list:
-    """Map raw Meraki org list to { id, name, link }."""
-    result = []
-    for org in orgs:
-        org_id = org.get('id') or ''
-        name = org.get('name') or ''
-        link = (org.get('url') or '').strip() or (
-            f"{MERAKI_DASHBOARD_ORG_BASE}/{org_id}/overview" if org_id else ''
+
+
+_dashboard_clients = DashboardClientPool(
+    _new_dashboard_client,
+    max_clients=MERAKI_CLIENT_POOL_SIZE,
+    idle_timeout=MERAKI_CLIENT_IDLE_SECONDS,
+    limiter=_rate_limiter,
+)
+
+
+def _dashboard_client(api_key: str):
+    """Long-lived DashboardAPI client for api_key (reuses keep-alive connections)."""
+    return _dashboard_clients.get(_cache_key(api_key), api_key)
+
+
+_async_engine = AsyncMerakiEngine(
+    base_url=MERAKI_BASE_URL,
+    max_concurrency=MERAKI_FAN_OUT_CONCURRENCY,
+    request_timeout=MERAKI_REQUEST_TIMEOUT,
+    limiter=_rate_limiter,
+)
+
+
+def meraki_fan_out(api_key: str, operation: str, org_ids, timeout: float = None, **kwargs):
+    """
+    Call an SDK operation (e.g. 'organizations.getOrganizationAdmins') for every
+    org ID concurrently via the async engine; blocks until all finish.
+    Returns (results, errors), both keyed by org ID.
+    """
+    return _async_engine.map_organizations(api_key, operation, list(org_ids), timeout=timeout, **kwargs)
+
+
+def _provisioning_pipeline() -> ProvisioningPipeline:
+    """Process-wide provisioning pipeline on the configured database (created on first use)."""
+    global _provisioning, _grant_expiry
+    if _provisioning is None:
+        store = GrantStore(get_database())
+        _grant_expiry = GrantExpiry(
+            store, _provisioning_scheduler,
+            on_expiring=lambda: _provisioning_scheduler.run_soon(PROVISIONING_JOB, _provisioning_job),
+            job_name=GRANT_EXPIRY_JOB,
         )
-        result.append({'id': org_id, 'name': name, 'link': link})
-    return result
+        _provisioning = ProvisioningPipeline(
+            store,
+            poll_interval=PROVISIONING_POLL_SECONDS,
+            batch_timeout=PROVISIONING_BATCH_TIMEOUT_SECONDS,
+            grant_duration=GRANT_DURATION_SECONDS,
+            on_activated=_grant_expiry.track,
+            on_revoke_failed=_grant_expiry.retry,
+            on_changed=_grant_changed,
+        )
+    return _provisioning
+
+
+def _grant_changed(changes: list):
+    _publish_grant_changes(changes)
+    _audit_grant_changes(changes)
+    _recrawl_granted_orgs(changes)
+
+
+def _recrawl_granted_orgs(changes: list):
+    """Admins changed where grants became active or expired: crawl those organizations next."""
+    org_ids = {grant['org_id'] for grant, status, _ in changes if status in ('active', 'expired')}
+    if not org_ids or not _refresh_scheduler.has_job(MEMBERSHIP_JOB):
+        return
+    for org_id in org_ids:
+        _memberships.invalidate(org_id)
+    _refresh_scheduler.run_soon(MEMBERSHIP_JOB, _membership_job)
+
+
+def _audit_grant_changes(changes: list):
+    """One audit event per provisioning transition (grant.active, grant.failed, grant.expired, ...)."""
+    for grant, status, fields in changes:
+        merged = {**grant, **fields}
+        record_audit(
+            f"grant.{status}", actor='system', target=format_request_id(grant['request_num']),
+            outcome='failure' if status == 'failed' else 'success',
+            details={
+                'itemIndex': grant['position'],
+                'orgId': grant['org_id'],
+                'email': grant['email'],
+                'orgAccess': grant.get('org_access'),
+                'adminId': merged.get('admin_id'),
+                'error': merged.get('error'),
+            },
+        )
+
+
+def _publish_grant_changes(changes: list):
+    """Push provisioning transitions to the requester's (and approvers') event streams."""
+    by_email = {}
+    for grant, status, fields in changes:
+        merged = {**grant, **fields}
+        by_email.setdefault(grant['email'].lower(), []).append({
+            'requestId': format_request_id(grant['request_num']),
+            'itemIndex': grant['position'],
+            'provisioning': {
+                'status': status,
+                'error': merged.get('error'),
+                'adminId': merged.get('admin_id'),
+                'expiresAt': merged.get('expires_at'),
+            },
+        })
+    for email, items in by_email.items():
+        publish_event('grant', {'items': items}, {'emails': [email], 'approvers': True})
+
+
+def _provisioning_job():
+    """Scheduler job: one provisioning pass; re-arms itself while grants are in progress."""
+    api_key = _get_provisioning_api_key()
+    if not api_key:
+        logger.warning("Grants waiting for provisioning but no Meraki API key is configured")
+        return PROVISIONING_NO_KEY_RETRY_SECONDS
+
+    def fan_out(call, items):
+        return _async_engine.fan_out(api_key, call, items)
+
+    with request_priority(PRIORITY_BACKGROUND):
+        return _provisioning_pipeline().run_once(fan_out)
+
+
+def provision_grants(grants: list):
+    """
+    Queue approved items for provisioning (dicts with request_num, position,
+    org_id, email, name, permission) and wake the provisioning scheduler.
+    """
+    if not PROVISIONING_ENABLED or not grants:
+        return
+    if _provisioning_pipeline().store.enqueue(grants):
+        _provisioning_scheduler.run_soon(PROVISIONING_JOB, _provisioning_job)
+
+
+def provisioning_statuses(request_nums: list) -> dict:
+    """(request_num, position) -> { status, error, adminId, expiresAt } for provisioned items."""
+    return _provisioning_pipeline().store.statuses(request_nums)
+
+
+def start_provisioning():
+    """Resume grants left queued or in flight by a previous run and track active grants' expiry."""
+    if not PROVISIONING_ENABLED:
+        return
+    pipeline = _provisioning_pipeline()
+    _grant_expiry.load()
+    if pipeline.store.has_work():
+        _provisioning_scheduler.run_soon(PROVISIONING_JOB, _provisioning_job)
+
+
+def _fetch_organizations_from_meraki(api_key: str):
+    """
+    Call Meraki API and return list of org dicts (all pages). No caching.
+    Goes through the key's circuit breaker: raises CircuitOpen without calling Meraki while it is open.
+    """
+    def fetch():
+        raw = _dashboard_client(api_key).organizations.getOrganizations(total_pages='all')
+        return list(raw) if raw is not None else []
+
+    return _organizations_breaker.call(_cache_key(api_key), fetch)
+
+
+def _organization_entry(org: dict) -> tuple:
+    """(id, name, link) for one raw Meraki organization."""
+    org_id = org.get('id') or ''
+    name = org.get('name') or ''
+    link = (org.get('url') or '').strip() or (
+        f"{MERAKI_DASHBOARD_ORG_BASE}/{org_id}/overview" if org_id else ''
+    )
+    return org_id, name, link
 
 
 def _get_organizations_impl(api_key: str):
     """
     Shared implementation: resolve cache or fetch from Meraki, return list of { id, name, link }.
+    A stale entry is returned immediately and refreshed in the background.
     Caller must ensure api_key is non-empty.
     """
+    return _lookup_organizations(api_key)[0]
+
+
+def _lookup_organizations(api_key: str):
+    """
+    (orgs, stale) for api_key. stale is None for a fresh list, 'expired' for an
+    expired list served while it is refreshed, or 'unavailable' for the last good
+    list served because the fetch failed or the key's circuit is open.
+    """
     cache_key = _cache_key(api_key)
-    now = time.monotonic()
-    if cache_key in _organizations_cache:
-        cached_result, expiry = _organizations_cache[cache_key]
-        if now < expiry:
-            return cached_result
-    orgs = _fetch_organizations_from_meraki(api_key)
-    result = _build_organizations_response(orgs)
-    _organizations_cache[cache_key] = (result, now + ORGANIZATIONS_CACHE_TTL_SECONDS)
+    entry = _organizations_cache.get(cache_key, allow_stale=True)
+    if entry is not None:
+        _count_lookup('hit' if entry.fresh else 'stale')
+        if not entry.fresh:
+            _refresh_scheduler.run_soon(_refresh_job_name(cache_key), lambda: _refresh_organizations_once(api_key))
+        if entry.fresh:
+            return entry.value, None
+        return entry.value, 'unavailable' if _organizations_breaker.failing(cache_key) else 'expired'
+    _count_lookup('miss')
+    if defer_organization_misses.get():
+        raise OrganizationsPending()
+    try:
+        # Every concurrent miss for this key waits on a single upstream fetch
+        return _organizations_flight.do(cache_key, lambda: _load_organizations(api_key, cache_key)), None
+    except Exception as e:
+        last_good = _last_good_organizations(cache_key)
+        if last_good is None:
+            raise
+        ORGANIZATIONS_CACHE_REQUESTS.labels('fallback').inc()
+        if not isinstance(e, CircuitOpen):
+            logger.warning(f"getOrganizations failed, serving the last good list ({len(last_good)}): {e}")
+        return last_good, 'unavailable'
+
+
+def _count_lookup(result: str):
+    """Count one cache lookup, unless it is the ASGI replay of a miss counted already."""
+    if not replaying_organization_miss.get():
+        ORGANIZATIONS_CACHE_REQUESTS.labels(result).inc()
+
+
+def _last_good_organizations(cache_key: str):
+    """The last list built for cache_key in this process (kept past the cache's stale window), or None."""
+    with _organization_views_lock:
+        cached = _organization_views.get(cache_key)
+    return cached[0] if cached is not None else None
+
+
+def _fresh_organizations(cache_key: str, min_remaining: float = 0):
+    """Cached list for cache_key if it stays fresh for more than min_remaining seconds, else None."""
+    entry = _organizations_cache.get(cache_key)
+    if entry is not None and entry.expires_at - time.time() > min_remaining:
+        return entry.value
+    return None
+
+
+def _store_organizations(api_key: str, cache_key: str, orgs: list) -> list:
+    """
+    Merge a freshly fetched raw list into the cache (reusing unchanged entries, or
+    the whole cached list if nothing changed), publish the diff, return the list.
+    """
+    cached = _organizations_cache.get(cache_key, allow_stale=True)
+    result, diff = merge_organizations(
+        cache_key, cached.value if cached is not None else None, orgs, _organization_entry,
+    )
+    _organizations_cache.set(cache_key, result, ORGANIZATIONS_CACHE_TTL_SECONDS)
+    _organizations_views(cache_key, result)
+    if diff.changed or diff.initial:
+        organization_changes.publish(diff)
     return result
 
 
+@organization_changes.subscribe
+def _announce_organization_changes(diff):
+    """'organizations' event for lists that changed (with the changed IDs unless first loaded)."""
+    data = {
+        'lists': [name for name, key in _organization_lists() if key and _cache_key(key) == diff.cache_key],
+        'count': diff.count,
+        'refreshedAt': utc_now_iso(),
+    }
+    if not diff.initial:
+        data.update(diff.summary())
+        logger.info(f"Organizations changed: {len(diff.added)} added, {len(diff.removed)} removed, "
+                    f"{len(diff.renamed)} renamed, {len(diff.relinked)} relinked")
+    publish_event('organizations', data)
+
+
+def _organization_lists() -> list:
+    """(list name, API key) for each organizations endpoint."""
+    return [('service', _get_service_api_key()), ('user', _get_user_api_key())]
+
+
+async def load_organizations_async(list_name: str) -> list:
+    """
+    Fill the cache for the 'service' or 'user' list without blocking a thread:
+    getOrganizations is awaited on the async engine. The load joins the same
+    single-flight as synchronous fetches (per process, and across workers with
+    Redis), so it never duplicates an upstream call already in flight.
+    """
+    api_key = dict(_organization_lists()).get(list_name)
+    if not api_key:
+        raise ValueError(f"Unknown organizations list '{list_name}'")
+    cache_key = _cache_key(api_key)
+
+    async def fetch():
+        _organizations_breaker.before(cache_key)
+        try:
+            orgs = await _async_engine.call_async(api_key, 'organizations.getOrganizations', total_pages='all')
+        except Exception as e:
+            _organizations_breaker.failure(cache_key, e)
+            raise
+        _organizations_breaker.success(cache_key)
+        return _store_organizations(api_key, cache_key, list(orgs) if orgs is not None else [])
+
+    async def load():
+        if _organizations_shared_flight is None:
+            return await fetch()
+        return await _organizations_shared_flight.do_async(cache_key, fetch, lambda: _fresh_organizations(cache_key))
+
+    return await _organizations_flight.do_async(cache_key, load)
+
+
+def _flag_stale(rv, stale: str):
+    """Mark a response built from an expired or last-good list with X-Organizations-Stale."""
+    if not stale:
+        return rv
+    response = make_response(rv)
+    response.headers[ORGANIZATIONS_STALE_HEADER] = stale
+    return response
+
+
+def _organizations_failed(e: Exception):
+    """502 for a failed fetch with no list to fall back on (Retry-After when the circuit is open)."""
+    headers = {'Retry-After': str(max(1, round(e.retry_after)))} if isinstance(e, CircuitOpen) else {}
+    return jsonify({"error": "Failed to fetch organizations", "detail": str(e)}), 502, headers
+
+
+def _organizations_pending(list_name: str):
+    """Internal response for the ASGI layer (asgi.py); never reaches clients."""
+    return jsonify({"error": "Organizations are loading"}), 503, {ORGANIZATIONS_PENDING_HEADER: list_name}
+
+
+def _load_organizations(api_key: str, cache_key: str, min_remaining: float = 0):
+    """Fetch from Meraki and fill the cache; with Redis, only one worker fetches per key."""
+    def fetch():
+        return _store_organizations(api_key, cache_key, _fetch_organizations_from_meraki(api_key))
+
+    if _organizations_shared_flight is None:
+        return fetch()
+    return _organizations_shared_flight.do(
+        cache_key, fetch, lambda: _fresh_organizations(cache_key, min_remaining)
+    )
+
+
+def _refresh_job_name(cache_key: str) -> str:
+    return f"organizations:{cache_key}"
+
+
+def _refresh_organizations(api_key: str) -> float:
+    """
+    Refresh the cached list for api_key if it is missing, stale or inside the
+    refresh-ahead window. Returns seconds until the next refresh is due.
+    """
+    cache_key = _cache_key(api_key)
+    ahead = ORGANIZATIONS_REFRESH_AHEAD_SECONDS
+    if _fresh_organizations(cache_key, ahead) is None:
+        try:
+            with request_priority(PRIORITY_BACKGROUND):
+                _organizations_flight.do(cache_key, lambda: _load_organizations(api_key, cache_key, ahead))
+        except CircuitOpen as e:
+            # Try again when the circuit lets a probe through
+            return max(e.retry_after, ORGANIZATIONS_REFRESH_MIN_INTERVAL_SECONDS)
+    entry = _organizations_cache.get(cache_key)
+    if entry is None:
+        return ORGANIZATIONS_REFRESH_MIN_INTERVAL_SECONDS
+    return max(entry.expires_at - ahead - time.time(), ORGANIZATIONS_REFRESH_MIN_INTERVAL_SECONDS)
+
+
+def _refresh_organizations_once(api_key: str):
+    """One-off refresh for a stale hit (no periodic job registered for the key)."""
+    _refresh_organizations(api_key)
+    return None
+
+
+def _known_api_keys() -> list:
+    """Distinct configured API keys (service key first: it backs the busier page)."""
+    keys = []
+    for api_key in (_get_service_api_key(), _get_user_api_key()):
+        if api_key and api_key not in keys:
+            keys.append(api_key)
+    return keys
+
+
+def warm_organizations_cache():
+    """Synchronously fill the cache for every configured key; failures are logged, not raised."""
+    for api_key in _known_api_keys():
+        try:
+            _refresh_organizations(api_key)
+        except Exception:
+            logger.exception("Warming organizations cache failed")
+
+
+def start_organizations_refresh():
+    """
+    Schedule a background refresh for each configured key (user and service).
+    The first run happens immediately, which warms the cache at startup; each
+    run re-arms itself shortly before the cached list expires.
+    """
+    for api_key in _known_api_keys():
+        _refresh_scheduler.schedule(
+            _refresh_job_name(_cache_key(api_key)),
+            lambda api_key=api_key: _refresh_organizations(api_key),
+        )
+
+
+def _membership_org_ids() -> list:
+    """Organizations to crawl: the service key's (cached) list."""
+    api_key = _get_service_api_key()
+    return [org['id'] for org in _get_organizations_impl(api_key)] if api_key else []
+
+
+def _fetch_organization_admins(org_ids: list):
+    return _async_engine.map_organizations(
+        _get_service_api_key(), 'organizations.getOrganizationAdmins', org_ids,
+        concurrency=MEMBERSHIP_CRAWL_CONCURRENCY,
+    )
+
+
+_membership_crawler = MembershipCrawler(
+    _memberships, _membership_org_ids, _fetch_organization_admins,
+    max_age=MEMBERSHIP_REFRESH_SECONDS,
+    batch_size=MEMBERSHIP_CRAWL_BATCH,
+    min_interval=ORGANIZATIONS_REFRESH_MIN_INTERVAL_SECONDS,
+)
+
+
+def _membership_job():
+    """Scheduler job: crawl the next batch of organizations' admins."""
+    with request_priority(PRIORITY_BACKGROUND):
+        return _membership_crawler.run_once()
+
+
+@organization_changes.subscribe
+def _crawl_changed_organizations(diff):
+    """Organizations added to (or removed from) the crawled list: update the index now."""
+    if not (diff.added or diff.removed) or not _refresh_scheduler.has_job(MEMBERSHIP_JOB):
+        return
+    api_key = _get_service_api_key()
+    if api_key and _cache_key(api_key) == diff.cache_key:
+        _refresh_scheduler.run_soon(MEMBERSHIP_JOB, _membership_job)
+
+
+def start_membership_index():
+    """Start crawling getOrganizationAdmins in the background (first batch immediately)."""
+    if not MEMBERSHIP_INDEX_ENABLED:
+        return
+    if not _get_service_api_key():
+        logger.warning("Membership index disabled: MERAKI_SERVICE_API_KEY / MERAKI_DASHBOARD_API_KEY not set")
+        return
+    _refresh_scheduler.schedule(MEMBERSHIP_JOB, _membership_job)
+
+
+def hold_background_jobs():
+    """
+    Queue refresh, membership-crawl and provisioning jobs without starting their
+    threads in this process (pre-fork master, before create_app schedules them);
+    resume_background_jobs() starts them in each worker.
+    """
+    _refresh_scheduler.hold()
+    _provisioning_scheduler.hold()
+
+
+def stop_background_jobs(timeout: float = 10):
+    """
+    Stop this process's refresh and provisioning threads, keeping their jobs
+    queued, and close the async engine's loop thread and clients (pre-fork
+    master: no thread may hold a lock when workers fork). The engine starts
+    again lazily on first use.
+    """
+    _refresh_scheduler.stop(timeout)
+    _provisioning_scheduler.stop(timeout)
+    _async_engine.close()
+
+
+def resume_background_jobs():
+    """
+    Run the queued refresh and provisioning jobs in this process (each forked worker),
+    with the grant expiry heap reloaded from the database rather than the master's copy.
+    """
+    if _grant_expiry is not None:
+        _grant_expiry.load()
+    _refresh_scheduler.ensure_started()
+    _provisioning_scheduler.ensure_started()
+
+
+def _organizations_views(cache_key: str, orgs: list):
+    """
+    (index, payload) for this cached list: search index, serialized body, ETag
+    and compressed variants. Built only when the list's contents change.
+    """
+    with _organization_views_lock:
+        cached = _organization_views.get(cache_key)
+        if cached is not None and cached[0] is orgs:
+            return cached[1], cached[2]
+    if cached is not None and cached[0] == orgs:
+        # Same list under a new object (e.g. pulled from the Redis tier): keep the built views
+        with _organization_views_lock:
+            _organization_views[cache_key] = (orgs, cached[1], cached[2])
+        return cached[1], cached[2]
+    index = OrganizationIndex(orgs)
+    payload = PreparedPayload(orgs)
+    with _organization_views_lock:
+        _organization_views[cache_key] = (orgs, index, payload)
+    return index, payload
+
+
+def _my_organizations_views(email: str, api_key: str, orgs: list):
+    """
+    (index, payload) for the organizations in orgs that email administers, each
+    with its access, networks and tags. Rebuilt only when that user's memberships
+    or the cached list change.
+    """
+    memberships = _memberships.for_email(email)
+    all_orgs, _ = _organizations_views(_cache_key(api_key), orgs)
+    cached = _membership_views.get(email)
+    if cached is not None and cached.value[0] is memberships and cached.value[1] is all_orgs:
+        return cached.value[2], cached.value[3]
+    mine = []
+    for org_id, membership in memberships.items():
+        org = all_orgs.get(org_id)
+        if org is not None:
+            mine.append({**org, **membership.to_dict()})
+    mine.sort(key=lambda org: (org['name'].lower(), org['id']))
+    index, payload = OrganizationIndex(mine), PreparedPayload(mine)
+    _membership_views.set(email, (memberships, all_orgs, index, payload), ORGANIZATIONS_CACHE_TTL_SECONDS)
+    return index, payload
+
+
+def _organizations_response(api_key: str, orgs: list):
+    """
+    Full list when no paging/search parameters are given (original response shape,
+    conditional GET + pre-compressed); otherwise one page: { items, total, next_cursor }.
+    """
+    return _views_response(*_organizations_views(_cache_key(api_key), orgs))
+
+
+def _views_response(index: OrganizationIndex, payload: PreparedPayload):
+    if not any(param in request.args for param in _PAGING_PARAMS):
+        return payload.response(request)
+
+    sort = request.args.get('sort', 'name')
+    if sort not in SORT_KEYS:
+        return jsonify({"error": f"Invalid sort; use one of {', '.join(SORT_KEYS)}"}), 400
+    match = request.args.get('match', 'contains')
+    if match not in MATCH_MODES:
+        return jsonify({"error": f"Invalid match; use one of {', '.join(MATCH_MODES)}"}), 400
+    try:
+        limit = int(request.args.get('limit', ORGANIZATIONS_PAGE_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+    if not 1 <= limit <= ORGANIZATIONS_PAGE_MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {ORGANIZATIONS_PAGE_MAX_LIMIT}"}), 400
+    try:
+        offset = decode_cursor(request.args['cursor']) if request.args.get('cursor') else 0
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    items, total, next_offset = index.search(
+        q=request.args.get('q', ''), match=match, sort=sort, offset=offset, limit=limit,
+    )
+    return jsonify({
+        'items': items,
+        'total': total,
+        'next_cursor': encode_cursor(next_offset) if next_offset is not None else None,
+    })
+
+
 @meraki_bp.route('/organizations')
 def get_organizations():
     """
     List organizations for the Request Access page (organizations dropdown).
     Uses MERAKI_SERVICE_API_KEY (fallback: MERAKI_DASHBOARD_API_KEY).
     Returns list of { id, name, link }. Cached per key for 1 hour.
+    With limit/cursor/q/match/sort returns { items, total, next_cursor }.
     """
     user_data, err = _user_from_request()
     if err:
@@ -110,19 +838,26 @@ def get_organizations():
         return jsonify({"error": "Meraki API not configured"}), 503
 
     try:
-        result = _get_organizations_impl(api_key)
-        return jsonify(result)
+        result, stale = _lookup_organizations(api_key)
+        return _flag_stale(_organizations_response(api_key, result), stale)
+    except OrganizationsPending:
+        return _organizations_pending('service')
+    except CircuitOpen as e:
+        return _organizations_failed(e)
     except Exception as e:
         logger.exception("Meraki getOrganizations (service) failed")
-        return jsonify({"error": "Failed to fetch organizations", "detail": str(e)}), 502
+        return _organizations_failed(e)
 
 
 @meraki_bp.route('/my-organizations')
 def get_my_organizations():
     """
     List organizations for the My Access page (user view).
-    Uses MERAKI_USER_API_KEY (fallback: MERAKI_DASHBOARD_API_KEY).
-    Returns list of { id, name, link }. Cached per key for 1 hour.
+    Once the membership index is ready: the organizations the caller administers,
+    as { id, name, link, access, networks, tags }, from the index and the cached
+    service list. Until then uses MERAKI_USER_API_KEY (fallback:
+    MERAKI_DASHBOARD_API_KEY) and returns its list of { id, name, link }.
+    With limit/cursor/q/match/sort returns { items, total, next_cursor }.
     """
     user_data, err = _user_from_request()
     if err:
@@ -130,14 +865,45 @@ def get_my_organizations():
     if not user_data:
         return jsonify({"error": "Not authenticated"}), 401
 
+    if _memberships.ready:
+        api_key = _get_service_api_key()
+        email = user_data.get('sub') or user_data.get('email') or ''
+        try:
+            orgs, stale = _lookup_organizations(api_key)
+            return _flag_stale(_views_response(*_my_organizations_views(email.strip().lower(), api_key, orgs)), stale)
+        except OrganizationsPending:
+            return _organizations_pending('service')
+        except CircuitOpen as e:
+            return _organizations_failed(e)
+        except Exception as e:
+            logger.exception("Meraki getOrganizations (service, memberships) failed")
+            return _organizations_failed(e)
+
     api_key = _get_user_api_key()
     if not api_key:
         logger.warning("MERAKI_USER_API_KEY / MERAKI_DASHBOARD_API_KEY not set")
         return jsonify({"error": "Meraki API not configured"}), 503
 
     try:
-        result = _get_organizations_impl(api_key)
-        return jsonify(result)
+        result, stale = _lookup_organizations(api_key)
+        return _flag_stale(_organizations_response(api_key, result), stale)
+    except OrganizationsPending:
+        return _organizations_pending('user')
+    except CircuitOpen as e:
+        return _organizations_failed(e)
     except Exception as e:
         logger.exception("Meraki getOrganizations (user) failed")
-        return jsonify({"error": "Failed to fetch organizations", "detail": str(e)}), 502
+        return _organizations_failed(e)
+
+
+@meraki_bp.route('/rate-limit')
+def get_rate_limit_stats():
+    """Outbound Meraki rate limiter: queue depth by priority and throttling counters."""
+    user_data, err = _user_from_request()
+    if err:
+        return err
+    if not user_data:
+        return jsonify({"error": "Not authenticated"}), 401
+    if _rate_limiter is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **_rate_limiter.stats()})
@@ -0,0 +1,37 @@
+"""
+Prometheus scrape endpoint.
+
+GET /metrics returns the samples recorded in services/metrics.py in the
+Prometheus text format (all workers' samples when PROMETHEUS_MULTIPROC_DIR
+is set). Scrapers must send METRICS_TOKEN as Authorization: Bearer <token>.
+Without a token the endpoint answers 403, unless METRICS_PUBLIC=true opts in
+to unauthenticated scrapes (e.g. when only a private network can reach it).
+"""
+
+import hmac
+import os
+
+from flask import Blueprint, Response, jsonify, request
+
+from routes.auth import update_code_gauge
+from services.metrics import render
+
+metrics_bp = Blueprint('metrics', __name__)
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_PUBLIC = os.getenv('METRICS_PUBLIC', 'false').lower() == 'true'
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def scrape():
+    """Current metrics in the Prometheus text exposition format."""
+    if METRICS_TOKEN:
+        auth_header = request.headers.get('Authorization', '')
+        supplied = auth_header[7:].strip() if auth_header.startswith('Bearer ') else ''
+        if not hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+            return jsonify({"error": "Unauthorized"}), 401
+    elif not METRICS_PUBLIC:
+        return jsonify({"error": "Metrics require METRICS_TOKEN (or METRICS_PUBLIC=true)"}), 403
+    update_code_gauge(scrape=True)
+    body, content_type = render()
+    return Response(body, content_type=content_type)
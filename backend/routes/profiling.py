@@ -0,0 +1,133 @@
+"""
+On-demand request profiling (services/profiler.py).
+
+Off unless PROFILING_ENABLED=true. Then create_app's request hooks profile:
+
+- a random PROFILING_SAMPLE_RATE fraction of all requests (e.g. 0.01), and
+- any request from an approver that sends X-Profile: 1 (the response carries
+  X-Profile-Id so the caller can fetch that profile).
+
+The last PROFILING_KEEP profiles are kept per worker. Approvers only:
+
+- GET /api/profiles: kept profiles, newest first (filter with route=);
+- GET /api/profiles/<id>: one profile as a collapsed-stack (.folded) file;
+- GET /api/profiles/collapsed: all kept profiles (optionally one route)
+  merged into one collapsed-stack file.
+
+Render with e.g. `flamegraph.pl profile.folded > profile.svg`, or open the
+file in speedscope.
+"""
+
+import logging
+import os
+import random
+
+from flask import Blueprint, Response, g, jsonify, request
+
+from routes.access_requests import _is_approver, _require_user
+from routes.auth import _user_from_request
+from services.profiler import SamplingProfiler, collapsed_text, merge_stacks
+
+profiling_bp = Blueprint('profiling', __name__, url_prefix='/api/profiles')
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILE_HEADER = 'X-Profile'
+
+_profiler = SamplingProfiler(
+    interval=float(os.getenv('PROFILING_INTERVAL_MS', 10)) / 1000.0,
+    keep=int(os.getenv('PROFILING_KEEP', 50)),
+)
+
+
+def _wants_trace() -> bool:
+    """True if this request asked to be traced and comes from an approver."""
+    if request.headers.get(PROFILE_HEADER, '').lower() not in ('1', 'true'):
+        return False
+    user_data, _ = _user_from_request()
+    return bool(user_data) and _is_approver(user_data)
+
+
+def begin_request_profile():
+    """before_request hook: start profiling this request if it is sampled or traced."""
+    if not PROFILING_ENABLED or request.blueprint == profiling_bp.name:
+        return
+    traced = _wants_trace()
+    if traced or (PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE):
+        g.profile_handle = _profiler.start()
+        g.profile_traced = traced
+
+
+def end_request_profile(response):
+    """after_request hook: keep the finished profile; traced requests get X-Profile-Id."""
+    handle = g.pop('profile_handle', None)
+    if handle is None:
+        return response
+    profile = _profiler.stop(
+        handle,
+        method=request.method,
+        path=request.path,
+        route=request.url_rule.rule if request.url_rule is not None else None,
+        status=response.status_code,
+        traced=g.get('profile_traced', False),
+    )
+    if profile is not None and g.get('profile_traced'):
+        response.headers['X-Profile-Id'] = profile.id
+    return response
+
+
+def discard_request_profile(exc=None):
+    """teardown_request hook: drop a profile that after_request never finished."""
+    handle = g.pop('profile_handle', None)
+    if handle is not None:
+        _profiler.discard(handle)
+
+
+def _require_approver():
+    user_data, err = _require_user()
+    if err:
+        return err
+    if not _is_approver(user_data):
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+
+def _folded(text: str, filename: str) -> Response:
+    return Response(text, mimetype='text/plain', headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+    })
+
+
+@profiling_bp.route('', methods=['GET'])
+def list_profiles():
+    """Kept profiles on this worker, newest first."""
+    err = _require_approver()
+    if err:
+        return err
+    route = request.args.get('route')
+    profiles = [p.summary() for p in _profiler.profiles() if not route or p.meta.get('route') == route]
+    return jsonify({'enabled': PROFILING_ENABLED, 'sampleRate': PROFILING_SAMPLE_RATE, 'items': profiles})
+
+
+@profiling_bp.route('/collapsed', methods=['GET'])
+def download_merged_profile():
+    """All kept profiles (optionally one route) merged into one collapsed-stack file."""
+    err = _require_approver()
+    if err:
+        return err
+    route = request.args.get('route')
+    profiles = [p for p in _profiler.profiles() if not route or p.meta.get('route') == route]
+    return _folded(collapsed_text(merge_stacks(profiles)), 'profiles.folded')
+
+
+@profiling_bp.route('/<profile_id>', methods=['GET'])
+def download_profile(profile_id):
+    """One profile as a collapsed-stack file."""
+    err = _require_approver()
+    if err:
+        return err
+    profile = _profiler.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return _folded(profile.collapsed(), f"profile-{profile.id}.folded")
@@ -0,0 +1,371 @@
+"""
+Persistent access request store (SQLite, WAL).
+
+An access request has an ID like 'req-10001', a requester and a list of
+items (one organization + permission each) with item-level status. Row IDs
+follow the frontend's convention (see parseRequestRowId in
+AccessRequestsContext.js): 'req-10001' addresses item 1 and 'req-10001.2'
+addresses item 2 of a multi-item request.
+
+Indexes cover the hot queries: a requester's history (requester, num), the
+approval queue by status (status, request_num), per-organization queues
+(org_id, status, request_num) and time ranges (requested_at). Listing uses
+keyset pagination on the request number, so pages stay O(page size) at
+hundreds of thousands of requests.
+"""
+
+from datetime import datetime, timezone
+
+from services.database import Database
+
+ITEM_STATUSES = ('pending', 'approved', 'rejected', 'cancelled', 'withdrawn')
+PERMISSIONS = ('read', 'write')
+# Allowed item status transitions: from -> {to}
+STATUS_TRANSITIONS = {
+    'pending': {'approved', 'rejected', 'cancelled', 'withdrawn'},
+}
+REQUEST_ID_PREFIX = 'req-'
+# Stay under SQLite's bound-parameter limit in IN (...) lists
+_MAX_QUERY_PARAMS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS access_requests (
+    num INTEGER PRIMARY KEY AUTOINCREMENT,
+    requester TEXT NOT NULL,
+    requester_name TEXT,
+    requested_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_access_requests_requester ON access_requests (requester, num);
+CREATE INDEX IF NOT EXISTS idx_access_requests_requested_at ON access_requests (requested_at);
+
+CREATE TABLE IF NOT EXISTS access_request_items (
+    request_num INTEGER NOT NULL REFERENCES access_requests (num),
+    position INTEGER NOT NULL,
+    org_id TEXT NOT NULL,
+    org_name TEXT,
+    permission TEXT NOT NULL,
+    status TEXT NOT NULL,
+    approved_at TEXT,
+    updated_at TEXT NOT NULL,
+    updated_by TEXT,
+    PRIMARY KEY (request_num, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_access_request_items_status ON access_request_items (status, request_num);
+CREATE INDEX IF NOT EXISTS idx_access_request_items_org ON access_request_items (org_id, status, request_num);
+
+-- Request IDs continue the frontend's numbering (req-10001, req-10002, ...)
+INSERT INTO sqlite_sequence (name, seq)
+SELECT 'access_requests', 10000
+WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'access_requests');
+"""
+
+
+class AccessRequestNotFound(LookupError):
+    """No request (or item) with the given ID."""
+
+
+class InvalidTransition(ValueError):
+    """Item status change not allowed from its current status."""
+
+
+def utc_iso(timestamp: float = None) -> str:
+    """Epoch seconds (default: now) like JavaScript's Date.toISOString() (UTC, milliseconds, 'Z')."""
+    dt = datetime.now(timezone.utc) if timestamp is None else datetime.fromtimestamp(timestamp, timezone.utc)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.') + f"{dt.microsecond // 1000:03d}Z"
+
+
+def utc_now_iso() -> str:
+    return utc_iso()
+
+
+def parse_utc_iso(value: str) -> float:
+    """utc_iso() string -> epoch seconds."""
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc).timestamp()
+
+
+def format_request_id(num: int) -> str:
+    return f"{REQUEST_ID_PREFIX}{num}"
+
+
+def parse_request_id(request_id: str) -> int:
+    """'req-10001' -> 10001; raises AccessRequestNotFound for anything else."""
+    if not isinstance(request_id, str) or not request_id.startswith(REQUEST_ID_PREFIX):
+        raise AccessRequestNotFound(request_id)
+    try:
+        return int(request_id[len(REQUEST_ID_PREFIX):])
+    except ValueError:
+        raise AccessRequestNotFound(request_id)
+
+
+def parse_row_id(row_id: str):
+    """
+    'req-10001' -> (10001, 0); 'req-10001.2' -> (10001, 1).
+    Same rules as parseRequestRowId in the frontend: no suffix or a bad suffix means item 0.
+    """
+    request_id, dot, suffix = (row_id or '').partition('.')
+    num = parse_request_id(request_id)
+    if not dot:
+        return num, 0
+    try:
+        return num, int(suffix) - 1
+    except ValueError:
+        return num, 0
+
+
+def format_row_id(num: int, position: int, item_count: int) -> str:
+    """Row ID as the Approvals table builds it: bare request ID for single-item requests."""
+    request_id = format_request_id(num)
+    return request_id if item_count == 1 else f"{request_id}.{position + 1}"
+
+
+class AccessRequestStore:
+    """Access requests and their items in SQLite."""
+
+    def __init__(self, db: Database):
+        self.db = db
+        db.ensure_schema(_SCHEMA)
+
+    # ---- reads ----
+
+    def _load(self, conn, nums: list) -> list:
+        """Requests for nums (in that order) with their items."""
+        if not nums:
+            return []
+        marks = ','.join('?' * len(nums))
+        requests = {
+            row['num']: row
+            for row in conn.execute(f"SELECT * FROM access_requests WHERE num IN ({marks})", nums)
+        }
+        items = {}
+        for row in conn.execute(
+            f"SELECT * FROM access_request_items WHERE request_num IN ({marks}) ORDER BY request_num, position",
+            nums,
+        ):
+            items.setdefault(row['request_num'], []).append(row)
+        return [_request_dict(requests[num], items.get(num, [])) for num in nums if num in requests]
+
+    def get(self, request_id: str) -> dict:
+        num = parse_request_id(request_id)
+        found = self._load(self.db.connection(), [num])
+        if not found:
+            raise AccessRequestNotFound(request_id)
+        return found[0]
+
+    def get_item(self, row_id: str) -> dict:
+        """One item with its request's requester: { rowId, requestId, requester, ...item }."""
+        num, position = parse_row_id(row_id)
+        request = self.get(format_request_id(num))
+        if not 0 <= position < len(request['items']):
+            raise AccessRequestNotFound(row_id)
+        return {**request['items'][position], 'requestId': request['id'], 'requester': request['requester']}
+
+    def list(self, requester: str = None, status: str = None, org_id: str = None,
+             since: str = None, until: str = None, limit: int = 50, before: int = None):
+        """
+        Newest first. Returns (requests, next_before); pass next_before back as
+        `before` for the next page (None on the last page). status/org_id keep
+        requests with at least one matching item.
+        """
+        conn = self.db.connection()
+        params = []
+        if requester is None and (status or org_id):
+            # Approval queue: drive from the item indexes, not the whole request table
+            where = []
+            if org_id:
+                where.append('i.org_id = ?')
+                params.append(org_id)
+            if status:
+                where.append('i.status = ?')
+                params.append(status)
+            if before is not None:
+                where.append('i.request_num < ?')
+                params.append(before)
+            if since or until:
+                where.append('i.request_num IN (SELECT num FROM access_requests r WHERE 1=1'
+                             + (' AND r.requested_at >= ?' if since else '')
+                             + (' AND r.requested_at < ?' if until else '') + ')')
+                params.extend(v for v in (since, until) if v)
+            sql = (f"SELECT DISTINCT i.request_num AS num FROM access_request_items i "
+                   f"WHERE {' AND '.join(where)} ORDER BY i.request_num DESC LIMIT ?")
+        else:
+            where = ['1=1']
+            if requester is not None:
+                where.append('r.requester = ?')
+                params.append(requester)
+            if before is not None:
+                where.append('r.num < ?')
+                params.append(before)
+            if since:
+                where.append('r.requested_at >= ?')
+                params.append(since)
+            if until:
+                where.append('r.requested_at < ?')
+                params.append(until)
+            if status or org_id:
+                item_where = ['i.request_num = r.num']
+                if status:
+                    item_where.append('i.status = ?')
+                    params.append(status)
+                if org_id:
+                    item_where.append('i.org_id = ?')
+                    params.append(org_id)
+                where.append(f"EXISTS (SELECT 1 FROM access_request_items i WHERE {' AND '.join(item_where)})")
+            sql = f"SELECT r.num FROM access_requests r WHERE {' AND '.join(where)} ORDER BY r.num DESC LIMIT ?"
+        params.append(limit + 1)
+        nums = [row['num'] for row in conn.execute(sql, params)]
+        next_before = nums[limit - 1] if len(nums) > limit else None
+        return self._load(conn, nums[:limit]), next_before
+
+    # ---- writes ----
+
+    def create(self, requester: str, requester_name: str, items: list) -> dict:
+        """Create a request; items are { orgId, orgName, permission }. All items start pending."""
+        now = utc_now_iso()
+        with self.db.transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO access_requests (requester, requester_name, requested_at) VALUES (?, ?, ?)",
+                (requester, requester_name, now),
+            )
+            num = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO access_request_items "
+                "(request_num, position, org_id, org_name, permission, status, approved_at, updated_at, updated_by) "
+                "VALUES (?, ?, ?, ?, ?, 'pending', NULL, ?, ?)",
+                [
+                    (num, position, item['orgId'], item.get('orgName') or item['orgId'],
+                     'write' if item.get('permission') == 'write' else 'read', now, requester)
+                    for position, item in enumerate(items)
+                ],
+            )
+        return self.get(format_request_id(num))
+
+    def update_item_status(self, row_id: str, status: str, actor: str = None,
+                           stamp_approved_at: bool = False) -> dict:
+        """
+        Move one item to status (updateItemStatus). approvedAt is set to now when
+        stamp_approved_at is true or the new status is 'approved'; otherwise kept.
+        Raises AccessRequestNotFound or InvalidTransition.
+        """
+        num, position = parse_row_id(row_id)
+        now = utc_now_iso()
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT status FROM access_request_items WHERE request_num = ? AND position = ?",
+                (num, position),
+            ).fetchone()
+            if row is None:
+                raise AccessRequestNotFound(row_id)
+            _check_transition(row['status'], status)
+            conn.execute(
+                "UPDATE access_request_items SET status = ?, approved_at = COALESCE(?, approved_at), "
+                "updated_at = ?, updated_by = ? WHERE request_num = ? AND position = ?",
+                (status, now if (stamp_approved_at or status == 'approved') else None, now, actor, num, position),
+            )
+        return self.get_item(row_id)
+
+    def update_request_status(self, request_id: str, status: str, actor: str = None,
+                              stamp_approved_at: bool = False) -> dict:
+        """
+        Move every item that may transition to status (updateRequestStatus).
+        Raises InvalidTransition if no item can.
+        """
+        num = parse_request_id(request_id)
+        now = utc_now_iso()
+        allowed_from = [frm for frm, targets in STATUS_TRANSITIONS.items() if status in targets]
+        with self.db.transaction() as conn:
+            if conn.execute("SELECT 1 FROM access_requests WHERE num = ?", (num,)).fetchone() is None:
+                raise AccessRequestNotFound(request_id)
+            marks = ','.join('?' * len(allowed_from)) or "''"
+            cur = conn.execute(
+                "UPDATE access_request_items SET status = ?, approved_at = COALESCE(?, approved_at), "
+                f"updated_at = ?, updated_by = ? WHERE request_num = ? AND status IN ({marks})",
+                (status, now if (stamp_approved_at or status == 'approved') else None, now, actor, num,
+                 *allowed_from),
+            )
+            if cur.rowcount == 0:
+                raise InvalidTransition(f"No items of {request_id} can move to '{status}'")
+        return self.get(request_id)
+
+    def get_items(self, row_ids: list) -> dict:
+        """row_id -> item as get_item() returns it, or AccessRequestNotFound. One query for all rows."""
+        return self._items(self.db.connection(), row_ids)
+
+    def update_items_status(self, row_ids: list, status: str, actor: str = None,
+                            stamp_approved_at: bool = False, atomic: bool = False) -> dict:
+        """
+        Move many items (by row ID) to status in one transaction (bulk actions).
+        Returns row_id -> the updated item, or the AccessRequestNotFound /
+        InvalidTransition for that row. With atomic=True nothing changes
+        unless every row can move.
+        """
+        now = utc_now_iso()
+        approved_at = now if (stamp_approved_at or status == 'approved') else None
+        with self.db.transaction() as conn:
+            results = self._items(conn, row_ids)
+            keys = {}
+            for row_id, item in results.items():
+                if isinstance(item, Exception):
+                    continue
+                try:
+                    _check_transition(item['status'], status)
+                except InvalidTransition as e:
+                    results[row_id] = e
+                    continue
+                keys[row_id] = parse_row_id(row_id)
+            if atomic and len(keys) < len(results):
+                return results
+            conn.executemany(
+                "UPDATE access_request_items SET status = ?, approved_at = COALESCE(?, approved_at), "
+                "updated_at = ?, updated_by = ? WHERE request_num = ? AND position = ?",
+                [(status, approved_at, now, actor, num, position) for num, position in set(keys.values())],
+            )
+            results.update((row_id, item) for row_id, item in self._items(conn, list(keys)).items())
+        return results
+
+    def _items(self, conn, row_ids: list) -> dict:
+        keys = {}
+        for row_id in row_ids:
+            try:
+                keys[row_id] = parse_row_id(row_id)
+            except AccessRequestNotFound as e:
+                keys[row_id] = e
+        nums = sorted({k[0] for k in keys.values() if isinstance(k, tuple)})
+        requests = {}
+        for start in range(0, len(nums), _MAX_QUERY_PARAMS):
+            for request in self._load(conn, nums[start:start + _MAX_QUERY_PARAMS]):
+                requests[parse_request_id(request['id'])] = request
+        results = {}
+        for row_id, key in keys.items():
+            request = requests.get(key[0]) if isinstance(key, tuple) else None
+            if request is None or not 0 <= key[1] < len(request['items']):
+                results[row_id] = key if isinstance(key, Exception) else AccessRequestNotFound(row_id)
+                continue
+            results[row_id] = {
+                **request['items'][key[1]], 'requestId': request['id'], 'requester': request['requester'],
+            }
+        return results
+
+
+def _check_transition(current: str, new: str):
+    if new not in STATUS_TRANSITIONS.get(current, ()):
+        raise InvalidTransition(f"Cannot change status from '{current}' to '{new}'")
+
+
+def _request_dict(row, items: list) -> dict:
+    """API shape, matching the frontend's AccessRequest typedef (plus requester and rowId)."""
+    return {
+        'id': format_request_id(row['num']),
+        'requestedAt': row['requested_at'],
+        'requester': {'email': row['requester'], 'name': row['requester_name']},
+        'items': [
+            {
+                'rowId': format_row_id(row['num'], item['position'], len(items)),
+                'orgId': item['org_id'],
+                'orgName': item['org_name'],
+                'permission': item['permission'],
+                'status': item['status'],
+                'approvedAt': item['approved_at'],
+            }
+            for item in items
+        ],
+    }
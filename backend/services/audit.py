@@ -0,0 +1,335 @@
+"""
+Audit trail: who logged in, who asked for and approved access, and what the
+grants did in Meraki.
+
+Request handlers call record(), which only appends to a bounded in-memory
+queue and never touches disk. A background writer drains the queue in
+batches (up to batch_size events, or whatever arrived within
+flush_interval) and appends them to an append-only SQLite table with one
+insert transaction per batch. The table lives in its own database file
+(AUDIT_DATABASE_PATH), so audit writes never wait on the access request
+database's write lock. Several gunicorn workers can append to it at once.
+
+When the queue is full, new events are dropped rather than blocking the
+request. Drops, queue depth and flush latency go to the Prometheus metrics
+(services/metrics.py) and stats(). Events older than retention_days are
+pruned in small chunks once an hour. Queries filter by time range, and by
+actor or action, through the (at), (actor, at) and (action, at) indexes.
+
+The writer thread is started lazily per process. After a fork, the child
+starts with an empty queue: anything the parent had queued is the parent's
+to write.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from services.access_requests import utc_iso
+from services.database import Database, database_path, get_database
+from services.metrics import AUDIT_EVENTS, AUDIT_FLUSH_SECONDS, AUDIT_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    at TEXT NOT NULL,
+    action TEXT NOT NULL,
+    actor TEXT,
+    target TEXT,
+    outcome TEXT NOT NULL,
+    ip TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_audit_events_at ON audit_events (at);
+CREATE INDEX IF NOT EXISTS idx_audit_events_actor ON audit_events (actor, at);
+CREATE INDEX IF NOT EXISTS idx_audit_events_action ON audit_events (action, at);
+"""
+_COLUMNS = ('at', 'action', 'actor', 'target', 'outcome', 'ip', 'details')
+_PRUNE_CHUNK = 5000
+_PRUNE_INTERVAL_SECONDS = 3600
+_FAILED_BATCH_RETRY_SECONDS = 1
+_STOP = object()  # queued by stop() to end the writer thread
+
+
+def default_audit_path() -> str:
+    return os.getenv('AUDIT_DATABASE_PATH') or os.path.join(
+        os.path.dirname(database_path()), 'audit.sqlite3'
+    )
+
+
+class AuditStore:
+    """Append-only audit events in SQLite."""
+
+    def __init__(self, db: Database):
+        self.db = db
+        db.ensure_schema(_SCHEMA)
+
+    def append(self, events: list):
+        """Insert a batch of events in one transaction."""
+        with self.db.transaction() as conn:
+            conn.executemany(
+                f"INSERT INTO audit_events ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [tuple(event.get(column) for column in _COLUMNS) for event in events],
+            )
+
+    def list(self, since: str = None, until: str = None, actor: str = None, action: str = None,
+             limit: int = 100, before: int = None):
+        """
+        Newest first. Returns (events, next_before); pass next_before back as
+        `before` for the next page (None on the last page). action ending in '.'
+        matches a prefix ('access_request.' for every access request action).
+        """
+        where, params = ['1=1'], []
+        if since:
+            where.append('at >= ?')
+            params.append(since)
+        if until:
+            where.append('at < ?')
+            params.append(until)
+        if actor:
+            where.append('actor = ?')
+            params.append(actor)
+        if action and action.endswith('.'):
+            where.append('action >= ? AND action < ?')
+            params.extend((action, action[:-1] + '/'))  # '/' sorts right after '.'
+        elif action:
+            where.append('action = ?')
+            params.append(action)
+        if before is not None:
+            where.append('id < ?')
+            params.append(before)
+        rows = self.db.connection().execute(
+            f"SELECT * FROM audit_events WHERE {' AND '.join(where)} ORDER BY id DESC LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+        next_before = rows[limit - 1]['id'] if len(rows) > limit else None
+        return [self._event(row) for row in rows[:limit]], next_before
+
+    def prune(self, older_than: str) -> int:
+        """Delete events before older_than (ISO time) in small chunks; returns the count."""
+        deleted = 0
+        while True:
+            with self.db.transaction() as conn:
+                count = conn.execute(
+                    "DELETE FROM audit_events WHERE id IN "
+                    "(SELECT id FROM audit_events WHERE at < ? ORDER BY at LIMIT ?)",
+                    (older_than, _PRUNE_CHUNK),
+                ).rowcount
+            deleted += count
+            if count < _PRUNE_CHUNK:
+                return deleted
+
+    @staticmethod
+    def _event(row) -> dict:
+        details = row['details']
+        return {
+            'id': row['id'],
+            'at': row['at'],
+            'action': row['action'],
+            'actor': row['actor'],
+            'target': row['target'],
+            'outcome': row['outcome'],
+            'ip': row['ip'],
+            'details': json.loads(details) if details else None,
+        }
+
+
+class AuditLog:
+    """Bounded queue of audit events, written to an AuditStore in batches by a background thread."""
+
+    def __init__(self, store_factory, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, retention_days: float = 365):
+        self.store_factory = store_factory
+        self.max_queue = max(1, int(max_queue))
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.retention_days = retention_days
+        self._queue = queue.Queue(self.max_queue)
+        self._store = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0  # queued or being written (for flush())
+        self._counts = {'recorded': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
+        self._last_flush_ms = None
+        self._next_prune = 0.0
+        atexit.register(self.flush, 2.0)
+
+    def record(self, action: str, actor: str = None, target: str = None, outcome: str = 'success',
+               details: dict = None, ip: str = None) -> bool:
+        """
+        Queue one event without blocking; False if the queue was full and it was
+        dropped. actor is normally an email and is stored lowercased.
+        """
+        self._ensure_started()
+        event = {
+            'at': utc_iso(),
+            'action': action,
+            'actor': actor.strip().lower() if actor else None,
+            'target': target,
+            'outcome': outcome,
+            'ip': ip,
+            'details': json.dumps(details, separators=(',', ':'), default=str) if details else None,
+        }
+        with self._lock:
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._counts['dropped'] += 1
+                AUDIT_EVENTS.labels('dropped').inc()
+                return False
+            self._pending += 1
+            self._counts['recorded'] += 1
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written (or timeout); True if drained."""
+        if self._thread is None or self._pid != os.getpid():
+            return self._pending == 0
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Write what is queued, then stop the writer thread in this process
+        (pre-fork master). The next record() starts a new one.
+        """
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        thread = self._thread
+        self.flush(timeout)
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Audit writer not stopped: queue still full")
+            return
+        thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counts,
+                'queued': self._queue.qsize(),
+                'maxQueue': self.max_queue,
+                'lastFlushMs': self._last_flush_ms,
+            }
+
+    @property
+    def store(self) -> AuditStore:
+        if self._store is None:
+            self._store = self.store_factory()
+        return self._store
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Forked: the parent writes what it queued
+                self._queue = queue.Queue(self.max_queue)
+                self._pending = 0
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _take_batch(self) -> list:
+        """
+        Block for the first event, then collect up to batch_size within
+        flush_interval. A stop() marker, if taken, ends the batch as its last item.
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+            AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+            if batch:
+                self._write(batch)
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._idle.notify_all()
+            if stopping:
+                return
+            self._maybe_prune()
+
+    def _write(self, batch: list):
+        for attempt in (1, 2):
+            start = time.perf_counter()
+            try:
+                self.store.append(batch)
+            except Exception:
+                logger.exception(f"Audit batch write failed ({len(batch)} events, attempt {attempt})")
+                time.sleep(_FAILED_BATCH_RETRY_SECONDS)
+                continue
+            seconds = time.perf_counter() - start
+            AUDIT_FLUSH_SECONDS.observe(seconds)
+            AUDIT_EVENTS.labels('written').inc(len(batch))
+            with self._lock:
+                self._counts['written'] += len(batch)
+                self._counts['batches'] += 1
+                self._last_flush_ms = round(seconds * 1000, 3)
+            return
+        AUDIT_EVENTS.labels('failed').inc(len(batch))
+        with self._lock:
+            self._counts['failed'] += len(batch)
+
+    def _maybe_prune(self):
+        now = time.time()
+        if not self.retention_days or now < self._next_prune:
+            return
+        self._next_prune = now + _PRUNE_INTERVAL_SECONDS
+        try:
+            deleted = self.store.prune(utc_iso(now - self.retention_days * 86400))
+            if deleted:
+                logger.info(f"Pruned {deleted} audit events older than {self.retention_days} days")
+        except Exception:
+            logger.exception("Audit retention prune failed")
+
+
+_audit_log = AuditLog(
+    lambda: AuditStore(get_database(default_audit_path())),
+    max_queue=int(os.getenv('AUDIT_QUEUE_SIZE', 10000)),
+    batch_size=int(os.getenv('AUDIT_BATCH_SIZE', 500)),
+    flush_interval=float(os.getenv('AUDIT_FLUSH_SECONDS', 1.0)),
+    retention_days=float(os.getenv('AUDIT_RETENTION_DAYS', 365)),
+)
+AUDIT_ENABLED = os.getenv('AUDIT_ENABLED', 'true').lower() == 'true'
+
+
+def get_audit_log() -> AuditLog:
+    return _audit_log
+
+
+def record(action: str, actor: str = None, target: str = None, outcome: str = 'success',
+           details: dict = None, ip: str = None) -> bool:
+    """Queue an audit event on the process-wide log (no-op when AUDIT_ENABLED=false)."""
+    if not AUDIT_ENABLED:
+        return False
+    return _audit_log.record(action, actor, target, outcome, details, ip)
@@ -0,0 +1,176 @@
+"""
+Two-tier TTL cache.
+
+- LRUCache: in-process tier, bounded by entry count, entries expire by TTL.
+- RedisCache: shared tier so every gunicorn worker sees the same entries.
+- TieredCache: LRU in front of an optional Redis tier. A local miss that hits
+  Redis is copied into the local tier with the same expiry, so workers expire
+  an entry together instead of each refetching on its own schedule.
+
+Entries are fresh until expires_at and are then kept for a further stale_ttl
+seconds so callers can serve them (stale-while-revalidate) while a refresh
+runs. Expiry timestamps are wall-clock (time.time()) because they are shared
+between processes through Redis.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import redis
+
+from services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(namedtuple('CacheEntry', ['value', 'expires_at'])):
+    """value: cached object; expires_at: wall-clock end of freshness (seconds since epoch)."""
+    __slots__ = ()
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class LRUCache:
+    """Thread-safe in-process cache with per-entry TTL and max-size LRU eviction."""
+
+    def __init__(self, max_entries: int = 128, stale_ttl: float = 0):
+        self.max_entries = max(1, int(max_entries))
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, allow_stale: bool = False):
+        """Return the CacheEntry for key, or None if missing, expired, or stale and not allowed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = time.time()
+            if entry.expires_at + self.stale_ttl <= now:
+                del self._entries[key]
+                return None
+            if entry.expires_at <= now and not allow_stale:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, ttl: float, expires_at: float = None):
+        """Store value for ttl seconds (or until expires_at when given)."""
+        entry = CacheEntry(value, expires_at if expires_at is not None else time.time() + ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisCache:
+    """
+    Shared cache tier backed by Redis. Values are stored as JSON with their
+    expiry; Redis evicts the key itself once the stale window ends (SET PX).
+    Redis errors are logged and treated as a miss so the app keeps working
+    on the local tier alone.
+    """
+
+    def __init__(self, url: str, prefix: str, stale_ttl: float = 0):
+        self.url = url
+        self.prefix = prefix
+        self.stale_ttl = stale_ttl
+
+    def _key(self, key) -> str:
+        return f"{self.prefix}{key}"
+
+    def get(self, key, allow_stale: bool = False):
+        try:
+            raw = get_redis(self.url).get(self._key(key))
+        except redis.RedisError as e:
+            logger.warning(f"Redis cache get failed ({self.prefix}): {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            data = json.loads(raw)
+            entry = CacheEntry(data['value'], float(data['expires_at']))
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Discarding malformed Redis cache entry for {self._key(key)}")
+            return None
+        if entry.expires_at <= time.time() and not allow_stale:
+            return None
+        return entry
+
+    def set(self, key, value, ttl: float, expires_at: float = None):
+        expires_at = expires_at if expires_at is not None else time.time() + ttl
+        ttl_ms = int((expires_at + self.stale_ttl - time.time()) * 1000)
+        entry = CacheEntry(value, expires_at)
+        if ttl_ms <= 0:
+            return entry
+        payload = json.dumps({'value': value, 'expires_at': expires_at}, separators=(',', ':'))
+        try:
+            get_redis(self.url).set(self._key(key), payload, px=ttl_ms)
+        except redis.RedisError as e:
+            logger.warning(f"Redis cache set failed ({self.prefix}): {e}")
+        return entry
+
+    def delete(self, key):
+        try:
+            get_redis(self.url).delete(self._key(key))
+        except redis.RedisError as e:
+            logger.warning(f"Redis cache delete failed ({self.prefix}): {e}")
+
+
+class TieredCache:
+    """In-process LRU tier in front of an optional shared (Redis) tier."""
+
+    def __init__(self, local: LRUCache, shared: RedisCache = None):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key, allow_stale: bool = False):
+        """
+        Return the freshest CacheEntry for key across tiers, or None. A stale local
+        entry is only used when the shared tier has nothing newer (another worker
+        may already have refreshed it).
+        """
+        entry = self.local.get(key, allow_stale=True)
+        if entry is not None and entry.fresh:
+            return entry
+        if self.shared is not None:
+            shared_entry = self.shared.get(key, allow_stale=True)
+            if shared_entry is not None and (entry is None or shared_entry.expires_at > entry.expires_at):
+                self.local.set(key, shared_entry.value, 0, expires_at=shared_entry.expires_at)
+                entry = shared_entry
+        if entry is None or not (entry.fresh or allow_stale):
+            return None
+        return entry
+
+    def set(self, key, value, ttl: float):
+        entry = self.local.set(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl, expires_at=entry.expires_at)
+        return entry
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear_local(self):
+        self.local.clear()
@@ -0,0 +1,150 @@
+"""
+Per-key circuit breaker with negative caching, for upstream calls that hold
+a worker for their whole timeout when the upstream is degraded.
+
+Per key (an API key hash):
+
+- closed: calls go through. A failure is remembered for failure_ttl
+  seconds (negative cache), and calls in that window fail at once with
+  CircuitOpen instead of repeating the same slow failure.
+- open: after failure_threshold consecutive failures, calls fail at once
+  for reset_timeout seconds.
+- half-open: after that, a single call (the probe) goes through while the
+  others keep failing fast. If the probe succeeds, the breaker closes. If
+  it fails, the breaker opens again with the reset timeout doubled, up to
+  max_reset_timeout.
+
+Callers catch CircuitOpen to serve what they have cached (its retry_after
+says when the next attempt is allowed). State is per process.
+"""
+
+import logging
+import threading
+import time
+
+from services.metrics import CIRCUIT_TRANSITIONS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpen(Exception):
+    """The call was not attempted: the circuit is open or the last failure is still cached."""
+
+    def __init__(self, retry_after: float, last_error: str = None):
+        self.retry_after = max(0.0, retry_after)
+        self.last_error = last_error
+        super().__init__(f"Upstream unavailable, retry in {self.retry_after:.0f}s"
+                         + (f" (last error: {last_error})" if last_error else ''))
+
+
+class _Circuit:
+    __slots__ = ('state', 'failures', 'failed_at', 'opened_until', 'reset_timeout', 'probing', 'last_error')
+
+    def __init__(self, reset_timeout: float):
+        self.state = CLOSED
+        self.failures = 0
+        self.failed_at = 0.0
+        self.opened_until = 0.0
+        self.reset_timeout = reset_timeout
+        self.probing = 0.0  # monotonic start of the half-open probe in flight
+        self.last_error = None
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuits keyed by upstream identity."""
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30,
+                 max_reset_timeout: float = 300, failure_ttl: float = 10):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        self.failure_ttl = failure_ttl
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def call(self, key, fn):
+        """fn() through the circuit for key; raises CircuitOpen without calling fn when not allowed."""
+        self.before(key)
+        try:
+            result = fn()
+        except Exception as e:
+            self.failure(key, e)
+            raise
+        self.success(key)
+        return result
+
+    def before(self, key):
+        """Raise CircuitOpen unless a call for key may go ahead now (use with success/failure)."""
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return
+            if circuit.state == CLOSED:
+                if circuit.failures and now - circuit.failed_at < self.failure_ttl:
+                    raise CircuitOpen(circuit.failed_at + self.failure_ttl - now, circuit.last_error)
+                return
+            if circuit.state == OPEN and now >= circuit.opened_until:
+                self._transition(key, circuit, HALF_OPEN)
+            # A probe that never reported back (e.g. cancelled) stops counting after max_reset_timeout
+            if circuit.state == HALF_OPEN and (not circuit.probing
+                                               or now - circuit.probing > self.max_reset_timeout):
+                circuit.probing = now
+                return
+            raise CircuitOpen(max(circuit.opened_until - now, 0.0), circuit.last_error)
+
+    def success(self, key):
+        with self._lock:
+            circuit = self._circuits.pop(key, None)
+        if circuit is not None and circuit.state != CLOSED:
+            CIRCUIT_TRANSITIONS.labels(self.name, CLOSED).inc()
+            logger.info(f"Circuit {self.name}/{str(key)[:8]} closed")
+
+    def failure(self, key, error: Exception):
+        now = time.monotonic()
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                circuit = self._circuits[key] = _Circuit(self.reset_timeout)
+            circuit.failures += 1
+            circuit.failed_at = now
+            circuit.last_error = str(error)[:200]
+            if circuit.state == HALF_OPEN:
+                circuit.probing = 0.0
+                circuit.reset_timeout = min(circuit.reset_timeout * 2, self.max_reset_timeout)
+                self._open(key, circuit, now)
+            elif circuit.state == CLOSED and circuit.failures >= self.failure_threshold:
+                self._open(key, circuit, now)
+
+    def state(self, key) -> str:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit.state if circuit is not None else CLOSED
+
+    def failing(self, key) -> bool:
+        """True if the last call for key failed (whatever the state)."""
+        with self._lock:
+            return key in self._circuits
+
+    def stats(self) -> dict:
+        """{ key: { state, failures, lastError } } for keys that are not cleanly closed."""
+        with self._lock:
+            return {
+                key: {'state': c.state, 'failures': c.failures, 'lastError': c.last_error}
+                for key, c in self._circuits.items()
+            }
+
+    def _open(self, key, circuit: _Circuit, now: float):
+        circuit.opened_until = now + circuit.reset_timeout
+        self._transition(key, circuit, OPEN)
+        logger.warning(f"Circuit {self.name}/{str(key)[:8]} open for {circuit.reset_timeout:.0f}s "
+                       f"after {circuit.failures} failures: {circuit.last_error}")
+
+    def _transition(self, key, circuit: _Circuit, state: str):
+        circuit.state = state
+        CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
@@ -0,0 +1,101 @@
+"""
+One-time code stores for the SAML -> JWT exchange.
+
+saml_acs issues a short-lived code and /api/auth/token redeems it exactly
+once. Two backends with the same interface (put / pop):
+
+- MemoryCodeStore: process-local dict plus an expiry heap. Every put/pop
+  first sweeps codes whose TTL has passed, so memory stays bounded by the
+  number of codes issued within one TTL window.
+- RedisCodeStore: codes live in Redis with EX TTL and are redeemed with an
+  atomic GETDEL, so the exchange works whichever worker handles it and a
+  code can never be redeemed twice.
+"""
+
+import heapq
+import json
+import logging
+import threading
+import time
+
+import redis
+
+from services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCodeStore:
+    """Process-local one-time codes with heap-based expiry sweeping."""
+
+    def __init__(self):
+        self._codes = {}  # code -> (value, expires_at)
+        self._expiry_heap = []  # (expires_at, code)
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float):
+        """Drop codes whose TTL has passed. Caller holds the lock."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, code = heapq.heappop(heap)
+            entry = self._codes.get(code)
+            if entry is not None and entry[1] == expires_at:
+                del self._codes[code]
+
+    def put(self, code: str, value: dict, ttl: float):
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._sweep(now)
+            self._codes[code] = (value, expires_at)
+            heapq.heappush(self._expiry_heap, (expires_at, code))
+
+    def pop(self, code: str):
+        """Redeem code: return its value once, or None if unknown, used or expired."""
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            entry = self._codes.pop(code, None)
+        if entry is None or entry[1] <= now:
+            return None
+        return entry[0]
+
+    def __len__(self):
+        with self._lock:
+            self._sweep(time.time())
+            return len(self._codes)
+
+
+class RedisCodeStore:
+    """One-time codes shared by all workers; redeemed atomically with GETDEL (Redis >= 6.2)."""
+
+    def __init__(self, url: str, prefix: str = 'meraki-admin-jit:code:'):
+        self.url = url
+        self.prefix = prefix
+
+    def put(self, code: str, value: dict, ttl: float):
+        get_redis(self.url).set(
+            f"{self.prefix}{code}",
+            json.dumps(value, separators=(',', ':')),
+            ex=max(1, int(ttl)),
+        )
+
+    def pop(self, code: str):
+        try:
+            raw = get_redis(self.url).getdel(f"{self.prefix}{code}")
+        except redis.RedisError as e:
+            logger.error(f"Redis one-time code redeem failed: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            logger.warning("Discarding malformed one-time code entry")
+            return None
+
+    def __len__(self):
+        count = 0
+        for _ in get_redis(self.url).scan_iter(match=f"{self.prefix}*", count=500):
+            count += 1
+        return count
@@ -0,0 +1,98 @@
+"""
+SQLite connections for the backend's persistent state.
+
+One connection per thread (sqlite3 connections must not be shared across
+threads), opened in WAL mode so readers never block the writer, with
+synchronous=NORMAL (durable across app crashes, fsync on checkpoint) and a
+busy timeout so concurrent writers from several gunicorn workers queue
+instead of failing. Connections are reopened after a fork.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Default database file (override with DATABASE_PATH)
+DEFAULT_DATABASE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'meraki-admin-jit.sqlite3'
+)
+BUSY_TIMEOUT_MS = 5000
+
+
+def database_path() -> str:
+    return os.getenv('DATABASE_PATH') or DEFAULT_DATABASE_PATH
+
+
+class Database:
+    """Per-thread SQLite connections to one database file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schemas = []
+
+    def connection(self) -> sqlite3.Connection:
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is not None and local.pid == os.getpid():
+            return conn
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        local.conn, local.pid = conn, os.getpid()
+        return conn
+
+    def ensure_schema(self, ddl: str):
+        """Apply idempotent DDL (CREATE ... IF NOT EXISTS) once per process."""
+        with self._schema_lock:
+            if ddl in self._schemas:
+                return
+            self.connection().executescript(ddl)
+            self._schemas.append(ddl)
+
+    def ensure_columns(self, table: str, columns: dict):
+        """Add missing columns ({name: 'TYPE ...'}) to an existing table (schema upgrades)."""
+        with self._schema_lock:
+            conn = self.connection()
+            existing = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for name, decl in columns.items():
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+    @contextmanager
+    def transaction(self):
+        """
+        BEGIN IMMEDIATE ... COMMIT on this thread's connection (rolls back on error).
+        IMMEDIATE takes the write lock up front, so read-then-write sequences
+        inside the block cannot race another writer.
+        """
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path: str = None) -> Database:
+    """Process-wide Database for path (default: DATABASE_PATH)."""
+    path = path or database_path()
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = Database(path)
+            _databases[path] = db
+        return db
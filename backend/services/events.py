@@ -0,0 +1,267 @@
+"""
+In-process pub/sub for server-sent events, with optional Redis fan-out.
+
+EventBus.publish() hands an event to every matching subscriber in this
+process; each subscriber (one per open /api/events stream) has a bounded
+queue, so a slow client drops its oldest events and is told to resync
+instead of holding memory. Events carry an audience (requester emails
+and/or approvers, or everyone), so a stream only receives what its user may
+see.
+
+With EVENTS_BACKEND=redis, publish() goes to a Redis pub/sub channel and a
+listener thread per process delivers every message locally, so a status
+change handled by one worker reaches streams held by all workers. If Redis
+is unavailable, events are delivered locally only.
+
+A short in-memory history lets a reconnecting client resume from its
+Last-Event-ID (per process; when the ID is unknown it gets a 'resync'
+event and reloads).
+
+Each open stream holds a server thread for as long as it is open, so
+subscribe() takes an optional cap on concurrent subscribers and raises
+TooManySubscribers when it is reached.
+"""
+
+import collections
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+import redis
+
+from services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Audience for events everyone may see (e.g. organization list refreshes)
+AUDIENCE_ALL = None
+
+
+class TooManySubscribers(RuntimeError):
+    """The bus already has its maximum number of open subscriptions."""
+
+
+class Subscription:
+    """One stream's view of the bus: a bounded queue of (id, type, data)."""
+
+    def __init__(self, bus, email: str, approver: bool, max_queue: int):
+        self.bus = bus
+        self.email = (email or '').lower()
+        self.approver = approver
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def matches(self, audience) -> bool:
+        if audience is AUDIENCE_ALL:
+            return True
+        if audience.get('approvers') and self.approver:
+            return True
+        return self.email in (audience.get('emails') or ())
+
+    def offer(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # Client is not keeping up: drop what is queued and ask it to reload
+            self.overflowed = True
+            with self._queue.mutex:
+                self._queue.queue.clear()
+
+    def get(self, timeout: float):
+        """Next event, or None after timeout (caller sends a heartbeat)."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Publish/subscribe within one process; see RedisEventRelay for cross-worker fan-out."""
+
+    def __init__(self, max_queue: int = 256, history: int = 512):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._history = collections.deque(maxlen=history)  # (id, type, data, audience)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # Event IDs are unique per process start so stale Last-Event-IDs are recognised
+        self._epoch = uuid.uuid4().hex[:8]
+        self.relay = None
+
+    def subscribe(self, email: str, approver: bool = False, last_event_id: str = None,
+                  max_subscribers: int = 0):
+        """
+        New subscription. Returns (subscription, missed): the events after
+        last_event_id still in history, or None if they cannot be replayed.
+        Raises TooManySubscribers if max_subscribers (0 = no limit) are already open.
+        """
+        sub = Subscription(self, email, approver, self.max_queue)
+        with self._lock:
+            if max_subscribers and len(self._subscribers) >= max_subscribers:
+                raise TooManySubscribers(f"{len(self._subscribers)} event streams already open")
+            self._subscribers.add(sub)
+            missed = self._since(last_event_id, sub) if last_event_id else []
+        return sub, missed
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_type: str, data: dict, audience=AUDIENCE_ALL):
+        """
+        Send an event to matching subscribers in every process (through the
+        relay when configured, else locally). audience: AUDIENCE_ALL or
+        { emails: [...], approvers: bool }.
+        """
+        if self.relay is not None and self.relay.publish(event_type, data, audience):
+            return
+        self.deliver(event_type, data, audience)
+
+    def deliver(self, event_type: str, data: dict, audience=AUDIENCE_ALL):
+        """Hand an event to this process's subscribers."""
+        with self._lock:
+            event_id = f"{self._epoch}-{next(self._ids)}"
+            self._history.append((event_id, event_type, data, audience))
+            targets = [s for s in self._subscribers if s.matches(audience)]
+        for sub in targets:
+            sub.offer((event_id, event_type, data))
+
+    def _since(self, last_event_id: str, sub: Subscription):
+        """History after last_event_id visible to sub; None if last_event_id is not in history."""
+        ids = [event[0] for event in self._history]
+        if last_event_id not in ids:
+            return None
+        start = ids.index(last_event_id) + 1
+        return [
+            (event_id, event_type, data)
+            for event_id, event_type, data, audience in list(self._history)[start:]
+            if sub.matches(audience)
+        ]
+
+
+class RedisEventRelay:
+    """Fans events out between workers over one Redis pub/sub channel."""
+
+    def __init__(self, bus: EventBus, url: str, channel: str = 'meraki-admin-jit:events',
+                 reconnect_seconds: float = 5):
+        self.bus = bus
+        self.url = url
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self._thread = None
+        self._pid = None
+        self._stop = None
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: dict, audience) -> bool:
+        """Publish to Redis; False (caller delivers locally) if Redis is unavailable."""
+        self.ensure_started()
+        try:
+            get_redis(self.url).publish(
+                self.channel, json.dumps({'type': event_type, 'data': data, 'audience': audience})
+            )
+            return True
+        except redis.RedisError as e:
+            logger.warning(f"Event relay publish failed, delivering locally only: {e}")
+            return False
+
+    def ensure_started(self):
+        """Start the listener thread in this process if it is not running (e.g. after fork)."""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._listen, args=(self._stop,), name='events-relay',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the listener thread in this process (pre-fork master); ensure_started() restarts it."""
+        with self._lock:
+            thread, stop = self._thread, self._stop
+            if thread is None or self._pid != os.getpid():
+                return
+            self._thread = None
+        stop.set()
+        thread.join(timeout)
+
+    def _listen(self, stop: threading.Event):
+        while not stop.is_set():
+            pubsub = None
+            try:
+                pubsub = get_redis(self.url).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                while not stop.is_set():
+                    # Short timeout so stop() is noticed without closing the socket under us
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None or message.get('type') != 'message':
+                        continue
+                    try:
+                        event = json.loads(message['data'])
+                        self.bus.deliver(event['type'], event['data'], event.get('audience'))
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning(f"Ignoring malformed event from Redis: {e}")
+            except redis.RedisError as e:
+                logger.warning(f"Event relay disconnected, retrying in {self.reconnect_seconds}s: {e}")
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except redis.RedisError:
+                        pass
+            stop.wait(self.reconnect_seconds)
+
+
+_bus = EventBus()
+_relay_held = False  # pre-fork master: configure_event_relay() leaves the listener stopped
+
+
+def get_event_bus() -> EventBus:
+    return _bus
+
+
+def configure_event_relay(redis_url: str):
+    """Fan events out between workers through Redis pub/sub (EVENTS_BACKEND=redis)."""
+    _bus.relay = RedisEventRelay(_bus, redis_url)
+    if not _relay_held:
+        _bus.relay.ensure_started()
+
+
+def hold_event_relay():
+    """Don't start the Redis listener in this process until resume_event_relay() (pre-fork master)."""
+    global _relay_held
+    _relay_held = True
+
+
+def stop_event_relay(timeout: float = 5):
+    """Stop the Redis listener in this process, if configured (pre-fork master)."""
+    if _bus.relay is not None:
+        _bus.relay.stop(timeout)
+
+
+def resume_event_relay():
+    """Start the Redis listener in this process, if configured (forked workers)."""
+    global _relay_held
+    _relay_held = False
+    if _bus.relay is not None:
+        _bus.relay.ensure_started()
+
+
+def publish(event_type: str, data: dict, audience=AUDIENCE_ALL):
+    """Publish on the process-wide bus."""
+    _bus.publish(event_type, data, audience)
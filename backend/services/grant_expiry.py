@@ -0,0 +1,156 @@
+"""
+Expiry engine for time-boxed grants.
+
+Every active grant carries an expires_at. Instead of scanning access_grants
+periodically, GrantExpiry keeps the active grants in an in-memory min-heap
+(ExpiryQueue) and arms a single scheduler job for the earliest expiry, so it
+wakes only when something is actually due:
+
+- track() / discard() / pop_due() are O(log n) (entries superseded by a
+  newer expiry are skipped lazily when they reach the top);
+- due grants are moved to 'expiring' in batches and the provisioning
+  pipeline revokes them through per-organization action batches;
+- load() rebuilds the heap from the database at startup and in every
+  forked worker, so expiries survive restarts (anything that passed while
+  down is due immediately).
+
+The heap is per process and only an index: each run also sweeps the
+database for active grants past their expiry, and re-arms for the
+earliest expires_at in the table. A grant activated by a worker that has
+since died is therefore still revoked by whichever worker runs the job.
+The database update (active -> expiring only if expires_at has passed)
+makes it safe for several workers to hold the same grants.
+"""
+
+import heapq
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryQueue:
+    """Min-heap of (expires_at, key) with lazy invalidation of re-pushed or discarded keys."""
+
+    def __init__(self):
+        self._heap = []  # (expires_at, key)
+        self._entries = {}  # key -> current expires_at
+        self._lock = threading.Lock()
+
+    def push(self, key, expires_at: float) -> bool:
+        """Track key (replacing its previous expiry). Returns True if it is now the earliest."""
+        with self._lock:
+            self._entries[key] = expires_at
+            heapq.heappush(self._heap, (expires_at, key))
+            return self._heap[0] == (expires_at, key)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def pop_due(self, now: float, limit: int) -> list:
+        """Remove and return up to limit keys that expired at or before now."""
+        due = []
+        with self._lock:
+            while self._heap and len(due) < limit:
+                expires_at, key = self._heap[0]
+                if self._entries.get(key) != expires_at:
+                    heapq.heappop(self._heap)  # discarded or superseded
+                    continue
+                if expires_at > now:
+                    break
+                heapq.heappop(self._heap)
+                del self._entries[key]
+                due.append(key)
+        return due
+
+    def next_due(self):
+        """Earliest live expiry (epoch seconds), or None when empty."""
+        with self._lock:
+            while self._heap:
+                expires_at, key = self._heap[0]
+                if self._entries.get(key) == expires_at:
+                    return expires_at
+                heapq.heappop(self._heap)
+            return None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class GrantExpiry:
+    """Moves grants to 'expiring' when due and hands them to the revocation pass."""
+
+    def __init__(self, store, scheduler, on_expiring, job_name: str = 'grant-expiry',
+                 batch_size: int = 500, retry_seconds: float = 300):
+        """
+        store: GrantStore. scheduler: Scheduler that runs the expiry job.
+        on_expiring(): called after grants were marked 'expiring' (wakes provisioning).
+        retry_seconds: delay before retrying a grant whose revocation failed.
+        """
+        self.store = store
+        self.scheduler = scheduler
+        self.on_expiring = on_expiring
+        self.job_name = job_name
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        self.queue = ExpiryQueue()
+
+    def load(self) -> int:
+        """Track every active grant with an expiry in the database. Returns how many."""
+        entries = self.store.active_expiries()
+        self.track(entries)
+        logger.info(f"Grant expiry: tracking {len(entries)} active grants")
+        return len(entries)
+
+    def track(self, entries: list):
+        """Track [(grant key, expires_at epoch)]; re-arms the job if the earliest expiry moved up."""
+        earliest = False
+        for key, expires_at in entries:
+            earliest = self.queue.push(key, expires_at) or earliest
+        if earliest or (entries and not self.scheduler.has_job(self.job_name)):
+            self._arm()
+
+    def retry(self, keys: list):
+        """Revocation failed: try these grants again after retry_seconds (recorded in the database)."""
+        at = time.time() + self.retry_seconds
+        self.store.defer_expiry(keys, at)
+        self.track([(key, at) for key in keys])
+
+    def _next_due(self):
+        """Earliest expiry in the heap or the database, or None."""
+        due = [at for at in (self.queue.next_due(), self.store.next_expiry()) if at is not None]
+        return min(due) if due else None
+
+    def _arm(self):
+        next_due = self._next_due()
+        if next_due is None:
+            self.scheduler.cancel(self.job_name)
+        else:
+            self.scheduler.schedule(self.job_name, self._run, max(0.0, next_due - time.time()))
+
+    def _run(self):
+        """Scheduler job: expire what is due; returns the delay until the next expiry, or None."""
+        now = time.time()
+        marked = 0
+        while True:
+            due = self.queue.pop_due(now, self.batch_size)
+            if not due:
+                break
+            marked += self.store.mark_expiring(due)
+        # Grants this process never tracked (activated by another, possibly dead, worker)
+        while True:
+            due = self.store.due_expiries(self.batch_size)
+            if not due:
+                break
+            moved = self.store.mark_expiring(due)
+            marked += moved
+            if not moved:
+                break  # another worker took them
+        if marked:
+            logger.info(f"Grant expiry: {marked} grants expiring")
+            self.on_expiring()
+        next_due = self._next_due()
+        return None if next_due is None else max(0.0, next_due - time.time())
@@ -0,0 +1,198 @@
+"""
+Which organizations each person administers, from getOrganizationAdmins.
+
+MembershipIndex is an inverted index, admin email -> { org ID: Membership
+(orgAccess, networks, tags) }, that the My Access page reads once per
+request: for_email() is a dict lookup and never calls Meraki.
+
+MembershipCrawler keeps it current incrementally. Each run it takes the
+current organization list, forgets organizations that disappeared, and
+crawls only the organizations whose admins are missing or older than
+max_age, oldest first, at most batch_size per run (fetch_admins bounds
+the concurrency). A full pass over N organizations is therefore spread
+over N / batch_size runs instead of N calls at once. invalidate() moves an
+organization to the front of the queue, e.g. after a grant changed its
+admins.
+
+Each organization's contribution is replaced as a whole, and per-email dicts
+are replaced rather than mutated, so readers never see a half-applied
+update and need no lock. The index is per process.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+
+class Membership(namedtuple('Membership', ['org_access', 'networks', 'tags'])):
+    """One admin's privileges in one organization (Meraki orgAccess, network and tag privileges)."""
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        return {'access': self.org_access, 'networks': list(self.networks), 'tags': list(self.tags)}
+
+
+def _membership(admin: dict):
+    """Membership for an admin entry, or None if it grants nothing in the organization."""
+    org_access = admin.get('orgAccess') or 'none'
+    networks = tuple(
+        {'id': n.get('id'), 'access': n.get('access')} for n in admin.get('networks') or ()
+    )
+    tags = tuple({'tag': t.get('tag'), 'access': t.get('access')} for t in admin.get('tags') or ())
+    if org_access == 'none' and not networks and not tags:
+        return None
+    return Membership(org_access, networks, tags)
+
+
+class MembershipIndex:
+    """Admin email -> { org ID: Membership }, updated one organization at a time."""
+
+    def __init__(self):
+        self._by_email = {}  # email -> { org_id: Membership } (replaced, never mutated)
+        self._by_org = {}  # org_id -> emails with a membership there
+        self._crawled_at = {}  # org_id -> epoch of the last crawl attempt
+        self._lock = threading.Lock()
+        self.version = 0  # bumped on every change
+        self.ready = False  # True once every listed organization was crawled at least once
+
+    def for_email(self, email: str) -> dict:
+        """{ org ID: Membership } for email (read-only; empty if none)."""
+        return self._by_email.get((email or '').strip().lower(), {})
+
+    def update_org(self, org_id: str, admins: list, crawled_at: float = None) -> bool:
+        """Replace org_id's memberships with those in admins. Returns True if anything changed."""
+        memberships = {}
+        for admin in admins or ():
+            email = (admin.get('email') or '').strip().lower()
+            membership = _membership(admin) if email else None
+            if membership is not None:
+                memberships[email] = membership
+        with self._lock:
+            self._crawled_at[org_id] = time.time() if crawled_at is None else crawled_at
+            previous = self._by_org.get(org_id, frozenset())
+            changed = False
+            for email in previous - memberships.keys():
+                self._set(email, org_id, None)
+                changed = True
+            for email, membership in memberships.items():
+                if self._by_email.get(email, {}).get(org_id) != membership:
+                    self._set(email, org_id, membership)
+                    changed = True
+            self._by_org[org_id] = frozenset(memberships)
+            if changed:
+                self.version += 1
+            return changed
+
+    def retry_later(self, org_id: str, retry_at: float, max_age: float):
+        """A crawl of org_id failed: keep what it had and make it due again at retry_at."""
+        with self._lock:
+            self._crawled_at[org_id] = retry_at - max_age
+            self._by_org.setdefault(org_id, frozenset())
+
+    def retain(self, org_ids) -> int:
+        """Forget organizations not in org_ids. Returns how many were removed."""
+        keep = set(org_ids)
+        with self._lock:
+            gone = [org_id for org_id in self._crawled_at if org_id not in keep]
+            for org_id in gone:
+                for email in self._by_org.pop(org_id, ()):
+                    self._set(email, org_id, None)
+                del self._crawled_at[org_id]
+            if gone:
+                self.version += 1
+            return len(gone)
+
+    def invalidate(self, org_id: str):
+        """Crawl org_id again on the next run (its current memberships stay until then)."""
+        with self._lock:
+            if org_id in self._crawled_at:
+                self._crawled_at[org_id] = 0.0
+
+    def due(self, org_ids, max_age: float, limit: int, now: float = None) -> list:
+        """Up to limit of org_ids never crawled or crawled more than max_age ago, oldest first."""
+        cutoff = (time.time() if now is None else now) - max_age
+        with self._lock:
+            crawled_at = dict(self._crawled_at)
+        due = [org_id for org_id in org_ids if crawled_at.get(org_id, -1.0) <= cutoff]
+        due.sort(key=lambda org_id: crawled_at.get(org_id, -1.0))
+        return due[:limit]
+
+    def covers(self, org_ids) -> bool:
+        """True if every one of org_ids was crawled (or attempted) at least once."""
+        with self._lock:
+            return all(org_id in self._crawled_at for org_id in org_ids)
+
+    def next_due(self, max_age: float):
+        """Epoch when the oldest crawled organization is due again, or None when empty."""
+        with self._lock:
+            return min(self._crawled_at.values()) + max_age if self._crawled_at else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'organizations': len(self._crawled_at),
+                'admins': len(self._by_email),
+                'version': self.version,
+            }
+
+    def _set(self, email: str, org_id: str, membership):
+        """Copy-on-write update of one email's memberships (caller holds the lock)."""
+        orgs = dict(self._by_email.get(email, {}))
+        if membership is None:
+            orgs.pop(org_id, None)
+        else:
+            orgs[org_id] = membership
+        if orgs:
+            self._by_email[email] = orgs
+        else:
+            self._by_email.pop(email, None)
+
+
+class MembershipCrawler:
+    """Scheduler job that keeps a MembershipIndex current, a batch of organizations per run."""
+
+    def __init__(self, index: MembershipIndex, list_org_ids, fetch_admins, max_age: float = 3600,
+                 batch_size: int = 200, retry_seconds: float = 300, min_interval: float = 30):
+        """
+        list_org_ids(): current organization IDs. fetch_admins(org_ids): (results, errors)
+        keyed by org ID, results being getOrganizationAdmins lists.
+        """
+        self.index = index
+        self.list_org_ids = list_org_ids
+        self.fetch_admins = fetch_admins
+        self.max_age = max_age
+        self.batch_size = max(1, int(batch_size))
+        self.retry_seconds = retry_seconds
+        self.min_interval = min_interval
+
+    def run_once(self) -> float:
+        """Crawl the next batch of due organizations; returns seconds until the next run."""
+        org_ids = [str(org_id) for org_id in self.list_org_ids() if org_id]
+        removed = self.index.retain(org_ids)
+        due = self.index.due(org_ids, self.max_age, self.batch_size)
+        changed = 0
+        if due:
+            results, errors = self.fetch_admins(due)
+            for org_id, admins in results.items():
+                changed += self.index.update_org(org_id, admins)
+            retry_at = time.time() + self.retry_seconds
+            for org_id in errors:
+                self.index.retry_later(org_id, retry_at, self.max_age)
+            if errors:
+                logger.warning(f"Membership crawl: getOrganizationAdmins failed for {len(errors)} organizations "
+                               f"(retrying in {self.retry_seconds:.0f}s)")
+        if changed or removed:
+            logger.info(f"Membership index: {len(due)} organizations crawled, {changed} changed, {removed} removed")
+        if not self.index.ready and self.index.covers(org_ids):
+            self.index.ready = True
+            logger.info(f"Membership index ready: {self.index.stats()}")
+        if len(due) == self.batch_size:
+            return 0.0  # more organizations are due; continue right away
+        next_due = self.index.next_due(self.max_age)
+        if next_due is None:
+            return self.max_age
+        return max(next_due - time.time(), self.min_interval)
@@ -0,0 +1,207 @@
+"""
+Asyncio execution engine for Meraki Dashboard API calls.
+
+The sync SDK makes one call at a time, so anything that touches every
+organization (admins, networks, inventory) is serial. AsyncMerakiEngine runs
+meraki.aio.AsyncDashboardAPI clients on a dedicated event-loop thread and
+fans calls out over many organizations with bounded concurrency. Flask
+routes (and other sync code) call the blocking facade: fan_out(),
+map_organizations() and run(). Code on another event loop (the ASGI
+serving mode, asgi.py) awaits call_async() instead, so no thread waits on
+the upstream call.
+
+Clients are created lazily on the loop, one per API key hash, and reused.
+The loop thread is started per process, so an engine created before
+gunicorn forks works in each worker.
+
+Each client's HTTP session is wrapped so every request is timed into the
+Meraki metrics and, with a RateLimiter, waits for a token (at the priority
+of the sync caller that started the fan-out); 429 Retry-After responses
+pause the bucket for all callers.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from services.metrics import observe_meraki
+from services.rate_limit import current_priority, org_id_from_url, parse_retry_after, request_priority
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMerakiEngine:
+    """Background event loop running meraki.aio calls for sync callers."""
+
+    def __init__(self, base_url: str = None, max_concurrency: int = 10,
+                 request_timeout: float = 30, maximum_retries: int = 2, limiter=None):
+        self.base_url = base_url
+        self.limiter = limiter
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.request_timeout = request_timeout
+        self.maximum_retries = maximum_retries
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._clients = {}  # api key hash -> AsyncDashboardAPI (loop thread only)
+        self._lock = threading.Lock()
+
+    # ---- sync facade ----
+
+    def run(self, coro, timeout: float = None):
+        """Run a coroutine on the engine loop and block until it finishes."""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def fan_out(self, api_key: str, call, items, concurrency: int = None, timeout: float = None):
+        """
+        Run `await call(dashboard, item)` for every item with at most `concurrency`
+        in flight. Returns (results, errors): dicts keyed by item.
+        """
+        return self.run(
+            self.fan_out_async(api_key, call, items, concurrency, priority=current_priority()), timeout
+        )
+
+    def map_organizations(self, api_key: str, operation: str, org_ids, concurrency: int = None,
+                          timeout: float = None, **kwargs):
+        """
+        Call an SDK operation such as 'organizations.getOrganizationAdmins' once per
+        org ID (passed as the first argument, kwargs forwarded). Returns (results, errors).
+        """
+        section, method = operation.split('.', 1)
+
+        async def call(dashboard, org_id):
+            return await getattr(getattr(dashboard, section), method)(org_id, **kwargs)
+
+        return self.fan_out(api_key, call, org_ids, concurrency, timeout)
+
+    def close(self):
+        """Close all clients and stop the loop thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = None
+            self._thread = None
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_clients(), loop).result(5)
+        except Exception as e:
+            logger.debug(f"Error closing async Meraki clients: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+    # ---- awaitable facade (from another event loop) ----
+
+    async def call_async(self, api_key: str, operation: str, *args, **kwargs):
+        """
+        Await one SDK operation such as 'organizations.getOrganizations'; the call
+        runs on the engine loop and the caller's loop stays free meanwhile.
+        """
+        section, method = operation.split('.', 1)
+
+        async def call():
+            return await getattr(getattr(self._client(api_key), section), method)(*args, **kwargs)
+
+        loop = self._ensure_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(call(), loop))
+
+    # ---- coroutine API (on the engine loop) ----
+
+    async def fan_out_async(self, api_key: str, call, items, concurrency: int = None, priority: int = None):
+        if priority is not None:
+            # Tasks run in their own context copy, so this only affects this fan-out
+            with request_priority(priority):
+                return await self.fan_out_async(api_key, call, items, concurrency)
+        dashboard = self._client(api_key)
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrency)
+        results, errors = {}, {}
+
+        async def one(item):
+            async with semaphore:
+                try:
+                    results[item] = await call(dashboard, item)
+                except Exception as e:
+                    errors[item] = e
+
+        await asyncio.gather(*(one(item) for item in items))
+        return results, errors
+
+    def _client(self, api_key: str):
+        """AsyncDashboardAPI for api_key; must be called on the engine loop."""
+        key = hashlib.sha256(api_key.encode()).hexdigest()[:32]
+        client = self._clients.get(key)
+        if client is None:
+            from meraki.aio import AsyncDashboardAPI
+            kwargs = {}
+            if self.base_url:
+                kwargs['base_url'] = self.base_url
+            client = AsyncDashboardAPI(
+                api_key=api_key,
+                suppress_logging=True,
+                single_request_timeout=self.request_timeout,
+                maximum_retries=self.maximum_retries,
+                maximum_concurrent_requests=self.max_concurrency,
+                **kwargs,
+            )
+            client._session._req_session = _MeteredSession(client._session._req_session, key, self.limiter)
+            self._clients[key] = client
+        return client
+
+    async def _close_clients(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client._session.close()
+
+    # ---- loop management ----
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+            # First use in this process (or after fork): fresh loop, no inherited clients
+            self._clients = {}
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=self._run_loop, args=(loop,), name='meraki-async', daemon=True)
+            thread.start()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            return loop
+
+    @staticmethod
+    def _run_loop(loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+
+class _MeteredSession:
+    """aiohttp ClientSession wrapper: requests timed into metrics; with a limiter, one token each and 429s reported."""
+
+    def __init__(self, session, key: str, limiter=None):
+        self._session = session
+        self._limiter = limiter
+        self._key = key
+
+    async def request(self, method, url, **kwargs):
+        org_id = org_id_from_url(str(url))
+        if self._limiter is not None:
+            await self._limiter.acquire_async(self._key, org_id)
+        start = time.perf_counter()
+        try:
+            response = await self._session.request(method, url, **kwargs)
+        except Exception as e:
+            observe_meraki(method, url, time.perf_counter() - start, error=e)
+            raise
+        observe_meraki(method, url, time.perf_counter() - start, response.status)
+        if response.status == 429 and self._limiter is not None:
+            self._limiter.retry_after(self._key, org_id, parse_retry_after(response.headers.get('Retry-After')))
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
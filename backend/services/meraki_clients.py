@@ -0,0 +1,184 @@
+"""
+Pool of long-lived Meraki DashboardAPI clients.
+
+Building a DashboardAPI creates a new requests session (and therefore new
+TCP/TLS connections) plus SDK logger setup. The pool keeps one client per
+API key, keyed by the same hash the caches use, so repeated calls reuse
+keep-alive connections. The pool is bounded (LRU) and drops clients that
+have been idle longer than idle_timeout. requests sessions are safe to share
+between threads for plain request/response calls, which is all the SDK does.
+
+After a fork the pool starts empty in the child instead of sharing sockets
+with the parent.
+
+Every HTTP request a pooled client sends is timed into the Meraki metrics
+(InstrumentedAdapter). With a RateLimiter, it first takes a token for its
+API key and organization (RateLimitedAdapter), and 429 Retry-After
+responses pause that bucket for all callers.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.metrics import observe_meraki
+from services.rate_limit import RateLimitTimeout, org_id_from_url, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardClientPool:
+    """Thread-safe, bounded, idle-evicting pool of clients keyed by API key hash."""
+
+    def __init__(self, factory, max_clients: int = 16, idle_timeout: float = 600,
+                 connections_per_client: int = 10, limiter=None):
+        """
+        factory(api_key) builds a new client. connections_per_client sizes the
+        keep-alive pool of each client's HTTP session. limiter: optional
+        RateLimiter metering each client's requests under its key.
+        """
+        self.factory = factory
+        self.limiter = limiter
+        self.max_clients = max(1, int(max_clients))
+        self.idle_timeout = idle_timeout
+        self.connections_per_client = connections_per_client
+        self._clients = OrderedDict()  # key -> [client, last_used]
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def get(self, key: str, api_key: str):
+        """Return the pooled client for key, creating it on first use."""
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            if self._pid != os.getpid():
+                self._clients = OrderedDict()
+                self._pid = os.getpid()
+            slot = self._clients.get(key)
+            if slot is not None:
+                slot[1] = now
+                self._clients.move_to_end(key)
+                client = slot[0]
+            else:
+                client = None
+            evicted.extend(self._evict_idle(now))
+        if client is None:
+            # Build outside the lock; a racing thread may build one too, first one wins
+            new_client = self._build(key, api_key)
+            with self._lock:
+                slot = self._clients.get(key)
+                if slot is None:
+                    self._clients[key] = [new_client, now]
+                    client = new_client
+                    while len(self._clients) > self.max_clients:
+                        evicted.append(self._clients.popitem(last=False)[1][0])
+                else:
+                    client = slot[0]
+                    evicted.append(new_client)
+        for old in evicted:
+            _close_client(old)
+        return client
+
+    def discard(self, key: str):
+        """Drop and close the client for key (e.g. after its key was rotated)."""
+        with self._lock:
+            slot = self._clients.pop(key, None)
+        if slot is not None:
+            _close_client(slot[0])
+
+    def clear(self):
+        with self._lock:
+            clients = [slot[0] for slot in self._clients.values()]
+            self._clients.clear()
+        for client in clients:
+            _close_client(client)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+    def _evict_idle(self, now: float) -> list:
+        """Remove clients idle longer than idle_timeout. Caller holds the lock."""
+        evicted = []
+        for key in list(self._clients):
+            client, last_used = self._clients[key]
+            if now - last_used <= self.idle_timeout:
+                break  # OrderedDict is in LRU order; the rest are newer
+            del self._clients[key]
+            evicted.append(client)
+        return evicted
+
+    def _build(self, key: str, api_key: str):
+        client = self.factory(api_key)
+        session = _http_session(client)
+        if session is not None:
+            if self.limiter is not None:
+                adapter = RateLimitedAdapter(
+                    self.limiter, key,
+                    pool_connections=1,
+                    pool_maxsize=self.connections_per_client,
+                )
+            else:
+                adapter = InstrumentedAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.connections_per_client,
+                )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        return client
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """HTTPAdapter that records each request's latency and failures in the Meraki metrics."""
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception as e:
+            observe_meraki(request.method, request.url, time.perf_counter() - start, error=e)
+            raise
+        observe_meraki(request.method, request.url, time.perf_counter() - start, response.status_code)
+        return response
+
+
+class RateLimitedAdapter(InstrumentedAdapter):
+    """InstrumentedAdapter that takes a rate-limit token before each request and reports 429s."""
+
+    def __init__(self, limiter, key: str, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+        self.key = key
+
+    def send(self, request, **kwargs):
+        org_id = org_id_from_url(request.url)
+        try:
+            self.limiter.acquire(self.key, org_id)
+        except RateLimitTimeout as e:
+            # A RequestException, so the SDK treats it like any other transport error
+            raise requests.exceptions.ConnectionError(str(e), request=request)
+        response = super().send(request, **kwargs)
+        if response.status_code == 429:
+            self.limiter.retry_after(self.key, org_id, parse_retry_after(response.headers.get('Retry-After')))
+        return response
+
+
+def _http_session(client):
+    """The requests.Session inside a DashboardAPI client, if it has one."""
+    rest_session = getattr(client, '_session', None)
+    return getattr(rest_session, '_req_session', None)
+
+
+def _close_client(client):
+    session = _http_session(client)
+    if session is None:
+        return
+    try:
+        session.close()
+    except Exception as e:
+        logger.debug(f"Error closing Meraki client session: {e}")
@@ -0,0 +1,134 @@
+"""
+Prometheus metrics.
+
+Hot paths record into the metrics below; GET /metrics (routes/metrics.py)
+exposes them in the Prometheus text format:
+
+- http_request_duration_seconds{method, route, status}: every Flask request
+  (route is the URL rule, e.g. /api/access-requests/<request_id>);
+- organizations_cache_requests_total{result}: hit, stale, miss, or
+  fallback (last good list served because the upstream call failed or its
+  circuit is open);
+- circuit_transitions_total{breaker, state}: circuit breakers
+  (services/circuit_breaker.py) opening, probing (half-open) and closing;
+- meraki_request_duration_seconds{method, endpoint} and
+  meraki_request_errors_total{method, endpoint, reason}: every outbound
+  Dashboard API call, sync pool and async engine alike (IDs in the path
+  collapsed to {id});
+- jwt_verification_seconds{outcome}: Bearer token checks (cached, valid,
+  expired, invalid);
+- saml_acs_seconds{outcome}: ACS processing (success, rejected, error);
+- one_time_codes: codes waiting to be exchanged;
+- audit_events_total{result} (written, dropped, failed), audit_queue_depth
+  and audit_flush_seconds: the audit log's writer (services/audit.py).
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty directory before
+the app starts: every worker then writes its samples there and /metrics on
+any worker aggregates them all. Call mark_worker_dead(pid) from gunicorn's
+child_exit hook so live gauges drop exited workers.
+"""
+
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+# Request latencies: sub-millisecond cache hits up to slow upstream calls
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[^/]+$')
+_API_PREFIX = re.compile(r'^.*?/api/v\d+')
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Flask request latency', ('method', 'route', 'status'),
+    buckets=_LATENCY_BUCKETS,
+)
+ORGANIZATIONS_CACHE_REQUESTS = Counter(
+    'organizations_cache_requests', 'Organization list lookups by cache result (hit, stale, miss, fallback)',
+    ('result',),
+)
+CIRCUIT_TRANSITIONS = Counter(
+    'circuit_transitions', 'Circuit breaker state changes (open, half-open, closed)', ('breaker', 'state'),
+)
+MERAKI_REQUEST_SECONDS = Histogram(
+    'meraki_request_duration_seconds', 'Outbound Meraki Dashboard API call latency', ('method', 'endpoint'),
+    buckets=_LATENCY_BUCKETS,
+)
+MERAKI_REQUEST_ERRORS = Counter(
+    'meraki_request_errors', 'Failed Meraki Dashboard API calls (HTTP status or exception)',
+    ('method', 'endpoint', 'reason'),
+)
+JWT_VERIFICATION_SECONDS = Histogram(
+    'jwt_verification_seconds', 'Bearer token verification time', ('outcome',),
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01),
+)
+SAML_ACS_SECONDS = Histogram(
+    'saml_acs_seconds', 'SAML ACS processing time', ('outcome',), buckets=_LATENCY_BUCKETS,
+)
+# Memory stores are per worker (sum them); a Redis store is shared (the latest count wins)
+ONE_TIME_CODES = Gauge(
+    'one_time_codes', 'One-time login codes waiting to be exchanged',
+    multiprocess_mode='livemostrecent' if os.getenv('ONE_TIME_CODE_BACKEND', 'memory').lower() == 'redis'
+    else 'livesum',
+)
+AUDIT_EVENTS = Counter(
+    'audit_events', 'Audit events by result (written, dropped when the queue is full, failed)', ('result',),
+)
+AUDIT_QUEUE_DEPTH = Gauge('audit_queue_depth', 'Audit events waiting for the writer', multiprocess_mode='livesum')
+AUDIT_FLUSH_SECONDS = Histogram('audit_flush_seconds', 'Audit batch write time', buckets=_LATENCY_BUCKETS)
+
+
+def meraki_endpoint(url: str) -> str:
+    """Dashboard API URL -> low-cardinality endpoint label ('/organizations/{id}/admins')."""
+    path = _API_PREFIX.sub('', str(url).split('?', 1)[0], count=1)
+    return '/'.join('{id}' if _ID_SEGMENT.match(segment) else segment for segment in path.split('/')) or '/'
+
+
+def observe_meraki(method: str, url: str, seconds: float, status: int = None, error: BaseException = None):
+    """Record one Meraki call: latency, plus an error sample for exceptions and 4xx/5xx."""
+    endpoint = meraki_endpoint(url)
+    method = (method or 'GET').upper()
+    MERAKI_REQUEST_SECONDS.labels(method, endpoint).observe(seconds)
+    if error is not None:
+        MERAKI_REQUEST_ERRORS.labels(method, endpoint, type(error).__name__).inc()
+    elif status is not None and status >= 400:
+        MERAKI_REQUEST_ERRORS.labels(method, endpoint, str(status)).inc()
+
+
+@contextmanager
+def timed(histogram, outcome: dict):
+    """
+    Observe the block's duration on histogram, labelled with outcome['outcome']
+    (set it inside the block; 'error' if the block raises).
+    """
+    start = time.perf_counter()
+    try:
+        yield outcome
+    except BaseException:
+        outcome['outcome'] = 'error'
+        raise
+    finally:
+        histogram.labels(outcome.get('outcome', 'error')).observe(time.perf_counter() - start)
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def render():
+    """(body, content type) for a scrape: all workers' samples in multiprocess mode, else this process."""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid: int):
+    """gunicorn child_exit hook: drop an exited worker's live gauge samples."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid)
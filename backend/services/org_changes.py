@@ -0,0 +1,121 @@
+"""
+What changed between two fetches of an organization list.
+
+merge_organizations() maps a freshly fetched getOrganizations result onto
+the cached { id, name, link } list. Unchanged organizations keep their
+existing dicts, and only added or changed ones get new dicts. When nothing
+changed at all, it returns the cached list object itself. That includes the
+same organizations arriving in a different order, which is not a change. Everything keyed
+on that object then stays valid: the search index, the serialized payload
+and the per-user views.
+
+The resulting OrganizationsDiff (added, removed, renamed, relinked) goes to
+a ChangeFeed. Other components subscribe to the feed instead of re-reading
+whole lists on every refresh, or poll the recent diffs with since().
+"""
+
+import logging
+import threading
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+
+class OrganizationsDiff(namedtuple('OrganizationsDiff', [
+    'cache_key', 'added', 'removed', 'renamed', 'relinked', 'count', 'initial',
+])):
+    """
+    One refresh of the list cached under cache_key. added/removed are org dicts;
+    renamed/relinked are (old, new) pairs. initial: there was no previous list.
+    """
+    __slots__ = ()
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.renamed or self.relinked)
+
+    def summary(self, max_ids: int = 100) -> dict:
+        """Counts and (up to max_ids each) organization IDs, for logs and events."""
+        def ids(orgs):
+            return [org['id'] for org in orgs[:max_ids]]
+        return {
+            'added': ids(self.added),
+            'removed': ids(self.removed),
+            'renamed': ids([new for _, new in self.renamed]),
+            'relinked': ids([new for _, new in self.relinked]),
+            'truncated': max(len(self.added), len(self.removed), len(self.renamed), len(self.relinked)) > max_ids,
+        }
+
+
+def merge_organizations(cache_key: str, previous: list, raw: list, entry):
+    """
+    (orgs, diff) for the raw getOrganizations result against the previous list
+    (None if nothing was cached). entry(org) -> (id, name, link) for one raw org.
+    """
+    old_by_id = {org['id']: org for org in previous or ()}
+    orgs, added, renamed, relinked = [], [], [], []
+    for raw_org in raw:
+        org_id, name, link = entry(raw_org)
+        old = old_by_id.get(org_id)
+        if old is not None and old['name'] == name and old['link'] == link:
+            orgs.append(old)
+            continue
+        org = {'id': org_id, 'name': name, 'link': link}
+        orgs.append(org)
+        if old is None:
+            added.append(org)
+        elif old['name'] != name:
+            renamed.append((old, org))
+        else:
+            relinked.append((old, org))
+    seen = {org['id'] for org in orgs}
+    removed = [org for org in previous or () if org['id'] not in seen]
+    if previous is not None and not (added or removed or renamed or relinked):
+        # Same organizations (in any order): keep the object everything downstream is keyed on
+        orgs = previous
+    diff = OrganizationsDiff(cache_key, added, removed, renamed, relinked, len(orgs), previous is None)
+    return orgs, diff
+
+
+class ChangeFeed:
+    """In-process publish/subscribe of OrganizationsDiff, keeping the last `keep` for since()."""
+
+    def __init__(self, keep: int = 100):
+        self._subscribers = []
+        self._history = deque(maxlen=max(1, int(keep)))  # (seq, diff)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, fn):
+        """Call fn(diff) for every published diff (usable as a decorator)."""
+        with self._lock:
+            if fn not in self._subscribers:
+                self._subscribers = self._subscribers + [fn]
+        return fn
+
+    def unsubscribe(self, fn):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not fn]
+
+    def publish(self, diff: OrganizationsDiff) -> int:
+        """Record diff and call every subscriber (errors are logged, not raised). Returns its seq."""
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self._history.append((seq, diff))
+            subscribers = self._subscribers
+        for fn in subscribers:
+            try:
+                fn(diff)
+            except Exception:
+                logger.exception(f"Organizations change subscriber {getattr(fn, '__name__', fn)} failed")
+        return seq
+
+    def since(self, seq: int = 0) -> list:
+        """[(seq, diff)] published after seq that are still kept, oldest first."""
+        with self._lock:
+            return [(s, diff) for s, diff in self._history if s > seq]
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
@@ -0,0 +1,122 @@
+"""
+In-memory search index over one organizations list.
+
+Built once per cached list (rebuilt when the cache refreshes) so the
+organizations endpoints can page, search and sort on the server without
+re-scanning or re-sorting the whole list per request:
+
+- precomputed orderings by name and by id (both directions via reversal)
+- sorted lowercase names for prefix search (bisect)
+- trigram postings over "name id" for substring search; queries shorter
+  than three characters fall back to a scan of the precomputed haystacks
+- lookup by organization ID
+
+The index is read-only after construction and safe to share between threads.
+"""
+
+import base64
+import binascii
+from bisect import bisect_left
+
+SORT_KEYS = ('name', '-name', 'id', '-id')
+MATCH_MODES = ('contains', 'prefix')
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """Offset encoded in cursor; raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        offset = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class OrganizationIndex:
+    """Prefix/substring search and sorted pagination over a list of { id, name, link }."""
+
+    def __init__(self, orgs: list):
+        self.orgs = orgs
+        names = [(org.get('name') or '').lower() for org in orgs]
+        ids = [str(org.get('id') or '').lower() for org in orgs]
+        # Positions into orgs, in each sort order
+        by_name = sorted(range(len(orgs)), key=lambda i: (names[i], ids[i]))
+        by_id = sorted(range(len(orgs)), key=lambda i: ids[i])
+        self._order = {'name': by_name, 'id': by_id}
+        self._rank = {
+            key: {pos: rank for rank, pos in enumerate(order)}
+            for key, order in self._order.items()
+        }
+        # Prefix search on names
+        self._sorted_names = [names[i] for i in by_name]
+        # Substring search on "name id"
+        self._haystacks = [f"{names[i]}\x00{ids[i]}" for i in range(len(orgs))]
+        postings = {}
+        for pos, haystack in enumerate(self._haystacks):
+            for gram in _trigrams(haystack):
+                postings.setdefault(gram, []).append(pos)
+        self._postings = postings
+        self._by_id = {str(org.get('id') or ''): org for org in orgs}
+
+    def __len__(self):
+        return len(self.orgs)
+
+    def get(self, org_id: str):
+        """The organization with this ID, or None."""
+        return self._by_id.get(str(org_id))
+
+    def _contains(self, q: str):
+        """Positions whose name or id contains q."""
+        if len(q) < 3:
+            return [pos for pos, haystack in enumerate(self._haystacks) if q in haystack]
+        grams = sorted(_trigrams(q), key=lambda g: len(self._postings.get(g, ())))
+        candidates = set(self._postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(self._postings.get(gram, ()))
+        return [pos for pos in candidates if q in self._haystacks[pos]]
+
+    def _prefix(self, q: str):
+        """Positions whose name starts with q (already in name order)."""
+        start = bisect_left(self._sorted_names, q)
+        order = self._order['name']
+        result = []
+        for rank in range(start, len(order)):
+            if not self._sorted_names[rank].startswith(q):
+                break
+            result.append(order[rank])
+        return result
+
+    def search(self, q: str = '', match: str = 'contains', sort: str = 'name',
+               offset: int = 0, limit: int = None):
+        """
+        Return (items, total, next_offset). next_offset is None on the last page.
+        sort is one of SORT_KEYS; match is one of MATCH_MODES.
+        """
+        field = sort.lstrip('-')
+        descending = sort.startswith('-')
+        q = (q or '').strip().lower()
+        if not q:
+            positions = self._order[field]
+        else:
+            positions = self._prefix(q) if match == 'prefix' else self._contains(q)
+            rank = self._rank[field]
+            positions = sorted(positions, key=rank.__getitem__)
+        total = len(positions)
+        end = total if limit is None else min(total, offset + limit)
+        if descending:
+            items = [self.orgs[positions[total - 1 - i]] for i in range(offset, end)]
+        else:
+            items = [self.orgs[pos] for pos in positions[offset:end]]
+        return items, total, (end if end < total else None)
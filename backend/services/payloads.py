@@ -0,0 +1,76 @@
+"""
+Precomputed JSON response payloads.
+
+PreparedPayload serializes a value once and keeps the JSON bytes, a
+content-hash ETag and gzip/brotli variants, so hot endpoints serving cached
+data answer conditional requests with 304 and send pre-compressed bytes
+without re-running jsonify or compressing per request.
+
+Brotli is optional: install `Brotli` (or `brotlicffi`) to enable the br
+variant; without it only gzip and identity are offered.
+"""
+
+import gzip
+import hashlib
+import json
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 9
+
+
+class PreparedPayload:
+    """Serialized JSON body plus ETag and compressed variants, built once."""
+
+    __slots__ = ('body', 'etag', 'encodings')
+
+    def __init__(self, data):
+        # Same shape as Flask's jsonify (sorted keys, compact, trailing newline)
+        self.body = (json.dumps(data, separators=(',', ':'), sort_keys=True) + '\n').encode()
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.encodings = {}
+        if len(self.body) >= MIN_COMPRESS_BYTES:
+            self.encodings['gzip'] = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.encodings['br'] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+
+    def _choose_encoding(self, accept_encodings):
+        """Best available encoding the client accepts (br > gzip), or None for identity."""
+        best, best_quality = None, 0
+        for encoding in ('br', 'gzip'):
+            if encoding not in self.encodings:
+                continue
+            quality = accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def response(self, request) -> Response:
+        """
+        Response for request: 304 when If-None-Match matches the ETag, else the
+        body in the best accepted encoding. Clients must revalidate (no-cache).
+        """
+        if request.if_none_match.contains_weak(self.etag):
+            response = Response(status=304)
+        else:
+            encoding = self._choose_encoding(request.accept_encodings)
+            body = self.encodings[encoding] if encoding else self.body
+            response = Response(body, mimetype='application/json')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(self.etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        if self.encodings:
+            response.vary.add('Accept-Encoding')
+        return response
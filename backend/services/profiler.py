@@ -0,0 +1,170 @@
+"""
+Sampling profiler for live requests.
+
+A request being profiled registers its thread with SamplingProfiler; one
+daemon thread wakes every interval while any request is registered, reads
+that thread's current frame (sys._current_frames) and counts the stack.
+Nothing is hooked into the interpreter, so unprofiled requests pay nothing
+and profiled ones pay roughly one stack walk per interval.
+
+Finished profiles go into a bounded ring buffer (the oldest is dropped) and
+render as collapsed stacks, one "frame;frame;frame count" line per distinct
+stack, which flamegraph.pl, speedscope and inferno read directly. Frames are
+named module:qualname.
+
+The sampler thread is (re)started lazily per process, so a profiler created
+before gunicorn forks keeps working in each worker; each worker keeps its own
+ring buffer.
+"""
+
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def collapse_stack(frame) -> str:
+    """Root-first 'module:func;module:func' for frame and its callers."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def collapsed_text(stacks: Counter) -> str:
+    """Collapsed-stack file contents (flamegraph input), heaviest stacks first."""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def merge_stacks(profiles) -> Counter:
+    """Stack counts summed over profiles (one flamegraph for many requests)."""
+    total = Counter()
+    for profile in profiles:
+        total.update(profile.stacks)
+    return total
+
+
+class Profile:
+    """One finished request profile: metadata plus sampled stack counts."""
+
+    def __init__(self, profile_id: str, stacks: Counter, started_at: float, duration: float, meta: dict):
+        self.id = profile_id
+        self.stacks = stacks
+        self.started_at = started_at
+        self.duration = duration
+        self.meta = meta
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def summary(self) -> dict:
+        return {
+            'id': self.id,
+            'startedAt': self.started_at,
+            'durationMs': round(self.duration * 1000, 3),
+            'samples': self.samples,
+            **self.meta,
+        }
+
+    def collapsed(self) -> str:
+        return collapsed_text(self.stacks)
+
+
+class _Active:
+    __slots__ = ('thread_id', 'stacks', 'started_at', 'started')
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+
+
+class SamplingProfiler:
+    """Sample registered threads' stacks every interval; keep the last `keep` profiles."""
+
+    def __init__(self, interval: float = 0.01, keep: int = 50, max_stacks: int = 5000):
+        self.interval = max(0.001, float(interval))
+        self.max_stacks = max_stacks
+        self._profiles = deque(maxlen=max(1, int(keep)))
+        self._active = {}  # handle -> _Active
+        self._handles = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def start(self) -> int:
+        """Start profiling the calling thread; returns a handle for stop()/discard()."""
+        with self._cond:
+            handle = next(self._handles)
+            self._active[handle] = _Active(threading.get_ident())
+            self._cond.notify_all()
+        self._ensure_started()
+        return handle
+
+    def stop(self, handle: int, **meta):
+        """Finish a profile and keep it in the ring buffer; returns the Profile (None if unknown)."""
+        with self._cond:
+            active = self._active.pop(handle, None)
+            if active is None:
+                return None
+            profile = Profile(
+                f"{os.getpid()}-{next(self._ids)}", active.stacks, active.started_at,
+                time.perf_counter() - active.started, meta,
+            )
+            self._profiles.append(profile)
+        return profile
+
+    def discard(self, handle: int):
+        """Stop without keeping the profile (request failed before it could be stopped)."""
+        with self._cond:
+            self._active.pop(handle, None)
+
+    def profiles(self) -> list:
+        """Kept profiles, newest first."""
+        with self._cond:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: str):
+        with self._cond:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._cond:
+                while not self._active:
+                    self._cond.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._cond:
+                for active in self._active.values():
+                    frame = frames.get(active.thread_id)
+                    if frame is None or active.thread_id == own:
+                        continue
+                    stack = collapse_stack(frame)
+                    # Bound memory for pathological recursion / very long requests
+                    if stack in active.stacks or len(active.stacks) < self.max_stacks:
+                        active.stacks[stack] += 1
+            del frames
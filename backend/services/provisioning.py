@@ -0,0 +1,569 @@
+"""
+JIT grant provisioning through Meraki action batches.
+
+Approving an access request item queues a grant (one admin, one
+organization, read-only or full access). ProvisioningPipeline.run_once():
+
+1. claims queued grants and groups them by organization;
+2. lists each organization's admins once, so a grant becomes a 'create'
+   (new admin), an 'update' (raise an existing admin's orgAccess) or nothing
+   (already has at least that access);
+3. submits one asynchronous action batch per organization (chunks of
+   MAX_ACTIONS_PER_BATCH), all organizations concurrently;
+4. polls in-flight batches, again concurrently, and records each grant as
+   active (with the admin ID and an expiry time) or failed (with the batch
+   errors).
+
+Revocation runs through the same machinery: grants the expiry engine marks
+'expiring' are undone per organization in action batches (destroy an admin
+we created, restore the orgAccess we raised, nothing for admins that already
+had the access) and end up 'expired'; a failed revocation returns the grant
+to 'active' and is retried.
+
+One admin can hold several grants on an organization (overlapping
+requests). A grant is not planned while another grant for the same admin has
+a batch in flight, and the admin is only removed or restored once none of its
+grants is still active; until then the revert passes to a surviving grant.
+
+So approving N items across M organizations costs about 2*M concurrent calls
+plus a few polls, instead of N sequential admin calls. Meraki applies an
+action batch atomically: one bad action fails every grant in that batch.
+
+Grant state lives in SQLite next to the access requests (access_grants),
+so provisioning resumes after a restart, and claiming is transactional so
+several workers never submit the same grant twice.
+"""
+
+import logging
+import time
+
+from services.access_requests import parse_utc_iso, utc_iso, utc_now_iso
+from services.database import Database
+
+logger = logging.getLogger(__name__)
+
+# Request permission -> Meraki admin orgAccess
+ORG_ACCESS = {'read': 'read-only', 'write': 'full'}
+_ACCESS_RANK = {'none': 0, 'read-only': 1, 'full': 2}
+GRANT_STATUSES = (
+    'queued', 'submitting', 'submitted', 'active', 'failed',
+    'expiring', 'revoking', 'revoke_submitted', 'expired',
+)
+# Statuses that still need a pipeline pass
+_WORK_STATUSES = ('queued', 'submitting', 'submitted', 'expiring', 'revoking', 'revoke_submitted')
+# Meraki accepts at most 100 actions per asynchronous action batch
+MAX_ACTIONS_PER_BATCH = 100
+# Stay under SQLite's bound-parameter limit in IN (...) lists
+_MAX_QUERY_ORGS = 500
+# Another grant for the same admin in these statuses has an action batch in flight
+_IN_FLIGHT_STATUSES = ('submitted', 'revoking', 'revoke_submitted')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS access_grants (
+    request_num INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    org_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    name TEXT,
+    org_access TEXT NOT NULL,
+    status TEXT NOT NULL,
+    action TEXT,
+    action_index INTEGER,
+    batch_id TEXT,
+    admin_id TEXT,
+    previous_access TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (request_num, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_access_grants_status ON access_grants (status, org_id);
+CREATE INDEX IF NOT EXISTS idx_access_grants_batch ON access_grants (org_id, batch_id);
+"""
+# Columns added after the table first shipped
+_ADDED_COLUMNS = {'expires_at': 'TEXT'}
+# Indexes on added columns (created once the columns exist). The expiry engine
+# reads active grants in expiry order: due_expiries, next_expiry, active_expiries.
+_ADDED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_access_grants_expiry ON access_grants (status, expires_at);
+"""
+
+_UPDATABLE_COLUMNS = (
+    'action', 'action_index', 'batch_id', 'admin_id', 'previous_access', 'error', 'expires_at',
+)
+
+
+def grant_key(grant) -> tuple:
+    return (grant['request_num'], grant['position'])
+
+
+class GrantStore:
+    """access_grants rows, keyed by (request_num, position) of the access request item."""
+
+    def __init__(self, db: Database):
+        self.db = db
+        db.ensure_schema(_SCHEMA)
+        db.ensure_columns('access_grants', _ADDED_COLUMNS)
+        db.ensure_schema(_ADDED_INDEXES)
+
+    def enqueue(self, grants: list) -> int:
+        """
+        Queue grants: dicts with request_num, position, org_id, email, name, permission.
+        Items that already have a grant are left alone. Returns the number queued.
+        """
+        now = utc_now_iso()
+        with self.db.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO access_grants "
+                "(request_num, position, org_id, email, name, org_access, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?)",
+                [
+                    (g['request_num'], g['position'], g['org_id'], g['email'], g.get('name'),
+                     ORG_ACCESS.get(g.get('permission'), 'read-only'), now, now)
+                    for g in grants
+                ],
+            )
+            return conn.total_changes - before
+
+    def claim(self, from_status: str, to_status: str, limit: int = 1000) -> list:
+        """Move up to limit grants from from_status to to_status and return them (one claimer wins)."""
+        with self.db.transaction() as conn:
+            rows = conn.execute(
+                "SELECT * FROM access_grants WHERE status = ? ORDER BY org_id LIMIT ?", (from_status, limit)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE access_grants SET status = ?, updated_at = ? "
+                    "WHERE request_num = ? AND position = ?",
+                    [(to_status, utc_now_iso(), r['request_num'], r['position']) for r in rows],
+                )
+        return [{**dict(r), 'status': to_status} for r in rows]
+
+    def requeue_stale(self, older_than: float):
+        """Return grants stuck mid-claim (claimer died) to the state before the claim."""
+        cutoff = utc_iso(time.time() - older_than)
+        with self.db.transaction() as conn:
+            for claimed, previous in (('submitting', 'queued'), ('revoking', 'expiring')):
+                conn.execute(
+                    "UPDATE access_grants SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+                    (previous, utc_now_iso(), claimed, cutoff),
+                )
+
+    def update(self, changes: list) -> list:
+        """
+        Apply [(grant, status, {column: value})] in one transaction. Each change
+        only applies if the grant is still in the status it was read in
+        (grant['status']), so when several workers poll the same batch only one
+        moves it on. Returns the changes that applied.
+        """
+        now = utc_now_iso()
+        applied = []
+        with self.db.transaction() as conn:
+            for change in changes:
+                grant, status, fields = change
+                columns = [c for c in fields if c in _UPDATABLE_COLUMNS]
+                assignments = ''.join(f", {c} = ?" for c in columns)
+                cursor = conn.execute(
+                    f"UPDATE access_grants SET status = ?, updated_at = ?{assignments} "
+                    "WHERE request_num = ? AND position = ? AND status = ?",
+                    (status, now, *(fields[c] for c in columns), grant['request_num'], grant['position'],
+                     grant['status']),
+                )
+                if cursor.rowcount == 1:
+                    applied.append(change)
+        return applied
+
+    def in_flight(self, status: str = 'submitted') -> dict:
+        """Grants in status grouped by (org_id, batch_id), in action order."""
+        batches = {}
+        for row in self.db.connection().execute(
+            "SELECT * FROM access_grants WHERE status = ? ORDER BY org_id, batch_id, action_index", (status,)
+        ):
+            batches.setdefault((row['org_id'], row['batch_id']), []).append(dict(row))
+        return batches
+
+    def admin_grants(self, org_ids: list, statuses: tuple) -> dict:
+        """(org_id, lowercased email) -> grants in statuses for those organizations."""
+        by_admin = {}
+        status_marks = ','.join('?' * len(statuses))
+        for start in range(0, len(org_ids), _MAX_QUERY_ORGS):
+            chunk = org_ids[start:start + _MAX_QUERY_ORGS]
+            for row in self.db.connection().execute(
+                f"SELECT * FROM access_grants WHERE status IN ({status_marks}) "
+                f"AND org_id IN ({','.join('?' * len(chunk))})",
+                (*statuses, *chunk),
+            ):
+                by_admin.setdefault((row['org_id'], row['email'].lower()), []).append(dict(row))
+        return by_admin
+
+    def has_work(self) -> bool:
+        marks = ','.join('?' * len(_WORK_STATUSES))
+        return self.db.connection().execute(
+            f"SELECT 1 FROM access_grants WHERE status IN ({marks}) LIMIT 1", _WORK_STATUSES
+        ).fetchone() is not None
+
+    def active_expiries(self) -> list:
+        """[(grant key, expires_at epoch)] for every active grant with an expiry."""
+        return [
+            ((row['request_num'], row['position']), parse_utc_iso(row['expires_at']))
+            for row in self.db.connection().execute(
+                "SELECT request_num, position, expires_at FROM access_grants "
+                "WHERE status = 'active' AND expires_at IS NOT NULL"
+            )
+        ]
+
+    def due_expiries(self, limit: int = 500) -> list:
+        """Keys of up to limit active grants whose expiry has passed (whoever activated them)."""
+        return [
+            (row['request_num'], row['position'])
+            for row in self.db.connection().execute(
+                "SELECT request_num, position FROM access_grants "
+                "WHERE status = 'active' AND expires_at <= ? ORDER BY expires_at LIMIT ?",
+                (utc_now_iso(), limit),
+            )
+        ]
+
+    def next_expiry(self):
+        """Earliest expires_at (epoch) of any active grant, or None."""
+        row = self.db.connection().execute(
+            "SELECT MIN(expires_at) AS expires_at FROM access_grants WHERE status = 'active'"
+        ).fetchone()
+        return parse_utc_iso(row['expires_at']) if row['expires_at'] else None
+
+    def defer_expiry(self, keys: list, expires_at: float):
+        """Set a new expiry on active grants (e.g. when their revocation is retried)."""
+        at = utc_iso(expires_at)
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "UPDATE access_grants SET expires_at = ? "
+                "WHERE request_num = ? AND position = ? AND status = 'active'",
+                [(at, num, position) for num, position in keys],
+            )
+
+    def mark_expiring(self, keys: list) -> int:
+        """Move active grants whose expiry has passed to 'expiring'. Returns how many moved."""
+        now = utc_now_iso()
+        with self.db.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "UPDATE access_grants SET status = 'expiring', updated_at = ? "
+                "WHERE request_num = ? AND position = ? AND status = 'active' AND expires_at <= ?",
+                [(now, num, position, now) for num, position in keys],
+            )
+            return conn.total_changes - before
+
+    def statuses(self, request_nums: list) -> dict:
+        """(request_num, position) -> { status, error, adminId, expiresAt } for the given requests."""
+        if not request_nums:
+            return {}
+        marks = ','.join('?' * len(request_nums))
+        return {
+            (row['request_num'], row['position']): {
+                'status': row['status'],
+                'error': row['error'],
+                'adminId': row['admin_id'],
+                'expiresAt': row['expires_at'],
+            }
+            for row in self.db.connection().execute(
+                f"SELECT request_num, position, status, error, admin_id, expires_at FROM access_grants "
+                f"WHERE request_num IN ({marks})",
+                request_nums,
+            )
+        }
+
+
+class ProvisioningPipeline:
+    """Submits queued grants and due revocations as per-organization action batches and tracks them."""
+
+    def __init__(self, store: GrantStore, poll_interval: float = 5, batch_timeout: float = 900,
+                 claim_timeout: float = 600, grant_duration: float = 14400,
+                 on_activated=None, on_revoke_failed=None, on_changed=None):
+        """
+        grant_duration: seconds a grant stays active. on_activated([(key, expires_at)])
+        and on_revoke_failed([key]) let the expiry engine track grants;
+        on_changed([(grant, status, fields)]) sees every recorded transition.
+        """
+        self.store = store
+        self.poll_interval = poll_interval
+        self.batch_timeout = batch_timeout
+        self.claim_timeout = claim_timeout
+        self.grant_duration = grant_duration
+        self.on_activated = on_activated
+        self.on_revoke_failed = on_revoke_failed
+        self.on_changed = on_changed
+
+    def run_once(self, fan_out):
+        """
+        One pass: submit what is queued or expiring, poll what is in flight.
+        fan_out(call, items) runs `await call(dashboard, item)` per item concurrently
+        and returns (results, errors) keyed by item. Returns seconds until the next
+        pass, or None when nothing is left in progress.
+        """
+        self.store.requeue_stale(self.claim_timeout)
+        claimed = self.store.claim('queued', 'submitting')
+        if claimed:
+            self._submit(fan_out, claimed)
+        expiring = self.store.claim('expiring', 'revoking')
+        if expiring:
+            self._submit_revocations(fan_out, expiring)
+        for status in ('submitted', 'revoke_submitted'):
+            in_flight = self.store.in_flight(status)
+            if in_flight:
+                self._poll(fan_out, in_flight, revoking=status == 'revoke_submitted')
+        return self.poll_interval if self.store.has_work() else None
+
+    def _activated(self, grant, fields: dict, changes: list, activated: list):
+        expires_at = time.time() + self.grant_duration
+        changes.append((grant, 'active', {**fields, 'error': None, 'expires_at': utc_iso(expires_at)}))
+        activated.append((grant_key(grant), expires_at))
+
+    def _apply(self, changes: list, activated: list = (), revoke_failed: list = ()):
+        """Write changes; callbacks only see those this process applied (another may have won)."""
+        changes = self.store.update(changes)
+        applied = {grant_key(grant) for grant, _, _ in changes}
+        activated = [entry for entry in activated if entry[0] in applied]
+        revoke_failed = [key for key in revoke_failed if key in applied]
+        if changes and self.on_changed:
+            self.on_changed(changes)
+        if activated and self.on_activated:
+            self.on_activated(activated)
+        if revoke_failed and self.on_revoke_failed:
+            self.on_revoke_failed(revoke_failed)
+        return changes
+
+    @staticmethod
+    def _list_admins(fan_out, org_ids: list):
+        async def list_admins(dashboard, org_id):
+            return await dashboard.organizations.getOrganizationAdmins(org_id)
+
+        return fan_out(list_admins, org_ids)
+
+    @staticmethod
+    def _submit_batches(fan_out, batches: dict):
+        """batches: (org_id, chunk) -> [(grant, ..., action dict)]. Returns (results, errors)."""
+        async def create_batch(dashboard, key):
+            return await dashboard.organizations.createOrganizationActionBatch(
+                key[0], [p[-1] for p in batches[key]], confirmed=True, synchronous=False,
+            )
+
+        return fan_out(create_batch, list(batches)) if batches else ({}, {})
+
+    @staticmethod
+    def _chunk(batches: dict, org_id: str, planned: list):
+        for chunk, start in enumerate(range(0, len(planned), MAX_ACTIONS_PER_BATCH)):
+            batches[(org_id, chunk)] = planned[start:start + MAX_ACTIONS_PER_BATCH]
+
+    # ---- submit ----
+
+    def _submit(self, fan_out, grants: list):
+        by_org = _group_by_org(grants)
+        in_flight = self.store.admin_grants(list(by_org), _IN_FLIGHT_STATUSES)
+        admins, errors = self._list_admins(fan_out, list(by_org))
+        changes, activated, batches = [], [], {}
+        for org_id, org_grants in by_org.items():
+            if org_id in errors:
+                error = f"Listing admins failed: {errors[org_id]}"
+                changes.extend((g, 'failed', {'error': error}) for g in org_grants)
+                continue
+            existing = {(a.get('email') or '').lower(): a for a in admins.get(org_id) or []}
+            planned, seen = [], set()
+            for grant in org_grants:
+                email = grant['email'].lower()
+                if email in seen or (org_id, email) in in_flight:
+                    # Same admin twice in one pass, or a batch for this admin still in flight:
+                    # plan it once that batch has landed and the admin list reflects it
+                    changes.append((grant, 'queued', {}))
+                    continue
+                seen.add(email)
+                admin = existing.get(email)
+                if admin is None:
+                    planned.append((grant, 'create', None, None, {
+                        'resource': f"/organizations/{org_id}/admins",
+                        'operation': 'create',
+                        'body': {
+                            'email': grant['email'],
+                            'name': grant['name'] or grant['email'],
+                            'orgAccess': grant['org_access'],
+                            'tags': [],
+                            'networks': [],
+                        },
+                    }))
+                elif _ACCESS_RANK.get(admin.get('orgAccess'), 0) >= _ACCESS_RANK[grant['org_access']]:
+                    self._activated(grant, {
+                        'action': None, 'admin_id': admin.get('id'), 'previous_access': admin.get('orgAccess'),
+                    }, changes, activated)
+                else:
+                    planned.append((grant, 'update', admin.get('id'), admin.get('orgAccess'), {
+                        'resource': f"/organizations/{org_id}/admins/{admin.get('id')}",
+                        'operation': 'update',
+                        'body': {'orgAccess': grant['org_access']},
+                    }))
+            self._chunk(batches, org_id, planned)
+
+        results, errors = self._submit_batches(fan_out, batches)
+        for key, planned in batches.items():
+            batch_id = (results.get(key) or {}).get('id')
+            if key in errors or not batch_id:
+                error = f"Action batch submission failed: {errors.get(key, 'no batch ID returned')}"
+                changes.extend((p[0], 'failed', {'error': error}) for p in planned)
+                continue
+            for index, (grant, action, admin_id, previous_access, _) in enumerate(planned):
+                changes.append((grant, 'submitted', {
+                    'action': action, 'action_index': index, 'batch_id': batch_id,
+                    'admin_id': admin_id, 'previous_access': previous_access,
+                }))
+        self._apply(changes, activated)
+        logger.info(f"Provisioning: {len(grants)} grants, {len(batches)} action batches submitted")
+
+    def _submit_revocations(self, fan_out, grants: list):
+        """
+        Undo expired grants: destroy admins we created, restore orgAccess we raised.
+
+        Grants for the same admin can overlap (a second request approved while
+        the first is active). The admin is only reverted once no other grant for
+        it is active; until then the revert (the action and previous_access
+        closest to the admin's state before any grant) passes to the surviving
+        grant, and access drops to the highest level still granted.
+        """
+        by_org = _group_by_org(grants)
+        others = self.store.admin_grants(list(by_org), ('active', 'submitting') + _IN_FLIGHT_STATUSES)
+        admins, errors = self._list_admins(fan_out, list(by_org))
+        changes, failed, batches = [], [], {}
+        for org_id, org_grants in by_org.items():
+            if org_id in errors:
+                error = f"Listing admins failed: {errors[org_id]}"
+                changes.extend((g, 'active', {'error': error}) for g in org_grants)
+                failed.extend(grant_key(g) for g in org_grants)
+                continue
+            existing = {a.get('id'): a for a in admins.get(org_id) or []}
+            by_email = {(a.get('email') or '').lower(): a for a in admins.get(org_id) or []}
+            planned = []
+            for email, expiring in _group_by_email(org_grants).items():
+                admin = next((existing[g['admin_id']] for g in expiring if g['admin_id'] in existing),
+                             by_email.get(email))
+                claimed = {grant_key(g) for g in expiring}
+                overlapping = [g for g in others.get((org_id, email), []) if grant_key(g) not in claimed]
+                survivors = [g for g in overlapping if g['status'] == 'active']
+                if len(survivors) < len(overlapping):
+                    # Another grant for this admin is being provisioned or revoked: revisit next pass
+                    changes.extend((g, 'expiring', {}) for g in expiring)
+                    continue
+                action, previous_access = _original_access(expiring + survivors)
+                if survivors:
+                    owner = max(survivors, key=lambda g: g['expires_at'] or '')
+                    if action is not None and (owner['action'], owner['previous_access']) != (
+                            action, previous_access):
+                        changes.append((owner, 'active', {'action': action, 'previous_access': previous_access}))
+                    target = max((g['org_access'] for g in survivors), key=_ACCESS_RANK.get)
+                    raised = {g['org_access'] for g in expiring if g['action'] is not None}
+                    if (admin is None or admin.get('orgAccess') not in raised
+                            or _ACCESS_RANK.get(admin.get('orgAccess'), 0) <= _ACCESS_RANK[target]):
+                        changes.extend((g, 'expired', {'error': None}) for g in expiring)
+                        continue
+                    # Drop to the highest level a surviving grant still gives
+                    operation, body = 'update', {'orgAccess': target}
+                elif action is None or admin is None:
+                    # Pre-existing access, or the admin is already gone: nothing to undo
+                    changes.extend((g, 'expired', {'error': None}) for g in expiring)
+                    continue
+                elif action == 'create':
+                    operation, body = 'destroy', {}
+                elif admin.get('orgAccess') not in {g['org_access'] for g in expiring}:
+                    # Someone changed this admin's access since; leave it alone
+                    changes.extend((g, 'expired', {'error': None}) for g in expiring)
+                    continue
+                else:
+                    operation, body = 'update', {'orgAccess': previous_access or 'none'}
+                # One action per admin; the first grant carries it, the rest are done
+                carrier = expiring[0]
+                changes.extend((g, 'expired', {'error': None}) for g in expiring[1:])
+                fields = {} if survivors else {'action': action, 'previous_access': previous_access}
+                planned.append((carrier, fields, {
+                    'resource': f"/organizations/{org_id}/admins/{admin['id']}",
+                    'operation': operation,
+                    'body': body,
+                }))
+            self._chunk(batches, org_id, planned)
+
+        results, errors = self._submit_batches(fan_out, batches)
+        for key, planned in batches.items():
+            batch_id = (results.get(key) or {}).get('id')
+            if key in errors or not batch_id:
+                error = f"Revocation batch submission failed: {errors.get(key, 'no batch ID returned')}"
+                changes.extend((p[0], 'active', {**p[1], 'error': error}) for p in planned)
+                failed.extend(grant_key(p[0]) for p in planned)
+                continue
+            for index, (grant, fields, _) in enumerate(planned):
+                changes.append((grant, 'revoke_submitted', {**fields, 'batch_id': batch_id, 'action_index': index}))
+        self._apply(changes, revoke_failed=failed)
+        logger.info(f"Provisioning: {len(grants)} grants expiring, {len(batches)} revocation batches submitted")
+
+    # ---- poll ----
+
+    def _poll(self, fan_out, in_flight: dict, revoking: bool = False):
+        async def get_batch(dashboard, key):
+            return await dashboard.organizations.getOrganizationActionBatch(*key)
+
+        results, errors = fan_out(get_batch, list(in_flight))
+        timeout_before = utc_iso(time.time() - self.batch_timeout)
+        changes, activated, failed = [], [], []
+        for key, grants in in_flight.items():
+            status = (results.get(key) or {}).get('status') or {}
+            error = None
+            if status.get('failed'):
+                error = '; '.join(str(e) for e in status.get('errors') or []) or 'Action batch failed'
+            elif status.get('completed'):
+                if revoking:
+                    changes.extend((g, 'expired', {'error': None}) for g in grants)
+                    continue
+                # createdResources lists new admins in the order of the batch's create actions
+                created = iter(r.get('id') for r in status.get('createdResources') or [])
+                for grant in grants:
+                    admin_id = next(created, None) if grant['action'] == 'create' else grant['admin_id']
+                    self._activated(grant, {'admin_id': admin_id}, changes, activated)
+                continue
+            elif min(g['updated_at'] for g in grants) < timeout_before:
+                error = f"Action batch {key[1]} did not complete in time"
+                if key in errors:
+                    error += f" ({errors[key]})"
+            if error is None:
+                continue
+            if revoking:
+                changes.extend((g, 'active', {'error': f"Revocation failed: {error}"}) for g in grants)
+                failed.extend(grant_key(g) for g in grants)
+            else:
+                changes.extend((g, 'failed', {'error': error}) for g in grants)
+        if changes:
+            applied = self._apply(changes, activated, failed)
+            if applied:
+                logger.info(f"Provisioning: {len(applied)} grants finished")
+
+
+def _group_by_org(grants: list) -> dict:
+    by_org = {}
+    for grant in grants:
+        by_org.setdefault(grant['org_id'], []).append(grant)
+    return by_org
+
+
+def _group_by_email(grants: list) -> dict:
+    by_email = {}
+    for grant in grants:
+        by_email.setdefault(grant['email'].lower(), []).append(grant)
+    return by_email
+
+
+def _original_access(grants: list) -> tuple:
+    """
+    (action, previous_access) that restores the admin to its state before any
+    of these overlapping grants: 'create' if one of them created the admin,
+    else the lowest access an 'update' raised it from, else (None, None).
+    """
+    actions = [g for g in grants if g['action'] is not None]
+    if any(g['action'] == 'create' for g in actions):
+        return 'create', None
+    if not actions:
+        return None, None
+    lowest = min(actions, key=lambda g: _ACCESS_RANK.get(g['previous_access'] or 'none', 0))
+    return 'update', lowest['previous_access']
@@ -0,0 +1,360 @@
+"""
+Token-bucket rate limiting for outbound Meraki Dashboard API calls.
+
+Meraki budgets requests per organization (about 10/s) and per client; going
+over returns 429 with Retry-After, and the SDK's answer is to sleep and
+retry, so bursts turn into 429 storms. RateLimiter meters every call
+before it is sent:
+
+- one bucket per API key (key hash) plus one per organization ID found in
+  the URL; a call takes a token from both atomically;
+- callers queue by priority (PRIORITY_INTERACTIVE page loads ahead of
+  PRIORITY_BACKGROUND refreshes and provisioning), taken from a context
+  variable so threads and asyncio tasks each carry their own;
+- a 429's Retry-After blocks the bucket for everyone, not just the caller;
+- stats() reports queue depth by priority and throttling counters.
+
+Buckets live in process memory (MemoryBuckets) or, with
+MERAKI_RATE_LIMIT_BACKEND=redis, in Redis (RedisBuckets, one Lua script per
+take) so every worker draws from the same budget. Redis errors fall back to
+the in-memory buckets. The priority queue itself is per process.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+
+import redis
+
+from services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+_priority = ContextVar('meraki_request_priority', default=PRIORITY_INTERACTIVE)
+_ORG_ID_RE = re.compile(r'/organizations/([^/?#]+)')
+
+
+class RateLimitTimeout(TimeoutError):
+    """Waited longer than max_wait for a token."""
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Run the block's Meraki calls at priority (lower runs first)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def org_id_from_url(url: str):
+    """Organization ID in a Dashboard API URL ('/organizations/{id}/...'), or None."""
+    match = _ORG_ID_RE.search(url or '')
+    return match.group(1) if match else None
+
+
+def parse_retry_after(value, default: float = 1.0) -> float:
+    """Retry-After header (seconds or HTTP date) -> seconds to wait."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class MemoryBuckets:
+    """Token buckets in process memory."""
+
+    def __init__(self):
+        self._state = {}  # name -> [tokens, updated_at, blocked_until]
+        self._lock = threading.Lock()
+
+    def take(self, specs: list, now: float):
+        """
+        Take one token from every (name, rate, burst) bucket, or none of them.
+        Returns (0, None) on success, else (seconds to wait, limiting bucket name).
+        """
+        with self._lock:
+            return self._take(specs, now)
+
+    def _take(self, specs: list, now: float):
+        worst_wait, worst_name, states = 0.0, None, []
+        for name, rate, burst in specs:
+            state = self._state.get(name)
+            if state is None:
+                state = self._state[name] = [float(burst), now, 0.0]
+            state[0] = min(float(burst), state[0] + max(0.0, now - state[1]) * rate)
+            state[1] = now
+            if state[2] > now:
+                wait = state[2] - now
+            elif state[0] < 1:
+                wait = (1 - state[0]) / rate
+            else:
+                wait = 0.0
+            if wait > worst_wait:
+                worst_wait, worst_name = wait, name
+            states.append(state)
+        if worst_wait > 0:
+            return worst_wait, worst_name
+        for state in states:
+            state[0] -= 1
+        return 0.0, None
+
+    def block(self, name: str, until: float, burst: float):
+        with self._lock:
+            state = self._state.setdefault(name, [0.0, time.time(), 0.0])
+            state[0], state[1], state[2] = 0.0, time.time(), max(state[2], until)
+
+
+# KEYS: bucket keys. ARGV: now_ms, then rate (per ms) and burst for each key.
+# Takes a token from every bucket or from none; returns {wait_ms, index of limiting key}.
+_TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local worst, worst_index, tokens = 0, 0, {}
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+    local data = redis.call('HMGET', key, 'tokens', 'ts', 'blocked')
+    local t = tonumber(data[1]) or burst
+    local ts = tonumber(data[2]) or now
+    local blocked = tonumber(data[3]) or 0
+    t = math.min(burst, t + math.max(0, now - ts) * rate)
+    local wait = 0
+    if blocked > now then
+        wait = blocked - now
+    elseif t < 1 then
+        wait = (1 - t) / rate
+    end
+    if wait > worst then
+        worst, worst_index = wait, i
+    end
+    tokens[i] = t
+end
+if worst > 0 then
+    return {math.ceil(worst), worst_index}
+end
+for i, key in ipairs(KEYS) do
+    local rate, burst = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', key, 'tokens', tostring(tokens[i] - 1), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate) + 60000)
+end
+return {0, 0}
+"""
+
+
+class RedisBuckets:
+    """Token buckets shared by all workers through Redis (clocks of the hosts should agree)."""
+
+    def __init__(self, url: str, prefix: str = 'meraki-admin-jit:ratelimit:'):
+        self.url = url
+        self.prefix = prefix
+        self._script = None
+
+    def take(self, specs: list, now: float):
+        client = get_redis(self.url)
+        if self._script is None:
+            self._script = client.register_script(_TAKE_SCRIPT)
+        args = [int(now * 1000)]
+        for _, rate, burst in specs:
+            args.extend((rate / 1000.0, burst))
+        wait_ms, index = self._script(keys=[self.prefix + name for name, _, _ in specs], args=args, client=client)
+        if int(wait_ms) <= 0:
+            return 0.0, None
+        return int(wait_ms) / 1000.0, specs[int(index) - 1][0]
+
+    def block(self, name: str, until: float, burst: float):
+        client = get_redis(self.url)
+        key = self.prefix + name
+        pipe = client.pipeline()
+        pipe.hset(key, mapping={'tokens': 0, 'ts': int(time.time() * 1000), 'blocked': int(until * 1000)})
+        pipe.pexpire(key, max(1, int((until - time.time()) * 1000)) + 60000)
+        pipe.execute()
+
+
+class _Waiter:
+    __slots__ = ('key', 'org_id', 'priority', 'org_limited')
+
+    def __init__(self, key, org_id, priority):
+        self.key = key
+        self.org_id = org_id
+        self.priority = priority
+        self.org_limited = False
+
+
+class RateLimiter:
+    """Per-key and per-organization token buckets with a per-process priority queue."""
+
+    def __init__(self, key_rate: float = 100, key_burst: float = None, org_rate: float = 10,
+                 org_burst: float = None, max_wait: float = 60, buckets=None):
+        self.key_rate = float(key_rate)
+        self.key_burst = float(key_burst or key_rate)
+        self.org_rate = float(org_rate)
+        self.org_burst = float(org_burst or org_rate)
+        self.max_wait = max_wait
+        self.buckets = buckets or MemoryBuckets()
+        self._fallback = MemoryBuckets()
+        self._cond = threading.Condition()
+        self._waiters = {}  # key -> [waiter]
+        self._queued = 0
+        self._peak_queued = 0
+        self._acquired = 0
+        self._throttled = 0
+        self._timeouts = 0
+        self._backend_errors = 0
+
+    def use_buckets(self, buckets):
+        """Switch bucket storage (e.g. to RedisBuckets)."""
+        with self._cond:
+            self.buckets = buckets
+
+    # ---- acquiring ----
+
+    def acquire(self, key: str, org_id: str = None, priority: int = None):
+        """Block until a call for (key, org_id) may be sent. Raises RateLimitTimeout."""
+        waiter = self._enter(key, org_id, priority)
+        deadline = time.monotonic() + self.max_wait
+        try:
+            while True:
+                with self._cond:
+                    wait = self._ahead(waiter)
+                if wait <= 0:
+                    wait = self._take(waiter)
+                    if wait <= 0:
+                        return
+                remaining = deadline - time.monotonic()
+                with self._cond:
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise RateLimitTimeout(f"Meraki rate limit: waited over {self.max_wait}s")
+                    self._cond.wait(min(wait, remaining))
+        finally:
+            self._leave(waiter)
+
+    async def acquire_async(self, key: str, org_id: str = None, priority: int = None):
+        """
+        acquire() for coroutines: sleeps on the event loop instead of blocking it,
+        and takes shared (Redis) tokens in the loop's executor.
+        """
+        waiter = self._enter(key, org_id, priority)
+        deadline = time.monotonic() + self.max_wait
+        try:
+            while True:
+                with self._cond:
+                    wait = self._ahead(waiter)
+                if wait <= 0:
+                    if isinstance(self.buckets, MemoryBuckets):
+                        wait = self._take(waiter)
+                    else:
+                        wait = await asyncio.get_running_loop().run_in_executor(None, self._take, waiter)
+                    if wait <= 0:
+                        return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._cond:
+                        self._timeouts += 1
+                    raise RateLimitTimeout(f"Meraki rate limit: waited over {self.max_wait}s")
+                await asyncio.sleep(min(wait, remaining))
+        finally:
+            self._leave(waiter)
+
+    def retry_after(self, key: str, org_id: str = None, seconds: float = 1.0):
+        """Meraki answered 429: block the org's bucket (or the key's) for everyone."""
+        name, burst = (f"org:{org_id}", self.org_burst) if org_id else (f"key:{key}", self.key_burst)
+        until = time.time() + seconds
+        with self._cond:
+            self._throttled += 1
+        try:
+            self.buckets.block(name, until, burst)
+        except redis.RedisError as e:
+            with self._cond:
+                self._backend_errors += 1
+            logger.warning(f"Rate limit backend error, blocking locally: {e}")
+            self._fallback.block(name, until, burst)
+        logger.warning(f"Meraki returned 429; pausing {name.split(':')[0]} bucket for {seconds:.1f}s")
+
+    def stats(self) -> dict:
+        """Queue depth and counters for monitoring."""
+        with self._cond:
+            by_priority = {}
+            for waiters in self._waiters.values():
+                for waiter in waiters:
+                    by_priority[waiter.priority] = by_priority.get(waiter.priority, 0) + 1
+            return {
+                'backend': 'redis' if isinstance(self.buckets, RedisBuckets) else 'memory',
+                'queued': self._queued,
+                'queued_by_priority': {str(p): n for p, n in sorted(by_priority.items())},
+                'peak_queued': self._peak_queued,
+                'acquired': self._acquired,
+                'throttled': self._throttled,
+                'timeouts': self._timeouts,
+                'backend_errors': self._backend_errors,
+                'key_rate': self.key_rate,
+                'org_rate': self.org_rate,
+            }
+
+    # ---- internals (caller holds self._cond unless noted) ----
+
+    def _enter(self, key, org_id, priority) -> _Waiter:
+        waiter = _Waiter(key, org_id, current_priority() if priority is None else priority)
+        with self._cond:
+            self._waiters.setdefault(key, []).append(waiter)
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        return waiter
+
+    def _leave(self, waiter: _Waiter):
+        with self._cond:
+            waiters = self._waiters.get(waiter.key)
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[waiter.key]
+            self._queued -= 1
+            self._cond.notify_all()
+
+    def _ahead(self, waiter: _Waiter) -> float:
+        """0 if waiter may try for a token now, else seconds to let higher-priority callers go first."""
+        # Yield to higher-priority callers on the same key, unless they are stuck on their org's bucket
+        for other in self._waiters.get(waiter.key, ()):
+            if other.priority < waiter.priority and not other.org_limited:
+                return 1.0 / self.key_rate
+        return 0.0
+
+    def _take(self, waiter: _Waiter) -> float:
+        """
+        Take a token for waiter; 0 on success, else seconds until it should retry.
+        Called without self._cond, so a Redis round trip never holds up the queue.
+        """
+        specs = [(f"key:{waiter.key}", self.key_rate, self.key_burst)]
+        if waiter.org_id:
+            specs.append((f"org:{waiter.org_id}", self.org_rate, self.org_burst))
+        error = None
+        try:
+            wait, limited_by = self.buckets.take(specs, time.time())
+        except redis.RedisError as e:
+            error = e
+            wait, limited_by = self._fallback.take(specs, time.time())
+        with self._cond:
+            if error is not None:
+                self._backend_errors += 1
+                if self._backend_errors % 1000 == 1:
+                    logger.warning(f"Rate limit backend error, using local buckets: {error}")
+            waiter.org_limited = bool(limited_by and limited_by.startswith('org:'))
+            if wait <= 0:
+                self._acquired += 1
+        return wait
@@ -0,0 +1,27 @@
+"""
+Shared Redis clients.
+
+One client (and connection pool) per URL per process. redis-py pools detect
+a fork and reconnect in the child, so clients created before gunicorn forks
+are safe to reuse in workers.
+"""
+
+import threading
+
+import redis
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_redis(url: str) -> redis.Redis:
+    """Return the process-wide Redis client for url, creating it on first use."""
+    client = _clients.get(url)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = redis.Redis.from_url(url)
+            _clients[url] = client
+        return client
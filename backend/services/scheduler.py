@@ -0,0 +1,138 @@
+"""
+Background job scheduler.
+
+A single daemon thread keeps jobs in a heap ordered by due time and sleeps
+until the next one is due. A job is a callable returning the delay (seconds)
+until its next run, or None when it is finished. Jobs are named; scheduling
+an existing name replaces it, and run_soon() pulls an existing job forward.
+
+The thread is (re)started lazily per process, so a scheduler created before
+gunicorn forks keeps working in each worker. A pre-fork master calls hold()
+first: jobs are then only queued, and the thread starts at the next
+ensure_started() (in each worker).
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Delay before retrying a job that raised
+JOB_ERROR_RETRY_SECONDS = 60
+
+
+class Scheduler:
+    """Run named jobs at their due time on one background thread."""
+
+    def __init__(self, name: str = 'scheduler'):
+        self.name = name
+        self._heap = []  # (due_at, seq, job_name)
+        self._jobs = {}  # job_name -> (fn, seq); seq invalidates superseded heap entries
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._stopped = False
+        self._held = False
+
+    def schedule(self, name: str, fn, delay: float = 0.0):
+        """Add or replace job name, first running after delay seconds."""
+        with self._cond:
+            self._push(name, fn, delay)
+            held = self._held
+        if not held:
+            self.ensure_started()
+
+    def run_soon(self, name: str, fn):
+        """Run job name now; if it already exists keep its callable and just move it forward."""
+        with self._cond:
+            existing = self._jobs.get(name)
+            self._push(name, existing[0] if existing else fn, 0.0)
+            held = self._held
+        if not held:
+            self.ensure_started()
+
+    def cancel(self, name: str):
+        with self._cond:
+            self._jobs.pop(name, None)
+
+    def has_job(self, name: str) -> bool:
+        with self._cond:
+            return name in self._jobs
+
+    def hold(self):
+        """Queue jobs without starting the thread until ensure_started() is called."""
+        with self._cond:
+            self._held = True
+
+    def stop(self, timeout: float = None):
+        """Stop the worker thread (jobs stay queued); with timeout, wait for it to exit."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if timeout is not None and thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def ensure_started(self):
+        """Start the worker thread in this process if it is not running (e.g. after fork); ends hold()."""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stopped = False
+            self._held = False
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _push(self, name, fn, delay):
+        seq = next(self._seq)
+        self._jobs[name] = (fn, seq)
+        heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay), seq, name))
+        self._cond.notify()
+
+    def _next_due(self):
+        """Pop the next due (name, fn) or return (None, wait_seconds). Caller holds the lock."""
+        while self._heap:
+            due_at, seq, name = self._heap[0]
+            job = self._jobs.get(name)
+            if job is None or job[1] != seq:
+                heapq.heappop(self._heap)  # cancelled or superseded
+                continue
+            wait = due_at - time.monotonic()
+            if wait > 0:
+                return None, wait
+            heapq.heappop(self._heap)
+            return (name, job), 0
+        return None, None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    due, wait = self._next_due()
+                    if due is not None:
+                        break
+                    self._cond.wait(timeout=wait)
+            name, (fn, seq) = due
+            try:
+                next_delay = fn()
+            except Exception:
+                logger.exception(f"Scheduled job {name} failed")
+                next_delay = JOB_ERROR_RETRY_SECONDS
+            with self._cond:
+                job = self._jobs.get(name)
+                if job is None or job[1] != seq:
+                    continue  # cancelled or replaced while running
+                if next_delay is None:
+                    del self._jobs[name]
+                else:
+                    self._push(name, fn, next_delay)
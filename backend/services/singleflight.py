@@ -0,0 +1,216 @@
+"""
+Single-flight request coalescing.
+
+- SingleFlight: within a process, concurrent calls for the same key share one
+  execution; waiters get the leader's result (or its exception).
+- RedisSingleFlight: across workers, a Redis lock (SET NX PX) elects one
+  leader per key; the others poll a shared result (normally the Redis cache
+  tier) until the leader publishes it, and fall back to calling fn themselves
+  if the leader dies or takes longer than wait_timeout.
+
+Used together: threads coalesce in-process first, so at most one thread per
+worker contends for the Redis lock.
+
+Both also have do_async() for coroutine functions on an event loop (the ASGI
+serving mode). It joins the same in-flight calls as do(), in either direction,
+and waits without blocking the loop.
+"""
+
+import asyncio
+import logging
+import secrets
+import threading
+import time
+
+import redis
+
+from services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Delete the lock only if we still own it (token match)
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = []  # (loop, future) for do_async() callers
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class SingleFlight:
+    """Per-key in-flight deduplication across threads of one process."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers with the same key; return its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call)
+
+    async def do_async(self, key, fn):
+        """
+        do() for a coroutine function: shares calls with do() callers and other
+        tasks. The leader's call runs as its own task, so a cancelled caller does
+        not cancel the call the others are waiting on.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            call.waiters.append((loop, waiter))
+        if leader:
+            def finished(task):
+                if task.cancelled():
+                    call.error = asyncio.CancelledError()
+                elif task.exception() is not None:
+                    call.error = task.exception()
+                else:
+                    call.result = task.result()
+                self._finish(key, call)
+
+            asyncio.ensure_future(fn()).add_done_callback(finished)
+        await asyncio.shield(waiter)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _finish(self, key, call):
+        with self._lock:
+            self._calls.pop(key, None)
+        # No waiter can be added once the call is out of _calls
+        call.done.set()
+        for loop, waiter in call.waiters:
+            loop.call_soon_threadsafe(_resolve, waiter)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class RedisSingleFlight:
+    """Per-key leader election across worker processes via a Redis lock."""
+
+    def __init__(self, url: str, prefix: str, lock_ttl: float = 90.0,
+                 wait_timeout: float = 60.0, poll_interval: float = 0.1):
+        self.url = url
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+    def do(self, key, fn, poll):
+        """
+        Run fn() if this process wins the lock for key; otherwise wait for poll()
+        to return a non-None value published by the winner. Redis errors degrade
+        to calling fn() directly.
+        """
+        lock_key = f"{self.prefix}{key}"
+        token = secrets.token_hex(16)
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            client = get_redis(self.url)
+            while True:
+                acquired, result = self._acquire(client, lock_key, token, poll)
+                if acquired:
+                    break
+                if result is not None:
+                    return result
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Timed out waiting for in-flight fetch of {lock_key}; fetching directly")
+                    return fn()
+                time.sleep(self.poll_interval)
+        except redis.RedisError as e:
+            logger.warning(f"Redis single-flight unavailable ({e}); fetching directly")
+            return fn()
+
+        try:
+            # The previous leader may have published while we were acquiring
+            result = poll()
+            if result is not None:
+                return result
+            return fn()
+        finally:
+            self._release(client, lock_key, token)
+
+    async def do_async(self, key, fn, poll):
+        """
+        do() for a coroutine function fn: the Redis calls and poll() run on the
+        default executor and the waits are asyncio sleeps, so the loop stays free.
+        """
+        lock_key = f"{self.prefix}{key}"
+        token = secrets.token_hex(16)
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            client = get_redis(self.url)
+            while True:
+                acquired, result = await asyncio.to_thread(self._acquire, client, lock_key, token, poll)
+                if acquired:
+                    break
+                if result is not None:
+                    return result
+                if time.monotonic() >= deadline:
+                    logger.warning(f"Timed out waiting for in-flight fetch of {lock_key}; fetching directly")
+                    return await fn()
+                await asyncio.sleep(self.poll_interval)
+        except redis.RedisError as e:
+            logger.warning(f"Redis single-flight unavailable ({e}); fetching directly")
+            return await fn()
+
+        try:
+            result = await asyncio.to_thread(poll)
+            if result is not None:
+                return result
+            return await fn()
+        finally:
+            await asyncio.to_thread(self._release, client, lock_key, token)
+
+    def _acquire(self, client, lock_key: str, token: str, poll):
+        """(True, None) if this process now holds the lock, else (False, poll())."""
+        if client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000)):
+            return True, None
+        return False, poll()
+
+    @staticmethod
+    def _release(client, lock_key: str, token: str):
+        try:
+            client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release single-flight lock {lock_key}: {e}")
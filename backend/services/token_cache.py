@@ -0,0 +1,63 @@
+"""
+Cache of already-verified JWTs.
+
+Verifying a Bearer token means an HMAC check plus claim validation and then
+building the safe-user dict. Clients send the same token on every call until
+it expires, so VerifiedTokenCache remembers the result: keyed by a digest of
+the signing secret and the token (never the token itself), bounded by LRU,
+and each entry is dropped once the token's exp passes. Including the secret
+in the key means rotating SECRET_KEY invalidates every cached entry.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """Thread-safe LRU of verified tokens -> (safe user dict, exp)."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max(0, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str, secret: str) -> bytes:
+        return hashlib.sha256(f"{secret}\0{token}".encode()).digest()
+
+    def get(self, token: str, secret: str):
+        """Copy of the cached user dict for a still-valid token, or None."""
+        if not self.max_entries:
+            return None
+        key = self._key(token, secret)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, exp = entry
+            if exp is not None and exp <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return dict(user)
+
+    def put(self, token: str, secret: str, user: dict, exp):
+        """Remember a verified token until exp (epoch seconds; None = until evicted)."""
+        if not self.max_entries:
+            return
+        key = self._key(token, secret)
+        with self._lock:
+            self._entries[key] = (dict(user), exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,145 @@
+"""
+Serve a WSGI application from an ASGI server.
+
+WsgiBridge runs each HTTP request through the WSGI app on a bounded thread
+pool and streams the response back as the app yields it (so /api/events
+server-sent events keep working). The calling task's contextvars are copied
+into the worker thread, which is how the ASGI layer passes per-request flags
+such as routes.meraki.defer_organization_misses down to Flask views.
+
+A client disconnect makes the next body write raise ClientDisconnected
+inside the app's iterator, so long-lived streams are closed (and their
+finally blocks run) instead of writing into the void.
+"""
+
+import asyncio
+import contextvars
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ClientDisconnected(OSError):
+    """The ASGI client went away while the WSGI app was still responding."""
+
+
+async def read_body(receive) -> bytes:
+    """The full request body from ASGI http.request messages."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ClientDisconnected()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def build_environ(scope: dict, body: bytes) -> dict:
+    """WSGI environ for an ASGI HTTP scope (PEP 3333 latin-1 strings)."""
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode().decode('latin-1'),
+        'PATH_INFO': path.encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f"HTTP_{name}"
+        if key == 'CONTENT_LENGTH':
+            continue
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class WsgiBridge:
+    """ASGI application running a WSGI app on at most max_threads worker threads."""
+
+    def __init__(self, wsgi_app, max_threads: int = 32):
+        self.wsgi_app = wsgi_app
+        self.max_threads = max(1, int(max_threads))
+        self._executor = ThreadPoolExecutor(self.max_threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send, body: bytes = None):
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type '{scope['type']}'")
+        if body is None:
+            body = await read_body(receive)
+        loop = asyncio.get_running_loop()
+        disconnected = threading.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        context = contextvars.copy_context()
+        try:
+            await asyncio.wrap_future(
+                self._executor.submit(context.run, self._respond, scope, body, loop, send, disconnected)
+            )
+        except ClientDisconnected:
+            pass
+        finally:
+            watcher.cancel()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _respond(self, scope, body, loop, send, disconnected):
+        """Worker thread: run the WSGI app and forward its response to send."""
+        def send_sync(message):
+            if disconnected.is_set():
+                raise ClientDisconnected()
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        start = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and start.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            start['message'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            }
+            return lambda data: send_sync({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+        result = self.wsgi_app(build_environ(scope, body), start_response)
+        try:
+            for chunk in result:
+                if not start.get('sent'):
+                    send_sync(start['message'])
+                    start['sent'] = True
+                if chunk:
+                    send_sync({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not start.get('sent'):
+                send_sync(start['message'])
+            send_sync({'type': 'http.response.body', 'body': b''})
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
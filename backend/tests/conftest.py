@@ -0,0 +1,117 @@
+import os
+import sys
+import tempfile
+import time
+
+import fakeredis
+import jwt
+import pytest
+
+# Tests import the backend's top-level packages (services, routes) the way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Routes and services read their configuration at import time: set it before anything imports them.
+# No background refresh, crawl or provisioning threads, and no real Meraki host.
+TEST_SECRET_KEY = 'test-secret-key-for-pytest'
+APPROVER_EMAIL = 'approver@example.com'
+os.environ.update({
+    'SECRET_KEY': TEST_SECRET_KEY,
+    'DATABASE_PATH': os.path.join(tempfile.mkdtemp(prefix='meraki-admin-jit-tests-'), 'test.sqlite3'),
+    'APPROVER_EMAILS': APPROVER_EMAIL,
+    'MERAKI_DASHBOARD_API_KEY': 'test-api-key',
+    'MERAKI_BASE_URL': 'http://127.0.0.1:9/api/v1',
+    'ORGANIZATIONS_REFRESH_ENABLED': 'false',
+    'MEMBERSHIP_INDEX_ENABLED': 'false',
+    'PROVISIONING_ENABLED': 'false',
+    'METRICS_TOKEN': 'test-metrics-token',
+    'LOG_LEVEL': 'WARNING',
+})
+
+from services import redis_client  # noqa: E402
+
+
+class _FakeClients(dict):
+    """Stands in for redis_client._clients: every URL gets the same fake client."""
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def get(self, url, default=None):
+        return self.client
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """A fakeredis client returned by get_redis() for any URL, empty for each test."""
+    client = fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+    monkeypatch.setattr(redis_client, '_clients', _FakeClients(client))
+    return client
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def bearer(email: str, secret: str = TEST_SECRET_KEY, expires_in: int = 3600) -> dict:
+    """Authorization header with a JWT like /api/auth/token issues."""
+    now = int(time.time())
+    token = jwt.encode(
+        {'email': email, 'name': email.split('@')[0], 'sub': email, 'iat': now, 'exp': now + expires_in},
+        secret, algorithm='HS256',
+    )
+    return {'Authorization': f"Bearer {token}"}
+
+
+@pytest.fixture
+def auth_headers():
+    """auth_headers(email) -> Bearer header for that user."""
+    return bearer
+
+
+@pytest.fixture
+def fake_meraki():
+    """tools/fake_meraki.py server on a free local port (use .base_url)."""
+    from tools.fake_meraki import FakeMerakiServer
+    server = FakeMerakiServer(org_count=20).start()
+    yield server
+    server.stop()
+
+
+class _OrganizationsUpstream:
+    """Stands in for getOrganizations: returns copies of .orgs and records each call in .calls."""
+
+    def __init__(self, count: int = 1):
+        self.calls = []
+        self.error = None
+        self.orgs = [
+            {'id': str(i + 1), 'name': f"Org {i + 1}", 'url': f"https://example.com/{i + 1}"} for i in range(count)
+        ]
+
+    def __call__(self, api_key):
+        self.calls.append(api_key)
+        if self.error is not None:
+            raise self.error
+        return [dict(org) for org in self.orgs]
+
+
+@pytest.fixture
+def organizations_upstream(monkeypatch):
+    """Fake getOrganizations for routes.meraki, starting from an empty organizations cache."""
+    from routes import meraki
+    upstream = _OrganizationsUpstream()
+    monkeypatch.setattr(meraki, '_fetch_organizations_from_meraki', upstream)
+    meraki.configure_organizations_cache(None)
+    with meraki._organization_views_lock:
+        meraki._organization_views.clear()
+    meraki._organizations_breaker._circuits.clear()
+    return upstream
@@ -0,0 +1,152 @@
+import pytest
+
+from services.access_requests import AccessRequestNotFound, AccessRequestStore, InvalidTransition
+from services.database import Database
+
+APPROVER = 'approver@example.com'
+ITEMS = [{'orgId': '1', 'orgName': 'Org 1', 'permission': 'read'},
+         {'orgId': '2', 'orgName': 'Org 2', 'permission': 'write'}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AccessRequestStore(Database(str(tmp_path / 'requests.sqlite3')))
+
+
+def test_create_numbers_requests_and_rows(store):
+    created = store.create('user@example.com', 'User', ITEMS)
+    assert created['id'] == 'req-10001'
+    assert [i['status'] for i in created['items']] == ['pending', 'pending']
+    assert [i['rowId'] for i in created['items']] == ['req-10001.1', 'req-10001.2']
+    assert store.create('user@example.com', 'User', ITEMS[:1])['items'][0]['rowId'] == 'req-10002'
+
+
+def test_item_transitions(store):
+    store.create('user@example.com', 'User', ITEMS)
+    item = store.update_item_status('req-10001.1', 'approved', actor=APPROVER)
+    assert item['status'] == 'approved' and item['approvedAt']
+    with pytest.raises(InvalidTransition):
+        store.update_item_status('req-10001.1', 'withdrawn')
+    with pytest.raises(AccessRequestNotFound):
+        store.update_item_status('req-10001.9', 'approved')
+
+    # Request-level changes only move items that can still transition
+    updated = store.update_request_status('req-10001', 'rejected', actor=APPROVER)
+    assert [i['status'] for i in updated['items']] == ['approved', 'rejected']
+    with pytest.raises(InvalidTransition):
+        store.update_request_status('req-10001', 'rejected')
+
+
+def test_bulk_update_reports_per_row_and_atomic(store):
+    store.create('user@example.com', 'User', ITEMS)
+    results = store.update_items_status(['req-10001.1', 'req-99999.1'], 'approved', atomic=True)
+    assert isinstance(results['req-99999.1'], AccessRequestNotFound)
+    assert store.get('req-10001')['items'][0]['status'] == 'pending'
+
+    results = store.update_items_status(['req-10001.1', 'req-99999.1'], 'approved')
+    assert results['req-10001.1']['status'] == 'approved'
+    results = store.update_items_status(['req-10001.1', 'req-10001.2'], 'rejected')
+    assert isinstance(results['req-10001.1'], InvalidTransition)
+    assert results['req-10001.2']['status'] == 'rejected'
+
+
+def test_list_is_keyset_paginated_and_filtered(store):
+    for n in range(5):
+        store.create('a@example.com' if n % 2 else 'b@example.com', None, [{'orgId': str(n)}])
+    page, next_before = store.list(limit=2)
+    assert [r['id'] for r in page] == ['req-10005', 'req-10004'] and next_before == 10004
+    page, next_before = store.list(limit=2, before=next_before)
+    assert [r['id'] for r in page] == ['req-10003', 'req-10002']
+    assert [r['id'] for r in store.list(requester='a@example.com')[0]] == ['req-10004', 'req-10002']
+
+    store.update_item_status('req-10003', 'approved')
+    assert [r['id'] for r in store.list(status='approved')[0]] == ['req-10003']
+    assert [r['id'] for r in store.list(status='pending', org_id='1')[0]] == ['req-10002']
+
+
+def _create(client, headers, org_id='1'):
+    response = client.post('/api/access-requests', json={'items': [{'orgId': org_id}]}, headers=headers)
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def test_requester_sees_and_withdraws_own_requests(client, auth_headers):
+    mine = auth_headers('requester-1@example.com')
+    other = auth_headers('someone-else@example.com')
+    created = _create(client, mine)
+
+    assert client.get(f"/api/access-requests/{created['id']}", headers=other).status_code == 404
+    assert client.get('/api/access-requests?scope=all', headers=mine).status_code == 403
+    listed = client.get('/api/access-requests', headers=mine).get_json()
+    assert [r['id'] for r in listed['items']] == [created['id']]
+
+    row = created['items'][0]['rowId']
+    assert client.put(f"/api/access-requests/rows/{row}/status", json={'status': 'approved'},
+                      headers=mine).status_code == 403
+    assert client.put(f"/api/access-requests/rows/{row}/status", json={'status': 'withdrawn'},
+                      headers=other).status_code == 403
+    response = client.put(f"/api/access-requests/rows/{row}/status", json={'status': 'withdrawn'}, headers=mine)
+    assert response.status_code == 200 and response.get_json()['status'] == 'withdrawn'
+
+
+def test_approver_approves_others_requests(client, auth_headers):
+    created = _create(client, auth_headers('requester-2@example.com'))
+    approver = auth_headers(APPROVER)
+    response = client.put(f"/api/access-requests/{created['id']}/status", json={'status': 'approved'},
+                          headers=approver)
+    assert response.status_code == 200
+    assert response.get_json()['items'][0]['status'] == 'approved'
+    again = client.put(f"/api/access-requests/{created['id']}/status", json={'status': 'rejected'},
+                       headers=approver)
+    assert again.status_code == 409
+
+
+def test_approver_cannot_approve_own_request(client, auth_headers):
+    approver = auth_headers(APPROVER)
+    created = _create(client, approver)
+    row = created['items'][0]['rowId']
+    for status in ('approved', 'rejected'):
+        assert client.put(f"/api/access-requests/{created['id']}/status", json={'status': status},
+                          headers=approver).status_code == 403
+        assert client.put(f"/api/access-requests/rows/{row}/status", json={'status': status},
+                          headers=approver).status_code == 403
+        bulk = client.post('/api/access-requests/bulk-status', json={'rowIds': [row], 'status': status},
+                           headers=approver).get_json()
+        assert bulk['updated'] == 0 and bulk['results'][row]['code'] == 403
+
+    # Approvers may still withdraw their own requests
+    response = client.put(f"/api/access-requests/rows/{row}/status", json={'status': 'withdrawn'},
+                          headers=approver)
+    assert response.status_code == 200
+
+
+def test_bulk_status_validates_before_reading_rows(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(AccessRequestStore, 'get_items',
+                        lambda *args: pytest.fail('rows read for an invalid request'))
+    approver = auth_headers(APPROVER)
+    for body in ({'rowIds': ['req-10001'], 'status': 'bogus'},
+                 {'rowIds': ['req-10001'], 'status': 'pending'},
+                 {'rowIds': ['req-10001']},
+                 {'rowIds': [], 'status': 'approved'}):
+        assert client.post('/api/access-requests/bulk-status', json=body, headers=approver).status_code == 400
+
+
+def test_bulk_status_reports_per_row_results(client, auth_headers):
+    requester = auth_headers('requester-3@example.com')
+    first, second = _create(client, requester), _create(client, requester)
+    rows = [first['items'][0]['rowId'], second['items'][0]['rowId']]
+    approver = auth_headers(APPROVER)
+    assert client.put(f"/api/access-requests/rows/{rows[1]}/status", json={'status': 'withdrawn'},
+                      headers=requester).status_code == 200
+
+    atomic = client.post('/api/access-requests/bulk-status',
+                         json={'rowIds': rows + ['req-99999'], 'status': 'approved', 'atomic': True},
+                         headers=approver)
+    assert atomic.status_code == 409 and atomic.get_json()['updated'] == 0
+
+    body = client.post('/api/access-requests/bulk-status',
+                       json={'rowIds': rows + ['req-99999'], 'status': 'approved'}, headers=approver).get_json()
+    assert body['updated'] == 1 and body['failed'] == 2
+    assert body['results'][rows[0]]['item']['status'] == 'approved'
+    assert body['results'][rows[1]]['code'] == 409
+    assert body['results']['req-99999']['code'] == 404
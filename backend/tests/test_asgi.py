@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from asgi import AsyncMerakiApp
+from routes import meraki
+from routes import profiling as profiling_routes
+from services.profiler import SamplingProfiler
+from services.wsgi_bridge import build_environ
+
+APPROVER = 'approver@example.com'
+ORGS = [{'id': '1', 'name': 'Org 1', 'link': 'https://example.com/1'}]
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def asgi_app(app):
+    asgi_app = AsyncMerakiApp(app, max_threads=4)
+    yield asgi_app
+    asgi_app.bridge.shutdown()
+
+
+@pytest.fixture
+def async_upstream(monkeypatch, organizations_upstream):
+    """organizations_upstream, also answering the async engine's call_async() after a short wait."""
+    async def call_async(api_key, operation, **kwargs):
+        assert operation == 'organizations.getOrganizations'
+        await asyncio.sleep(0.05)
+        return organizations_upstream(api_key)
+
+    monkeypatch.setattr(meraki._async_engine, 'call_async', call_async)
+    return organizations_upstream
+
+
+def _scope(path, headers):
+    return {
+        'type': 'http', 'method': 'GET', 'path': path, 'root_path': '', 'query_string': b'',
+        'http_version': '1.1', 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 5000),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+
+
+async def _get(asgi_app, path, headers):
+    """(status, headers, body) of one request through the ASGI app."""
+    messages, requested = [], []
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi_app(_scope(path, headers), receive, send)
+    start = messages[0]
+    return start['status'], dict(start['headers']), b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def test_environ_from_scope():
+    environ = build_environ(_scope('/api/x', {'Content-Type': 'text/plain', 'X-A': '1'}), b'body')
+    assert environ['PATH_INFO'] == '/api/x' and environ['CONTENT_LENGTH'] == '4'
+    assert environ['CONTENT_TYPE'] == 'text/plain' and environ['HTTP_X_A'] == '1'
+    assert environ['wsgi.input'].read() == b'body'
+
+
+def test_concurrent_misses_are_awaited_once_and_recorded_once(asgi_app, auth_headers, async_upstream):
+    headers = auth_headers('user@example.com')
+    route = {'method': 'GET', 'route': '/api/meraki/organizations'}
+    before = {
+        'ok': _sample('http_request_duration_seconds_count', **route, status='200'),
+        'pending': _sample('http_request_duration_seconds_count', **route, status='503'),
+        'miss': _sample('organizations_cache_requests_total', result='miss'),
+        'hit': _sample('organizations_cache_requests_total', result='hit'),
+    }
+
+    async def main():
+        return await asyncio.gather(*[_get(asgi_app, '/api/meraki/organizations', headers) for _ in range(5)])
+
+    for status, response_headers, body in asyncio.run(main()):
+        assert status == 200 and json.loads(body) == ORGS
+        assert meraki.ORGANIZATIONS_PENDING_HEADER.lower().encode() not in response_headers
+    assert len(async_upstream.calls) == 1
+
+    # One latency sample and one cache lookup per client request; none for the internal pending response
+    assert _sample('http_request_duration_seconds_count', **route, status='200') == before['ok'] + 5
+    assert _sample('http_request_duration_seconds_count', **route, status='503') == before['pending']
+    assert _sample('organizations_cache_requests_total', result='miss') == before['miss'] + 5
+    assert _sample('organizations_cache_requests_total', result='hit') == before['hit']
+
+
+def test_traced_miss_keeps_one_profile(asgi_app, auth_headers, async_upstream, monkeypatch):
+    monkeypatch.setattr(profiling_routes, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(profiling_routes, '_profiler', SamplingProfiler(interval=0.001))
+    headers = {**auth_headers(APPROVER), 'X-Profile': '1'}
+    status, response_headers, _ = asyncio.run(_get(asgi_app, '/api/meraki/organizations', headers))
+    assert status == 200
+    profiles = profiling_routes._profiler.profiles()
+    assert [p.id.encode() for p in profiles] == [response_headers[b'x-profile-id']]
+    assert profiles[0].meta['status'] == 200
+
+
+def test_async_load_joins_in_flight_sync_fetch(async_upstream):
+    cache_key = meraki._cache_key('test-api-key')
+    started, release = threading.Event(), threading.Event()
+
+    def sync_fetch():
+        started.set()
+        release.wait(5)
+        return meraki._load_organizations('test-api-key', cache_key)
+
+    worker = threading.Thread(target=meraki._organizations_flight.do, args=(cache_key, sync_fetch))
+    worker.start()
+    started.wait(5)
+
+    async def main():
+        asyncio.get_running_loop().call_later(0.05, release.set)
+        return await meraki.load_organizations_async('service')
+
+    assert asyncio.run(main()) == ORGS
+    worker.join(5)
+    assert len(async_upstream.calls) == 1
+
+
+@pytest.fixture
+def shared_cache(fake_redis, async_upstream):
+    meraki.configure_organizations_cache('redis://test')
+    yield fake_redis
+    meraki.configure_organizations_cache(None)
+
+
+def test_async_load_waits_for_another_workers_fetch(shared_cache, async_upstream):
+    cache_key = meraki._cache_key('test-api-key')
+    shared_cache.set(f"{meraki.ORGANIZATIONS_FETCH_LOCK_PREFIX}{cache_key}", 'other-worker')
+
+    def other_worker_publishes():
+        time.sleep(0.05)
+        meraki._organizations_cache.set(cache_key, ORGS, meraki.ORGANIZATIONS_CACHE_TTL_SECONDS)
+
+    publisher = threading.Thread(target=other_worker_publishes)
+    publisher.start()
+    assert asyncio.run(meraki.load_organizations_async('service')) == ORGS
+    publisher.join(5)
+    assert async_upstream.calls == []
@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from services import audit as audit_module
+from services.audit import AuditLog, AuditStore, get_audit_log
+from services.database import Database
+
+APPROVER = 'approver@example.com'
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AuditStore(Database(str(tmp_path / 'audit.sqlite3')))
+
+
+def _event(at, action, actor=None, target=None):
+    return {'at': at, 'action': action, 'actor': actor, 'target': target, 'outcome': 'success',
+            'details': '{"n":1}'}
+
+
+def test_store_filters_and_pages(store):
+    store.append([
+        _event('2026-01-01T00:00:00Z', 'auth.login', 'a@example.com'),
+        _event('2026-01-02T00:00:00Z', 'access_request.created', 'a@example.com', 'req-10001'),
+        _event('2026-01-03T00:00:00Z', 'access_request.status', 'b@example.com', 'req-10001'),
+        _event('2026-01-04T00:00:00Z', 'access_requests.other', 'b@example.com'),
+    ])
+    items, next_before = store.list(limit=2)
+    assert [e['action'] for e in items] == ['access_requests.other', 'access_request.status']
+    assert [e['id'] for e in store.list(limit=2, before=next_before)[0]] == [2, 1]
+    assert items[0]['details'] == {'n': 1}
+
+    # A prefix ending in '.' matches that namespace only
+    assert [e['id'] for e in store.list(action='access_request.')[0]] == [3, 2]
+    assert [e['id'] for e in store.list(actor='a@example.com', since='2026-01-02T00:00:00Z')[0]] == [2]
+    assert [e['id'] for e in store.list(until='2026-01-02T00:00:00Z')[0]] == [1]
+
+
+def test_prune_deletes_older_events(store, monkeypatch):
+    monkeypatch.setattr(audit_module, '_PRUNE_CHUNK', 2)
+    store.append([_event(f"2026-01-0{day}T00:00:00Z", 'auth.login') for day in range(1, 6)])
+    assert store.prune('2026-01-04T00:00:00Z') == 3
+    assert [e['at'][:10] for e in store.list()[0]] == ['2026-01-05', '2026-01-04']
+
+
+def test_writer_batches_queued_events(store):
+    log = AuditLog(lambda: store, batch_size=2, flush_interval=0.05, retention_days=0)
+    for n in range(5):
+        assert log.record('auth.login', actor=' User@Example.com ', details={'n': n})
+    assert log.flush(5)
+    events = store.list()[0]
+    assert [e['details']['n'] for e in events] == [4, 3, 2, 1, 0]
+    assert events[0]['actor'] == 'user@example.com'
+    stats = log.stats()
+    assert stats['written'] == 5 and stats['batches'] >= 3 and stats['queued'] == 0
+    log.stop(1)
+
+
+class _BlockedStore:
+    """Holds the writer inside append() until released, then fails or succeeds."""
+
+    def __init__(self, fail=False):
+        self.entered, self.release = threading.Event(), threading.Event()
+        self.fail = fail
+        self.batches = []
+
+    def append(self, events):
+        self.entered.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError('disk full')
+        self.batches.append(events)
+
+
+def test_full_queue_drops_instead_of_blocking():
+    blocked = _BlockedStore()
+    log = AuditLog(lambda: blocked, max_queue=2, batch_size=1, flush_interval=0.01, retention_days=0)
+    log.record('auth.login')
+    blocked.entered.wait(5)  # the writer holds the first event
+    assert log.record('auth.login') and log.record('auth.login')
+    assert not log.record('auth.login')
+    blocked.release.set()
+    assert log.flush(5)
+    assert log.stats()['dropped'] == 1 and log.stats()['written'] == 3
+    log.stop(1)
+
+
+def test_failed_batch_is_retried_once_then_counted(monkeypatch):
+    monkeypatch.setattr(audit_module, '_FAILED_BATCH_RETRY_SECONDS', 0)
+    failing = _BlockedStore(fail=True)
+    failing.release.set()
+    log = AuditLog(lambda: failing, flush_interval=0.01, retention_days=0)
+    log.record('auth.login')
+    assert log.flush(5)
+    assert log.stats()['failed'] == 1 and log.stats()['written'] == 0
+    log.stop(1)
+
+
+def test_stop_writes_queued_events_and_restarts_on_record(store):
+    log = AuditLog(lambda: store, flush_interval=0.2, retention_days=0)
+    log.record('auth.login')
+    writer = log._thread
+    log.stop(5)
+    assert not writer.is_alive() and len(store.list()[0]) == 1
+    log.record('auth.logout')
+    assert log._thread is not writer and log.flush(5)
+    assert len(store.list()[0]) == 2
+    log.stop(1)
+
+
+def test_audit_routes_are_for_approvers(client, auth_headers):
+    requester = auth_headers('audited@example.com')
+    created = client.post('/api/access-requests', json={'items': [{'orgId': '1'}]}, headers=requester).get_json()
+    assert get_audit_log().flush(5)
+
+    assert client.get('/api/audit', headers=requester).status_code == 403
+    approver = auth_headers(APPROVER)
+    body = client.get('/api/audit?actor=Audited@example.com&action=access_request.', headers=approver).get_json()
+    assert [(e['action'], e['target']) for e in body['items']] == [('access_request.created', created['id'])]
+    assert client.get('/api/audit?limit=0', headers=approver).status_code == 400
+    stats = client.get('/api/audit/stats', headers=approver).get_json()
+    assert stats['enabled'] and stats['written'] >= 1
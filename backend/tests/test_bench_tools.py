@@ -0,0 +1,46 @@
+import pytest
+
+from tools.bench_load import percentile, run_scenario, summarize
+from tools.fake_meraki import FakeMerakiServer
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([7.0], 1) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_reports_milliseconds():
+    summary = summarize([0.003, 0.001, 0.002], errors=1, elapsed=0.5)
+    assert summary['requests'] == 3 and summary['errors'] == 1 and summary['rps'] == 6.0
+    assert summary['p50_ms'] == 2.0 and summary['max_ms'] == 3.0 and summary['mean_ms'] == 2.0
+    assert summarize([], 0, 0)['rps'] == 0.0
+
+
+def test_run_scenario_against_fake_meraki(fake_meraki):
+    base = fake_meraki.base_url.split('/api/v1')[0]
+    org_id = fake_meraki.org_ids[0]
+    request = ('GET', f"/api/v1/organizations/{org_id}/admins", None, {'Authorization': 'Bearer key'})
+    result = run_scenario(base, lambda: request, 200, concurrency=4, duration=5, max_requests=40)
+    assert result['requests'] == 40 and result['errors'] == 0
+    assert fake_meraki.request_counts['get_admins'] == 40
+
+
+@pytest.fixture
+def limited_meraki():
+    server = FakeMerakiServer(org_count=1, org_rate_limit=5).start()
+    yield server
+    server.stop()
+
+
+def test_fake_meraki_rate_limits_per_org(limited_meraki):
+    base = limited_meraki.base_url.split('/api/v1')[0]
+    org_id = limited_meraki.org_ids[0]
+    request = ('GET', f"/api/v1/organizations/{org_id}", None, {'Authorization': 'Bearer key'})
+    result = run_scenario(base, lambda: request, 200, concurrency=2, duration=5, max_requests=20)
+    # The bucket starts with 5 tokens and refills at 5/s; the rest get 429
+    assert 5 <= result['requests'] - result['errors'] < 20
+    assert limited_meraki.request_counts['rate_limited'] == result['errors']
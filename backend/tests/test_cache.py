@@ -0,0 +1,91 @@
+import json
+import time
+
+from services.cache import CacheEntry, LRUCache, RedisCache, TieredCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1, 60)
+    cache.set('b', 2, 60)
+    assert cache.get('a').value == 1  # a is now the most recent
+    cache.set('c', 3, 60)
+    assert cache.get('b') is None
+    assert cache.get('a').value == 1
+    assert len(cache) == 2
+
+
+def test_lru_stale_entries_need_allow_stale():
+    cache = LRUCache(stale_ttl=60)
+    cache.set('a', 1, 0, expires_at=time.time() - 1)
+    assert cache.get('a') is None
+    entry = cache.get('a', allow_stale=True)
+    assert entry.value == 1 and not entry.fresh
+
+
+def test_lru_drops_entries_past_the_stale_window():
+    cache = LRUCache(stale_ttl=10)
+    cache.set('a', 1, 0, expires_at=time.time() - 11)
+    assert cache.get('a', allow_stale=True) is None
+    assert len(cache) == 0
+
+
+def test_redis_round_trip_keeps_expiry(fake_redis):
+    cache = RedisCache('redis://test', 'orgs:', stale_ttl=30)
+    entry = cache.set('k', [{'id': '1'}], 60)
+    got = cache.get('k')
+    assert got == CacheEntry([{'id': '1'}], entry.expires_at)
+    # Redis drops the key once the stale window is over too
+    assert 85000 < fake_redis.pttl('orgs:k') <= 90000
+
+
+def test_redis_stale_and_expired_entries(fake_redis):
+    cache = RedisCache('redis://test', 'orgs:', stale_ttl=30)
+    cache.set('stale', 1, 0, expires_at=time.time() - 1)
+    assert cache.get('stale') is None
+    assert cache.get('stale', allow_stale=True).value == 1
+    cache.set('gone', 1, 0, expires_at=time.time() - 31)
+    assert fake_redis.get('orgs:gone') is None
+
+
+def test_redis_malformed_entry_is_a_miss(fake_redis):
+    fake_redis.set('orgs:k', json.dumps({'value': 1}))
+    assert RedisCache('redis://test', 'orgs:').get('k') is None
+
+
+def test_redis_errors_are_misses():
+    # Nothing listens on port 1: every call fails with a connection error
+    cache = RedisCache('redis://127.0.0.1:1/0', 'orgs:')
+    assert cache.get('k') is None
+    assert cache.set('k', 1, 60).value == 1
+    cache.delete('k')
+
+
+def test_tiered_copies_shared_entry_with_its_expiry(fake_redis):
+    shared = RedisCache('redis://test', 'orgs:')
+    expires_at = shared.set('k', 'from-other-worker', 60).expires_at
+    cache = TieredCache(LRUCache(), shared)
+    assert cache.get('k').value == 'from-other-worker'
+    assert cache.local.get('k').expires_at == expires_at
+
+
+def test_tiered_prefers_newer_shared_entry_over_stale_local(fake_redis):
+    cache = TieredCache(LRUCache(stale_ttl=60), RedisCache('redis://test', 'orgs:', stale_ttl=60))
+    cache.local.set('k', 'old', 0, expires_at=time.time() - 1)
+    cache.shared.set('k', 'new', 60)
+    assert cache.get('k').value == 'new'
+
+
+def test_tiered_serves_stale_local_only_when_allowed():
+    cache = TieredCache(LRUCache(stale_ttl=60))
+    cache.local.set('k', 'old', 0, expires_at=time.time() - 1)
+    assert cache.get('k') is None
+    assert cache.get('k', allow_stale=True).value == 'old'
+
+
+def test_tiered_set_and_delete_write_both_tiers(fake_redis):
+    cache = TieredCache(LRUCache(), RedisCache('redis://test', 'orgs:'))
+    cache.set('k', 1, 60)
+    assert fake_redis.get('orgs:k') is not None
+    cache.delete('k')
+    assert cache.local.get('k') is None and fake_redis.get('orgs:k') is None
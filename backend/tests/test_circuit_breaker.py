@@ -0,0 +1,139 @@
+import pytest
+
+from routes import meraki
+from routes.meraki import _fetch_organizations_from_meraki
+from services import circuit_breaker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', clock)
+    return clock
+
+
+def _fail(breaker, key='k'):
+    with pytest.raises(RuntimeError):
+        breaker.call(key, _raise)
+
+
+def _raise():
+    raise RuntimeError('upstream down')
+
+
+def test_failure_is_cached_for_ttl(clock):
+    breaker = CircuitBreaker('test', failure_threshold=3, failure_ttl=10)
+    _fail(breaker)
+    with pytest.raises(CircuitOpen) as exc:
+        breaker.call('k', lambda: 'ok')
+    assert exc.value.last_error == 'upstream down'
+    assert exc.value.retry_after == pytest.approx(10)
+    assert breaker.state('k') == CLOSED
+
+    clock.now += 10
+    assert breaker.call('k', lambda: 'ok') == 'ok'
+    assert not breaker.failing('k')
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=30, failure_ttl=1)
+    for _ in range(3):
+        _fail(breaker)
+        clock.now += 1
+    assert breaker.state('k') == OPEN
+    with pytest.raises(CircuitOpen) as exc:
+        breaker.before('k')
+    assert exc.value.retry_after == pytest.approx(29)
+    # Other keys are unaffected
+    assert breaker.call('other', lambda: 'ok') == 'ok'
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=30)
+    _fail(breaker)
+    clock.now += 30
+    breaker.before('k')
+    assert breaker.state('k') == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before('k')
+    breaker.success('k')
+    assert breaker.state('k') == CLOSED
+    assert breaker.stats() == {}
+
+
+def test_failed_probe_doubles_reset_timeout_up_to_max(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=30, max_reset_timeout=100)
+    _fail(breaker)
+    timeouts = []
+    for _ in range(3):
+        clock.now += 1000
+        _fail(breaker)  # the probe
+        with pytest.raises(CircuitOpen) as exc:
+            breaker.before('k')
+        timeouts.append(round(exc.value.retry_after))
+    assert timeouts == [60, 100, 100]
+    assert breaker.state('k') == OPEN
+
+
+def test_stuck_probe_expires(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=30, max_reset_timeout=60)
+    _fail(breaker)
+    clock.now += 30
+    breaker.before('k')  # probe that never reports back
+    clock.now += 30
+    with pytest.raises(CircuitOpen):
+        breaker.before('k')
+    clock.now += 31
+    breaker.before('k')
+    assert breaker.state('k') == HALF_OPEN
+
+
+def test_organizations_fall_back_to_last_good_list(client, auth_headers, organizations_upstream):
+    headers = auth_headers('user@example.com')
+    assert client.get('/api/meraki/organizations', headers=headers).status_code == 200
+
+    # The cached entry is gone (evicted / past its stale window) and Meraki is down
+    meraki.configure_organizations_cache(None)
+    organizations_upstream.error = RuntimeError('503 from Meraki')
+    response = client.get('/api/meraki/organizations', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['X-Organizations-Stale'] == 'unavailable'
+    assert [org['id'] for org in response.get_json()] == ['1']
+
+
+class _DownDashboard:
+    """_dashboard_client() stand-in whose getOrganizations always fails."""
+
+    def __init__(self):
+        self.calls = 0
+        self.organizations = self
+
+    def getOrganizations(self, **kwargs):
+        self.calls += 1
+        raise RuntimeError('503 from Meraki')
+
+
+def test_organizations_fail_fast_while_the_circuit_is_open(client, auth_headers, organizations_upstream,
+                                                            monkeypatch):
+    down = _DownDashboard()
+    # Through the real fetch (and its circuit breaker) this time
+    monkeypatch.setattr(meraki, '_fetch_organizations_from_meraki', _fetch_organizations_from_meraki)
+    monkeypatch.setattr(meraki, '_dashboard_client', lambda api_key: down)
+    headers = auth_headers('user@example.com')
+    assert client.get('/api/meraki/organizations', headers=headers).status_code == 502
+    assert down.calls == 1
+
+    # Further misses within the failure TTL do not call Meraki again
+    response = client.get('/api/meraki/organizations', headers=headers)
+    assert response.status_code == 502 and int(response.headers['Retry-After']) >= 1
+    assert down.calls == 1
+    assert meraki._organizations_breaker.failing(meraki._cache_key('test-api-key'))
@@ -0,0 +1,100 @@
+import time
+
+import jwt
+import pytest
+
+from routes import auth as auth_routes
+from services import code_store
+from services.code_store import MemoryCodeStore, RedisCodeStore
+
+USER = {'email': 'user@example.com', 'name': 'User', 'role': 'user'}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(code_store.time, 'time', clock)
+    return clock
+
+
+def test_memory_codes_redeem_once(clock):
+    store = MemoryCodeStore()
+    store.put('code', {'user_data': USER}, 60)
+    assert store.pop('code') == {'user_data': USER}
+    assert store.pop('code') is None
+    assert store.pop('unknown') is None
+
+
+def test_memory_codes_expire_and_are_swept(clock):
+    store = MemoryCodeStore()
+    for i in range(100):
+        store.put(f"old-{i}", {}, 60)
+    clock.now += 30
+    store.put('new', {}, 60)
+    assert len(store) == 101
+
+    clock.now += 31
+    assert store.pop('old-0') is None
+    assert len(store) == 1 and len(store._expiry_heap) == 1
+    assert store.pop('new') == {}
+
+
+def test_memory_reissued_code_keeps_its_new_expiry(clock):
+    store = MemoryCodeStore()
+    store.put('code', {'n': 1}, 10)
+    store.put('code', {'n': 2}, 60)
+    clock.now += 20
+    # The stale heap entry for the first put must not drop the reissued code
+    assert store.pop('code') == {'n': 2}
+
+
+def test_redis_codes_redeem_once(fake_redis):
+    store = RedisCodeStore('redis://test')
+    store.put('code', {'user_data': USER}, 60)
+    assert 0 < fake_redis.ttl('meraki-admin-jit:code:code') <= 60
+    assert len(store) == 1
+    assert store.pop('code') == {'user_data': USER}
+    assert store.pop('code') is None
+    assert len(store) == 0
+
+    fake_redis.set('meraki-admin-jit:code:bad', 'not json')
+    assert store.pop('bad') is None
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def codes(request, monkeypatch):
+    if request.param == 'redis':
+        request.getfixturevalue('fake_redis')
+        store = RedisCodeStore('redis://test')
+    else:
+        store = MemoryCodeStore()
+    monkeypatch.setattr(auth_routes, '_one_time_codes', store)
+    return store
+
+
+def test_token_exchange_redeems_code_once(app, client, codes):
+    codes.put('abc', {'user_data': USER, 'expires_at': time.time() + 60}, 60)
+    response = client.post('/api/auth/token', json={'code': 'abc'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['user']['email'] == 'user@example.com'
+    claims = jwt.decode(body['access_token'], app.config['SECRET_KEY'], algorithms=['HS256'])
+    assert claims['sub'] == 'user@example.com'
+
+    replay = client.post('/api/auth/token', json={'code': 'abc'})
+    assert replay.status_code == 401
+
+
+def test_token_exchange_rejects_missing_and_expired_codes(client, codes):
+    assert client.post('/api/auth/token', json={}).status_code == 400
+    codes.put('late', {'user_data': USER, 'expires_at': time.time() - 1}, 60)
+    response = client.post('/api/auth/token', json={'code': 'late'})
+    assert response.status_code == 401 and response.get_json()['error'] == 'Code expired'
@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from routes import events as events_routes
+from services.events import AUDIENCE_ALL, EventBus, TooManySubscribers, get_event_bus
+
+
+def _ids(sub, count):
+    return [sub.get(0.1)[1] for _ in range(count)]
+
+
+def test_audience_filters_subscribers():
+    bus = EventBus()
+    requester, approver, other = (bus.subscribe('a@example.com')[0], bus.subscribe('x@example.com', True)[0],
+                                  bus.subscribe('b@example.com')[0])
+    bus.deliver('access-request', {'n': 1}, {'emails': ['a@example.com'], 'approvers': True})
+    bus.deliver('organizations', {'n': 2}, AUDIENCE_ALL)
+    assert _ids(requester, 2) == ['access-request', 'organizations']
+    assert _ids(approver, 2) == ['access-request', 'organizations']
+    assert _ids(other, 1) == ['organizations']
+    assert other.get(0.01) is None
+
+
+def test_slow_subscriber_overflows_instead_of_growing():
+    bus = EventBus(max_queue=2)
+    sub, _ = bus.subscribe('a@example.com')
+    for n in range(5):
+        bus.deliver('grant', {'n': n})
+    # The backlog was dropped (the stream sends 'resync'); later events still arrive
+    assert sub.overflowed
+    assert [sub.get(0.01)[2]['n'] for _ in range(2)] == [3, 4]
+    assert sub.get(0.01) is None
+
+
+def test_resume_from_last_event_id():
+    bus = EventBus(history=3)
+    first, _ = bus.subscribe('a@example.com')
+    for n in range(4):
+        bus.deliver('grant', {'n': n}, {'emails': ['a@example.com' if n % 2 else 'b@example.com']})
+    seen = first.get(0.1)[0]
+    first.close()
+
+    _, missed = bus.subscribe('a@example.com', last_event_id=seen)
+    assert [data['n'] for _, _, data in missed] == [3]
+    _, missed = bus.subscribe('a@example.com', last_event_id='unknown')
+    assert missed is None
+
+
+def test_subscriber_cap():
+    bus = EventBus()
+    subs = [bus.subscribe(f"user{n}@example.com", max_subscribers=2)[0] for n in range(2)]
+    with pytest.raises(TooManySubscribers):
+        bus.subscribe('late@example.com', max_subscribers=2)
+    subs[0].close()
+    bus.subscribe('late@example.com', max_subscribers=2)
+    assert bus.subscriber_count() == 2
+
+
+def _frames(response, count):
+    """First count SSE frames of a streamed response."""
+    frames, buffer = [], ''
+    chunks = iter(response.response)
+    while len(frames) < count:
+        buffer += next(chunks).decode()
+        while '\n\n' in buffer:
+            frame, buffer = buffer.split('\n\n', 1)
+            frames.append(frame)
+    return frames[:count]
+
+
+@pytest.fixture
+def open_streams(monkeypatch):
+    monkeypatch.setattr(events_routes, 'EVENTS_HEARTBEAT_SECONDS', 0.05)
+    responses = []
+    yield responses
+    for response in responses:
+        response.close()
+
+
+def test_stream_delivers_own_events_and_heartbeats(client, auth_headers, open_streams):
+    response = client.get('/api/events', headers=auth_headers('stream@example.com'), buffered=False)
+    open_streams.append(response)
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+
+    get_event_bus().publish('access-request', {'action': 'status'}, {'emails': ['someone@example.com']})
+    get_event_bus().publish('access-request', {'action': 'status'}, {'emails': ['stream@example.com']})
+    retry, first, heartbeat = _frames(response, 3)
+    assert retry == f"retry: {events_routes.EVENTS_RETRY_MS}"
+    lines = dict(line.split(': ', 1) for line in first.splitlines())
+    assert lines['event'] == 'access-request' and json.loads(lines['data']) == {'action': 'status'}
+    assert heartbeat == ': keepalive'
+
+
+def test_streams_beyond_the_limit_get_503(client, auth_headers, open_streams, monkeypatch):
+    monkeypatch.setattr(events_routes, 'EVENTS_MAX_STREAMS', get_event_bus().subscriber_count() + 1)
+    headers = auth_headers('stream@example.com')
+    first = client.get('/api/events', headers=headers, buffered=False)
+    open_streams.append(first)
+    assert first.status_code == 200
+
+    refused = client.get('/api/events', headers=headers, buffered=False)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == str(events_routes.EVENTS_FULL_RETRY_SECONDS)
+
+    # Closing a stream frees its slot
+    _frames(first, 1)
+    first.close()
+    open_streams.remove(first)
+    again = client.get('/api/events', headers=headers, buffered=False)
+    open_streams.append(again)
+    assert again.status_code == 200
@@ -0,0 +1,121 @@
+import time
+
+from services.access_requests import utc_iso
+from services.database import Database
+from services.grant_expiry import ExpiryQueue, GrantExpiry
+from services.provisioning import GrantStore
+
+
+def test_pop_due_in_expiry_order():
+    queue = ExpiryQueue()
+    queue.push('b', 20)
+    queue.push('a', 10)
+    queue.push('c', 30)
+    assert queue.pop_due(now=25, limit=10) == ['a', 'b']
+    assert queue.next_due() == 30
+    assert len(queue) == 1
+
+
+def test_push_reports_new_earliest():
+    queue = ExpiryQueue()
+    assert queue.push('a', 10)
+    assert not queue.push('b', 20)
+    assert queue.push('c', 5)
+
+
+def test_repush_supersedes_previous_expiry():
+    queue = ExpiryQueue()
+    queue.push('a', 10)
+    queue.push('a', 50)
+    assert queue.next_due() == 50
+    assert queue.pop_due(now=20, limit=10) == []
+    assert queue.pop_due(now=50, limit=10) == ['a']
+    assert queue.next_due() is None
+
+
+def test_discard_is_skipped_lazily():
+    queue = ExpiryQueue()
+    queue.push('a', 10)
+    queue.push('b', 20)
+    queue.discard('a')
+    assert len(queue) == 1
+    assert queue.next_due() == 20
+    assert queue.pop_due(now=100, limit=10) == ['b']
+
+
+def test_pop_due_respects_limit():
+    queue = ExpiryQueue()
+    for i in range(5):
+        queue.push(i, i)
+    assert queue.pop_due(now=10, limit=2) == [0, 1]
+    assert queue.pop_due(now=10, limit=10) == [2, 3, 4]
+
+
+class _Scheduler:
+    def __init__(self):
+        self.jobs = {}
+
+    def schedule(self, name, fn, delay):
+        self.jobs[name] = delay
+
+    def cancel(self, name):
+        self.jobs.pop(name, None)
+
+    def has_job(self, name):
+        return name in self.jobs
+
+
+def _active_grant(store, expires_at):
+    store.enqueue([{'request_num': 1, 'position': 0, 'org_id': 'org-1', 'email': 'a@example.com',
+                    'permission': 'read'}])
+    grant = store.claim('queued', 'submitting')[0]
+    store.update([(grant, 'active', {'expires_at': utc_iso(expires_at)})])
+
+
+def test_run_expires_grants_it_never_tracked():
+    store = GrantStore(Database(':memory:'))
+    _active_grant(store, time.time() - 1)
+    expiring = []
+    expiry = GrantExpiry(store, _Scheduler(), lambda: expiring.append(True))
+    assert len(expiry.queue) == 0
+
+    assert expiry._run() is None
+    assert expiring == [True]
+    assert store.statuses([1])[(1, 0)]['status'] == 'expiring'
+
+
+def test_arm_uses_database_expiry():
+    store = GrantStore(Database(':memory:'))
+    _active_grant(store, time.time() + 600)
+    scheduler = _Scheduler()
+    expiry = GrantExpiry(store, scheduler, lambda: None)
+    expiry._arm()
+    assert 590 < scheduler.jobs[expiry.job_name] <= 600
+
+
+def _plan(store, sql, params):
+    return ' '.join(row['detail'] for row in store.db.connection().execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def test_expiry_queries_use_the_expiry_index():
+    store = GrantStore(Database(':memory:'))
+    due = _plan(store, "SELECT request_num, position FROM access_grants "
+                       "WHERE status = 'active' AND expires_at <= ? ORDER BY expires_at LIMIT ?", (utc_iso(), 500))
+    assert 'idx_access_grants_expiry' in due and 'TEMP B-TREE' not in due
+    earliest = _plan(store, "SELECT MIN(expires_at) AS expires_at FROM access_grants WHERE status = 'active'", ())
+    assert 'idx_access_grants_expiry' in earliest
+
+
+def test_expiry_index_added_to_existing_database(tmp_path):
+    path = str(tmp_path / 'grants.sqlite3')
+    # access_grants as first shipped: no expires_at column
+    old = Database(path)
+    old.connection().executescript(
+        "CREATE TABLE access_grants (request_num INTEGER NOT NULL, position INTEGER NOT NULL, "
+        "org_id TEXT NOT NULL, email TEXT NOT NULL, name TEXT, org_access TEXT NOT NULL, status TEXT NOT NULL, "
+        "action TEXT, action_index INTEGER, batch_id TEXT, admin_id TEXT, previous_access TEXT, error TEXT, "
+        "created_at TEXT NOT NULL, updated_at TEXT NOT NULL, PRIMARY KEY (request_num, position)) WITHOUT ROWID;"
+    )
+    store = GrantStore(Database(path))
+    indexes = {row['name'] for row in store.db.connection().execute("PRAGMA index_list(access_grants)")}
+    assert 'idx_access_grants_expiry' in indexes
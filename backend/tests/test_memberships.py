@@ -0,0 +1,120 @@
+import pytest
+
+from routes import meraki
+from services.memberships import MembershipCrawler, MembershipIndex
+
+
+def _admin(email, org_access='read-only', networks=(), tags=()):
+    return {'email': email, 'orgAccess': org_access, 'networks': list(networks), 'tags': list(tags)}
+
+
+def test_update_org_indexes_by_email_copy_on_write():
+    index = MembershipIndex()
+    assert index.update_org('1', [_admin('A@Example.com', 'full'), _admin('b@example.com', 'none'),
+                                  _admin('c@example.com', 'none', networks=[{'id': 'N1', 'access': 'read-only'}])])
+    before = index.for_email('a@example.com')
+    assert before['1'].to_dict() == {'access': 'full', 'networks': [], 'tags': []}
+    # orgAccess 'none' with no network or tag privileges is not a membership
+    assert index.for_email('b@example.com') == {}
+    assert index.for_email(' C@example.com ')['1'].networks == ({'id': 'N1', 'access': 'read-only'},)
+
+    version = index.version
+    assert not index.update_org('1', [_admin('a@example.com', 'full'),
+                                      _admin('c@example.com', 'none', networks=[{'id': 'N1', 'access': 'read-only'}])])
+    assert index.version == version
+
+    index.update_org('2', [_admin('a@example.com')])
+    assert index.update_org('1', [])
+    assert list(index.for_email('a@example.com')) == ['2'] and index.for_email('c@example.com') == {}
+    # Readers holding the old dict never see it change
+    assert list(before) == ['1']
+
+
+def test_retain_invalidate_and_due_order():
+    index = MembershipIndex()
+    index.update_org('1', [_admin('a@example.com')], crawled_at=100)
+    index.update_org('2', [_admin('a@example.com')], crawled_at=50)
+    index.update_org('3', [_admin('b@example.com')], crawled_at=200)
+    assert index.due(['1', '2', '3', '4'], max_age=60, limit=10, now=170) == ['4', '2', '1']
+    assert index.due(['1', '2', '3', '4'], max_age=60, limit=2, now=170) == ['4', '2']
+
+    index.invalidate('3')
+    assert index.due(['3'], max_age=60, limit=10, now=170) == ['3']
+    assert index.retain(['1', '3']) == 1
+    assert list(index.for_email('a@example.com')) == ['1'] and index.covers(['1', '3'])
+    index.retry_later('3', retry_at=500, max_age=60)
+    assert index.due(['3'], max_age=60, limit=10, now=499) == []
+    assert index.due(['3'], max_age=60, limit=10, now=500) == ['3']
+
+
+class _Admins:
+    """fetch_admins stand-in: admins per org, some orgs failing."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, org_ids):
+        self.calls.append(list(org_ids))
+        results = {o: [_admin(f"admin{o}@example.com")] for o in org_ids if o not in self.failing}
+        return results, {o: RuntimeError('429') for o in org_ids if o in self.failing}
+
+
+def test_crawler_spreads_a_pass_over_batches():
+    index, admins = MembershipIndex(), _Admins()
+    org_ids = ['1', '2', '3', '4', '5']
+    crawler = MembershipCrawler(index, lambda: org_ids, admins, max_age=3600, batch_size=2, min_interval=30)
+    assert crawler.run_once() == 0.0 and crawler.run_once() == 0.0
+    assert not index.ready
+    assert 3500 < crawler.run_once() <= 3600
+    assert index.ready and admins.calls == [['1', '2'], ['3', '4'], ['5']]
+    assert list(index.for_email('admin5@example.com')) == ['5']
+
+    # Nothing due: no fetch; a removed organization is forgotten
+    org_ids.remove('5')
+    crawler.run_once()
+    assert len(admins.calls) == 3 and index.for_email('admin5@example.com') == {}
+
+
+def test_crawler_retries_failed_organizations_later():
+    index, admins = MembershipIndex(), _Admins(failing={'2'})
+    crawler = MembershipCrawler(index, lambda: ['1', '2'], admins, max_age=3600, batch_size=10,
+                                retry_seconds=120, min_interval=30)
+    delay = crawler.run_once()
+    # A failed crawl still counts towards readiness and is due again after retry_seconds
+    assert index.ready and 90 < delay <= 120
+    assert index.for_email('admin2@example.com') == {}
+
+
+@pytest.fixture
+def membership_index(monkeypatch, organizations_upstream):
+    organizations_upstream.orgs = [
+        {'id': str(n), 'name': name, 'url': f"https://example.com/{n}"}
+        for n, name in ((1, 'Zulu'), (2, 'alpha'), (3, 'Mike'))
+    ]
+    index = MembershipIndex()
+    monkeypatch.setattr(meraki, '_memberships', index)
+    meraki._membership_views.clear()
+    return index
+
+
+def test_my_organizations_reads_the_index(client, auth_headers, membership_index, organizations_upstream):
+    headers = auth_headers('member@example.com')
+    membership_index.update_org('1', [_admin('member@example.com', 'full')])
+    membership_index.update_org('2', [_admin('member@example.com', 'none', tags=[{'tag': 'lab', 'access': 'full'}])])
+    membership_index.update_org('9', [_admin('member@example.com')])  # not in the organization list
+
+    # Until the first full crawl, the user key's list is returned
+    assert len(client.get('/api/meraki/my-organizations', headers=headers).get_json()) == 3
+
+    membership_index.ready = True
+    body = client.get('/api/meraki/my-organizations', headers=headers).get_json()
+    assert [(o['id'], o['access']) for o in body] == [('2', 'none'), ('1', 'full')]
+    assert body[0]['tags'] == [{'tag': 'lab', 'access': 'full'}] and body[1]['link'] == 'https://example.com/1'
+    assert client.get('/api/meraki/my-organizations', headers=auth_headers('nobody@example.com')).get_json() == []
+
+    # A membership change shows up on the next request
+    membership_index.update_org('3', [_admin('member@example.com')])
+    body = client.get('/api/meraki/my-organizations', headers=headers).get_json()
+    assert [o['id'] for o in body] == ['2', '3', '1']
+    assert len(organizations_upstream.calls) == 1
@@ -0,0 +1,86 @@
+from meraki import DashboardAPI
+
+from services.meraki_clients import DashboardClientPool, RateLimitedAdapter, _http_session
+from services.rate_limit import RateLimiter
+
+
+class _Client:
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.closed = False
+
+
+def _pool(**kwargs):
+    built = []
+
+    def factory(api_key):
+        client = _Client(api_key)
+        built.append(client)
+        return client
+    return DashboardClientPool(factory, **kwargs), built
+
+
+def test_reuses_one_client_per_key():
+    pool, built = _pool()
+    first = pool.get('hash-a', 'key-a')
+    assert pool.get('hash-a', 'key-a') is first
+    assert pool.get('hash-b', 'key-b') is not first
+    assert [c.api_key for c in built] == ['key-a', 'key-b']
+
+
+def test_bounded_by_lru():
+    pool, _ = _pool(max_clients=2)
+    a = pool.get('a', 'a')
+    pool.get('b', 'b')
+    pool.get('a', 'a')
+    pool.get('c', 'c')
+    assert len(pool) == 2
+    assert pool.get('a', 'a') is a
+    assert pool.get('b', 'b') is not None and len(pool) == 2
+
+
+def test_idle_clients_are_dropped():
+    pool, built = _pool(idle_timeout=0)
+    first = pool.get('a', 'a')
+    pool.get('b', 'b')  # a has been idle longer than idle_timeout
+    assert len(pool) == 1
+    assert pool.get('a', 'a') is not first
+    assert len(built) == 3
+
+
+def test_discard_and_clear():
+    pool, built = _pool()
+    pool.get('a', 'a')
+    pool.discard('a')
+    assert len(pool) == 0
+    pool.get('b', 'b')
+    pool.clear()
+    assert len(pool) == 0
+
+
+def test_pooled_sdk_client_keeps_connections_alive(fake_meraki, monkeypatch):
+    limiter = RateLimiter(key_rate=1000, org_rate=1000)
+    connections = []
+    accept = fake_meraki._httpd.process_request
+
+    def process_request(request, client_address):
+        connections.append(1)
+        return accept(request, client_address)
+    monkeypatch.setattr(fake_meraki._httpd, 'process_request', process_request)
+
+    def factory(api_key):
+        return DashboardAPI(api_key=api_key, base_url=fake_meraki.base_url, suppress_logging=True)
+
+    pool = DashboardClientPool(factory, limiter=limiter)
+    for _ in range(5):
+        client = pool.get('hash', 'any-key')
+        orgs = client.organizations.getOrganizations()
+        assert len(orgs) == 20
+    org_id = orgs[0]['id']
+    client.organizations.getOrganizationAdmins(org_id)
+
+    adapter = _http_session(client).get_adapter(fake_meraki.base_url)
+    assert isinstance(adapter, RateLimitedAdapter)
+    # Every request went through the limiter, over a single keep-alive connection
+    assert limiter.stats()['acquired'] == 6
+    assert connections == [1]
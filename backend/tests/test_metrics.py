@@ -0,0 +1,59 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from routes import metrics as metrics_routes
+from services.metrics import JWT_VERIFICATION_SECONDS, meraki_endpoint, observe_meraki, timed
+
+TOKEN = {'Authorization': 'Bearer test-metrics-token'}
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_meraki_endpoint_labels_hide_ids():
+    assert meraki_endpoint('https://api.meraki.com/api/v1/organizations/123456/admins?perPage=10') == \
+        '/organizations/{id}/admins'
+    assert meraki_endpoint('http://127.0.0.1:9/api/v1/networks/N_12/devices') == '/networks/{id}/devices'
+    assert meraki_endpoint('/organizations') == '/organizations'
+
+
+def test_observe_meraki_counts_errors():
+    labels = {'method': 'GET', 'endpoint': '/organizations/{id}'}
+    before = _sample('meraki_request_errors_total', **labels, reason='429')
+    observe_meraki('get', 'https://api.meraki.com/api/v1/organizations/1', 0.01, status=200)
+    observe_meraki('get', 'https://api.meraki.com/api/v1/organizations/2', 0.01, status=429)
+    assert _sample('meraki_request_errors_total', **labels, reason='429') == before + 1
+
+
+def test_timed_labels_outcome_and_errors():
+    before = {o: _sample('jwt_verification_seconds_count', outcome=o) for o in ('valid', 'error')}
+    with timed(JWT_VERIFICATION_SECONDS, {}) as outcome:
+        outcome['outcome'] = 'valid'
+    with pytest.raises(RuntimeError):
+        with timed(JWT_VERIFICATION_SECONDS, {}):
+            raise RuntimeError()
+    assert _sample('jwt_verification_seconds_count', outcome='valid') == before['valid'] + 1
+    assert _sample('jwt_verification_seconds_count', outcome='error') == before['error'] + 1
+
+
+def test_scrape_requires_token(client):
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers=TOKEN)
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    assert b'http_request_duration_seconds' in response.data
+
+
+def test_scrape_without_token_is_opt_in(client, monkeypatch):
+    monkeypatch.setattr(metrics_routes, 'METRICS_TOKEN', '')
+    assert client.get('/metrics').status_code == 403
+    monkeypatch.setattr(metrics_routes, 'METRICS_PUBLIC', True)
+    assert client.get('/metrics').status_code == 200
+
+
+def test_requests_recorded_by_route_rule(client, auth_headers):
+    labels = {'method': 'GET', 'route': '/api/access-requests/<request_id>', 'status': '404'}
+    before = _sample('http_request_duration_seconds_count', **labels)
+    client.get('/api/access-requests/req-99999', headers=auth_headers('user@example.com'))
+    assert _sample('http_request_duration_seconds_count', **labels) == before + 1
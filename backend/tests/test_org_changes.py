@@ -0,0 +1,90 @@
+from services.org_changes import ChangeFeed, merge_organizations
+
+
+def _entry(raw):
+    return raw['id'], raw['name'], raw['url']
+
+
+def _raw(*orgs):
+    return [{'id': org_id, 'name': name, 'url': f"https://example.com/{org_id}"} for org_id, name in orgs]
+
+
+def test_initial_list():
+    orgs, diff = merge_organizations('key', None, _raw(('1', 'One'), ('2', 'Two')), _entry)
+    assert [org['id'] for org in orgs] == ['1', '2']
+    assert diff.initial
+    assert [org['id'] for org in diff.added] == ['1', '2']
+    assert diff.count == 2
+
+
+def test_unchanged_refresh_returns_previous_list_object():
+    previous, _ = merge_organizations('key', None, _raw(('1', 'One'), ('2', 'Two')), _entry)
+    orgs, diff = merge_organizations('key', previous, _raw(('1', 'One'), ('2', 'Two')), _entry)
+    assert orgs is previous
+    assert not diff.changed
+    assert not diff.initial
+
+
+def test_changes_reuse_unchanged_dicts():
+    previous, _ = merge_organizations('key', None, _raw(('1', 'One'), ('2', 'Two'), ('3', 'Three')), _entry)
+    orgs, diff = merge_organizations('key', previous, _raw(('1', 'One'), ('2', 'Deux'), ('4', 'Four')), _entry)
+    assert orgs[0] is previous[0]
+    assert orgs[1] is not previous[1] and orgs[1]['name'] == 'Deux'
+    assert [org['id'] for org in diff.added] == ['4']
+    assert [org['id'] for org in diff.removed] == ['3']
+    assert [(old['name'], new['name']) for old, new in diff.renamed] == [('Two', 'Deux')]
+    assert diff.changed
+    assert diff.summary() == {'added': ['4'], 'removed': ['3'], 'renamed': ['2'], 'relinked': [],
+                              'truncated': False}
+
+
+def test_reorder_is_not_a_change():
+    previous, _ = merge_organizations('key', None, _raw(('1', 'One'), ('2', 'Two')), _entry)
+    orgs, diff = merge_organizations('key', previous, _raw(('2', 'Two'), ('1', 'One')), _entry)
+    assert orgs is previous
+    assert not diff.changed
+
+
+def test_relinked():
+    previous, _ = merge_organizations('key', None, _raw(('1', 'One'), ('2', 'Two')), _entry)
+    raw = _raw(('2', 'Two'), ('1', 'One'))
+
+    raw[0]['url'] = 'https://example.com/moved'
+    orgs, diff = merge_organizations('key', previous, raw, _entry)
+    assert [new['link'] for _, new in diff.relinked] == ['https://example.com/moved']
+    assert diff.changed and orgs[1] is previous[0]
+
+
+def test_change_feed_history_and_subscribers():
+    feed = ChangeFeed(keep=2)
+    seen = []
+    feed.subscribe(seen.append)
+
+    def broken(diff):
+        raise RuntimeError('subscriber bug')
+    feed.subscribe(broken)
+
+    diffs = [merge_organizations(str(i), None, _raw(('1', 'One')), _entry)[1] for i in range(3)]
+    seqs = [feed.publish(diff) for diff in diffs]
+    assert seqs == [1, 2, 3]
+    assert seen == diffs
+    assert [seq for seq, _ in feed.since(0)] == [2, 3]
+    assert feed.since(3) == []
+    assert feed.last_seq == 3
+
+
+def test_reordered_refresh_publishes_nothing(organizations_upstream):
+    from routes import meraki
+    organizations_upstream.orgs = _raw(('1', 'One'), ('2', 'Two'), ('3', 'Three'))
+    cache_key = meraki._cache_key('test-api-key')
+    first = meraki._load_organizations('test-api-key', cache_key)
+    seq = meraki.organization_changes.last_seq
+
+    organizations_upstream.orgs.reverse()
+    assert meraki._load_organizations('test-api-key', cache_key) is first
+    assert meraki.organization_changes.last_seq == seq
+
+    organizations_upstream.orgs[0]['name'] = 'Drei'
+    meraki._load_organizations('test-api-key', cache_key)
+    (_, diff), = meraki.organization_changes.since(seq)
+    assert diff.summary()['renamed'] == ['3']
@@ -0,0 +1,75 @@
+import pytest
+
+from services.org_index import OrganizationIndex, decode_cursor, encode_cursor
+
+ORGS = [
+    {'id': '300', 'name': 'Charlie Labs', 'link': ''},
+    {'id': '100', 'name': 'alpha retail', 'link': ''},
+    {'id': '200', 'name': 'Bravo Retail', 'link': ''},
+    {'id': '400', 'name': 'Alpine', 'link': ''},
+]
+
+
+def _ids(items):
+    return [org['id'] for org in items]
+
+
+def test_sorted_pages():
+    index = OrganizationIndex(ORGS)
+    items, total, next_offset = index.search(sort='name', limit=3)
+    assert _ids(items) == ['100', '400', '200'] and total == 4 and next_offset == 3
+    items, _, next_offset = index.search(sort='name', offset=3, limit=3)
+    assert _ids(items) == ['300'] and next_offset is None
+    assert _ids(index.search(sort='-id')[0]) == ['400', '300', '200', '100']
+    assert _ids(index.search(sort='-name', offset=1, limit=2)[0]) == ['200', '400']
+
+
+def test_contains_matches_name_or_id_case_insensitively():
+    index = OrganizationIndex(ORGS)
+    assert _ids(index.search(q='RETAIL')[0]) == ['100', '200']
+    assert _ids(index.search(q='30')[0]) == ['300']  # short query: scan
+    assert _ids(index.search(q='nothing')[0]) == []
+
+
+def test_prefix_matches_names_only():
+    index = OrganizationIndex(ORGS)
+    assert _ids(index.search(q='alp', match='prefix', sort='-name')[0]) == ['400', '100']
+    assert _ids(index.search(q='retail', match='prefix')[0]) == []
+
+
+def test_get_by_id():
+    index = OrganizationIndex(ORGS)
+    assert index.get('200')['name'] == 'Bravo Retail'
+    assert index.get('999') is None
+
+
+def test_cursor_round_trip_and_validation():
+    assert decode_cursor(encode_cursor(250)) == 250
+    for bad in ('!!', encode_cursor(-1), 'abc'):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+def test_route_pages_and_searches(client, auth_headers, organizations_upstream):
+    organizations_upstream.orgs = [
+        {'id': str(i), 'name': f"Org {i:03d}", 'url': f"https://example.com/{i}"} for i in range(250)
+    ]
+    headers = auth_headers('user@example.com')
+
+    first = client.get('/api/meraki/organizations?limit=100', headers=headers).get_json()
+    assert first['total'] == 250 and len(first['items']) == 100
+    second = client.get(f"/api/meraki/organizations?limit=100&cursor={first['next_cursor']}",
+                        headers=headers).get_json()
+    assert second['items'][0]['name'] == 'Org 100'
+
+    found = client.get('/api/meraki/organizations?q=org 12&match=prefix&sort=-name', headers=headers).get_json()
+    assert [org['name'] for org in found['items']][:2] == ['Org 129', 'Org 128']
+    assert found['total'] == 10 and found['next_cursor'] is None
+    # Without paging parameters the full list keeps its original shape
+    assert len(client.get('/api/meraki/organizations', headers=headers).get_json()) == 250
+
+
+@pytest.mark.parametrize('query', ['sort=size', 'match=regex', 'limit=0', 'limit=x', 'cursor=!!'])
+def test_route_rejects_bad_parameters(client, auth_headers, organizations_upstream, query):
+    response = client.get(f"/api/meraki/organizations?{query}", headers=auth_headers('user@example.com'))
+    assert response.status_code == 400
@@ -0,0 +1,42 @@
+import time
+
+from routes import meraki
+
+
+def _expire(api_key):
+    cache_key = meraki._cache_key(api_key)
+    entry = meraki._organizations_cache.get(cache_key)
+    meraki._organizations_cache.local.set(cache_key, entry.value, 0, expires_at=time.time() - 1)
+
+
+def test_miss_fetches_once_then_serves_from_cache(client, auth_headers, organizations_upstream):
+    for _ in range(3):
+        response = client.get('/api/meraki/organizations', headers=auth_headers('user@example.com'))
+        assert response.status_code == 200
+        assert response.get_json() == [{'id': '1', 'name': 'Org 1', 'link': 'https://example.com/1'}]
+    assert len(organizations_upstream.calls) == 1
+
+
+def test_expired_list_is_served_stale_and_refreshed(client, auth_headers, organizations_upstream):
+    headers = auth_headers('user@example.com')
+    client.get('/api/meraki/organizations', headers=headers)
+    _expire('test-api-key')
+
+    response = client.get('/api/meraki/organizations', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['X-Organizations-Stale'] == 'expired'
+
+    deadline = time.monotonic() + 5
+    while len(organizations_upstream.calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(organizations_upstream.calls) == 2
+    assert meraki._organizations_cache.get(meraki._cache_key('test-api-key')).fresh
+
+
+def test_refresh_reschedules_before_expiry(organizations_upstream):
+    delay = meraki._refresh_organizations('test-api-key')
+    expected = meraki.ORGANIZATIONS_CACHE_TTL_SECONDS - meraki.ORGANIZATIONS_REFRESH_AHEAD_SECONDS
+    assert expected - 5 < delay <= expected
+    # Still fresh outside the refresh-ahead window: no second fetch
+    meraki._refresh_organizations('test-api-key')
+    assert len(organizations_upstream.calls) == 1
@@ -0,0 +1,93 @@
+import gzip
+import json
+import zlib
+
+from flask import Flask, request
+
+from services import payloads
+from services.payloads import MIN_COMPRESS_BYTES, PreparedPayload
+
+SMALL = [{'id': '1', 'name': 'Org 1'}]
+LARGE = [{'id': str(i), 'name': f"Organization {i}", 'link': ''} for i in range(100)]
+
+
+def _respond(payload, headers=None):
+    app = Flask(__name__)
+    with app.test_request_context('/', headers=headers or {}):
+        return payload.response(request)
+
+
+class _Deflate:
+    """Stand-in for the optional brotli module (zlib is always available)."""
+
+    @staticmethod
+    def compress(body, quality):
+        return zlib.compress(body)
+
+
+def test_body_matches_jsonify_shape_and_etag_is_stable():
+    payload = PreparedPayload({'b': 1, 'a': [1, 2]})
+    assert payload.body == b'{"a":[1,2],"b":1}\n'
+    assert payload.etag == PreparedPayload({'a': [1, 2], 'b': 1}).etag
+    assert payload.etag != PreparedPayload({'a': [1, 2], 'b': 2}).etag
+
+
+def test_small_bodies_are_not_compressed():
+    payload = PreparedPayload(SMALL)
+    assert len(payload.body) < MIN_COMPRESS_BYTES and payload.encodings == {}
+    response = _respond(payload, {'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' not in response.vary
+    assert json.loads(response.get_data()) == SMALL
+
+
+def test_gzip_variant_served_when_accepted():
+    payload = PreparedPayload(LARGE)
+    response = _respond(payload, {'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert json.loads(gzip.decompress(response.get_data())) == LARGE
+
+    identity = _respond(payload)
+    assert 'Content-Encoding' not in identity.headers
+    assert identity.get_data() == payload.body
+
+
+def test_brotli_preferred_unless_quality_is_lower(monkeypatch):
+    monkeypatch.setattr(payloads, 'brotli', _Deflate)
+    payload = PreparedPayload(LARGE)
+    assert set(payload.encodings) == {'gzip', 'br'}
+    assert _respond(payload, {'Accept-Encoding': 'gzip, br'}).headers['Content-Encoding'] == 'br'
+    assert _respond(payload, {'Accept-Encoding': 'br;q=0.5, gzip'}).headers['Content-Encoding'] == 'gzip'
+    assert _respond(payload, {'Accept-Encoding': 'br;q=0, gzip;q=0'}).get_data() == payload.body
+
+
+def test_if_none_match_returns_304():
+    payload = PreparedPayload(LARGE)
+    response = _respond(payload, {'If-None-Match': f'"{payload.etag}"'})
+    assert response.status_code == 304 and response.get_data() == b''
+    assert response.headers['ETag'] == f'"{payload.etag}"'
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert _respond(payload, {'If-None-Match': f'W/"{payload.etag}"'}).status_code == 304
+    assert _respond(payload, {'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_route_conditional_get_and_gzip(client, auth_headers, organizations_upstream):
+    organizations_upstream.orgs = [
+        {'id': str(i), 'name': f"Org {i}", 'url': f"https://example.com/{i}"} for i in range(50)
+    ]
+    headers = auth_headers('user@example.com')
+
+    first = client.get('/api/meraki/organizations', headers={**headers, 'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200 and first.headers['Content-Encoding'] == 'gzip'
+    orgs = json.loads(gzip.decompress(first.get_data()))
+    assert len(orgs) == 50
+    etag = first.headers['ETag']
+
+    again = client.get('/api/meraki/organizations', headers={**headers, 'If-None-Match': etag})
+    assert again.status_code == 304
+    assert len(organizations_upstream.calls) == 1
+
+    # Paged requests are built per query and bypass the prepared payload
+    page = client.get('/api/meraki/organizations?limit=10', headers={**headers, 'If-None-Match': etag})
+    assert page.status_code == 200 and len(page.get_json()['items']) == 10
@@ -0,0 +1,82 @@
+import time
+from collections import Counter
+
+import pytest
+
+from routes import profiling as profiling_routes
+from services.profiler import SamplingProfiler, collapsed_text, merge_stacks
+
+APPROVER = 'approver@example.com'
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile_samples_the_calling_thread():
+    profiler = SamplingProfiler(interval=0.001, keep=2)
+    handle = profiler.start()
+    _spin(0.1)
+    profile = profiler.stop(handle, route='/spin')
+    assert profile.samples > 0 and profile.duration >= 0.1
+    assert f"{__name__}:_spin" in profile.collapsed()
+    assert profile.summary()['route'] == '/spin'
+    assert profiler.get(profile.id) is profile
+    assert profiler.stop(handle) is None
+
+
+def test_ring_buffer_keeps_newest_and_discard_keeps_nothing():
+    profiler = SamplingProfiler(interval=0.001, keep=2)
+    ids = [profiler.stop(profiler.start()).id for _ in range(3)]
+    profiler.discard(profiler.start())
+    assert [p.id for p in profiler.profiles()] == [ids[2], ids[1]]
+    assert profiler.get(ids[0]) is None
+
+
+def test_collapsed_text_merges_and_orders_by_weight():
+    class _P:
+        def __init__(self, stacks):
+            self.stacks = Counter(stacks)
+
+    merged = merge_stacks([_P({'a;b': 1, 'a;c': 2}), _P({'a;b': 3})])
+    assert collapsed_text(merged) == 'a;b 4\na;c 2\n'
+
+
+@pytest.fixture
+def profiling(monkeypatch):
+    monkeypatch.setattr(profiling_routes, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(profiling_routes, '_profiler', SamplingProfiler(interval=0.001, keep=10))
+
+
+def test_approver_trace_returns_profile_id(client, auth_headers, profiling):
+    approver = auth_headers(APPROVER)
+    response = client.get('/api/access-requests', headers={**approver, 'X-Profile': '1'})
+    assert response.status_code == 200
+    profile_id = response.headers['X-Profile-Id']
+
+    listed = client.get('/api/profiles?route=/api/access-requests', headers=approver).get_json()
+    assert listed['enabled'] and [p['id'] for p in listed['items']] == [profile_id]
+    assert listed['items'][0]['traced'] and listed['items'][0]['status'] == 200
+
+    folded = client.get(f"/api/profiles/{profile_id}", headers=approver)
+    assert folded.status_code == 200 and folded.mimetype == 'text/plain'
+    assert f"profile-{profile_id}.folded" in folded.headers['Content-Disposition']
+    assert client.get('/api/profiles/collapsed', headers=approver).status_code == 200
+    assert client.get('/api/profiles/0-0', headers=approver).status_code == 404
+
+
+def test_trace_header_ignored_for_non_approvers(client, auth_headers, profiling):
+    user = auth_headers('user@example.com')
+    response = client.get('/api/access-requests', headers={**user, 'X-Profile': '1'})
+    assert response.status_code == 200 and 'X-Profile-Id' not in response.headers
+    assert profiling_routes._profiler.profiles() == []
+    assert client.get('/api/profiles', headers=user).status_code == 403
+
+
+def test_disabled_profiling_records_nothing(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(profiling_routes, '_profiler', SamplingProfiler())
+    response = client.get('/api/access-requests', headers={**auth_headers(APPROVER), 'X-Profile': '1'})
+    assert 'X-Profile-Id' not in response.headers
+    assert profiling_routes._profiler.profiles() == []
@@ -0,0 +1,275 @@
+import asyncio
+import time
+
+import pytest
+
+from services.access_requests import utc_iso
+from services.database import Database
+from services.meraki_async import AsyncMerakiEngine
+from services.provisioning import GrantStore, ProvisioningPipeline, grant_key
+
+
+@pytest.fixture
+def store():
+    return GrantStore(Database(':memory:'))
+
+
+def _grants(count, org_id='org-1'):
+    return [
+        {'request_num': 1, 'position': i, 'org_id': org_id, 'email': f"user{i}@example.com",
+         'name': None, 'permission': 'read'}
+        for i in range(count)
+    ]
+
+
+def _status(store, key):
+    return store.statuses([key[0]])[key]['status']
+
+
+class _Organizations:
+    def __init__(self, batch_status):
+        self.batch_status = batch_status
+
+    async def getOrganizationActionBatch(self, org_id, batch_id):
+        return {'id': batch_id, 'status': self.batch_status}
+
+
+class _Dashboard:
+    def __init__(self, batch_status):
+        self.organizations = _Organizations(batch_status)
+
+
+def _fan_out(batch_status):
+    """fan_out that runs each call in turn against a fake dashboard."""
+    dashboard = _Dashboard(batch_status)
+
+    def fan_out(call, items):
+        return {item: asyncio.run(call(dashboard, item)) for item in items}, {}
+    return fan_out
+
+
+def test_claim_moves_grants_once(store):
+    assert store.enqueue(_grants(3)) == 3
+    assert store.enqueue(_grants(3)) == 0
+
+    claimed = store.claim('queued', 'submitting')
+    assert len(claimed) == 3
+    assert {g['status'] for g in claimed} == {'submitting'}
+    assert store.claim('queued', 'submitting') == []
+    assert _status(store, (1, 0)) == 'submitting'
+
+
+def test_claim_respects_limit(store):
+    store.enqueue(_grants(5))
+    assert len(store.claim('queued', 'submitting', limit=2)) == 2
+    assert len(store.claim('queued', 'submitting', limit=10)) == 3
+
+
+def test_update_applies_only_from_expected_status(store):
+    store.enqueue(_grants(2))
+    claimed = store.claim('queued', 'submitting')
+
+    fields = {'batch_id': 'b1', 'action': 'create', 'action_index': 0}
+    applied = store.update([(g, 'submitted', fields) for g in claimed])
+    assert len(applied) == 2
+
+    # A second writer holding the same (now stale) rows changes nothing
+    assert store.update([(g, 'failed', {'error': 'late'}) for g in claimed]) == []
+    assert _status(store, (1, 0)) == 'submitted'
+
+
+def test_update_ignores_unknown_columns(store):
+    store.enqueue(_grants(1))
+    grant = store.claim('queued', 'submitting')[0]
+    store.update([(grant, 'failed', {'error': 'boom', 'status': 'active', 'org_id': 'x'})])
+    row = store.statuses([1])[(1, 0)]
+    assert row['status'] == 'failed'
+    assert row['error'] == 'boom'
+
+
+def test_requeue_stale_returns_claims(store):
+    store.enqueue(_grants(1))
+    store.claim('queued', 'submitting')
+    store.requeue_stale(older_than=3600)
+    assert _status(store, (1, 0)) == 'submitting'
+    store.requeue_stale(older_than=-1)
+    assert _status(store, (1, 0)) == 'queued'
+
+
+def test_mark_expiring_only_moves_due_active_grants(store):
+    store.enqueue(_grants(2))
+    claimed = store.claim('queued', 'submitting')
+    store.update([
+        (claimed[0], 'active', {'expires_at': utc_iso(time.time() - 1)}),
+        (claimed[1], 'active', {'expires_at': utc_iso(time.time() + 3600)}),
+    ])
+    assert store.due_expiries() == [(1, 0)]
+    assert store.mark_expiring([(1, 0), (1, 1)]) == 1
+    assert store.mark_expiring([(1, 0)]) == 0
+    assert _status(store, (1, 0)) == 'expiring'
+    assert _status(store, (1, 1)) == 'active'
+
+
+def test_concurrent_polls_apply_transition_once(store):
+    store.enqueue(_grants(2))
+    claimed = store.claim('queued', 'submitting')
+    store.update([
+        (g, 'submitted', {'batch_id': 'b1', 'action': 'update', 'action_index': i, 'admin_id': f"a{i}"})
+        for i, g in enumerate(claimed)
+    ])
+    changed, activated = [], []
+    workers = [
+        ProvisioningPipeline(store, on_changed=changed.extend, on_activated=activated.extend)
+        for _ in range(2)
+    ]
+    # Both workers read the same in-flight batch before either records the result
+    snapshots = [store.in_flight('submitted') for _ in workers]
+    fan_out = _fan_out({'completed': True, 'failed': False})
+    for worker, in_flight in zip(workers, snapshots):
+        worker._poll(fan_out, in_flight)
+
+    assert len(changed) == 2
+    assert sorted(key for key, _ in activated) == [(1, 0), (1, 1)]
+    assert {_status(store, grant_key(g)) for g in claimed} == {'active'}
+
+
+def test_failed_revocation_poll_returns_grant_to_active(store):
+    store.enqueue(_grants(1))
+    grant = store.claim('queued', 'submitting')[0]
+    store.update([(grant, 'revoke_submitted', {'batch_id': 'b2', 'action_index': 0})])
+    failed = []
+    pipeline = ProvisioningPipeline(store, on_revoke_failed=failed.extend)
+    pipeline._poll(
+        _fan_out({'completed': False, 'failed': True, 'errors': ['nope']}),
+        store.in_flight('revoke_submitted'), revoking=True,
+    )
+    assert failed == [(1, 0)]
+    row = store.statuses([1])[(1, 0)]
+    assert row['status'] == 'active'
+    assert 'nope' in row['error']
+
+
+# ---- full passes against tools/fake_meraki.py ----
+
+@pytest.fixture
+def run(store, fake_meraki):
+    """run() -> one pipeline pass against the fake dashboard (batches finish on the next poll)."""
+    engine = AsyncMerakiEngine(base_url=fake_meraki.base_url, maximum_retries=1)
+    pipeline = ProvisioningPipeline(store, grant_duration=3600)
+
+    def run_once():
+        return pipeline.run_once(lambda call, items: engine.fan_out('any-key', call, items))
+    yield run_once
+    engine.close()
+
+
+def _grant(num, org_id, email, permission):
+    return {'request_num': num, 'position': 0, 'org_id': org_id, 'email': email, 'name': None,
+            'permission': permission}
+
+
+def _admins(fake, org_id, email):
+    return [a for a in fake.data[org_id]['admins'] if a['email'].lower() == email]
+
+
+def _row(store, num):
+    return dict(store.db.connection().execute(
+        "SELECT * FROM access_grants WHERE request_num = ? AND position = 0", (num,)
+    ).fetchone())
+
+
+def _expire(store, *nums):
+    keys = [(num, 0) for num in nums]
+    store.defer_expiry(keys, time.time() - 1)
+    assert store.mark_expiring(keys) == len(keys)
+
+
+def test_second_grant_for_same_admin_waits_for_first_batch(store, run, fake_meraki):
+    org_id, email = fake_meraki.org_ids[0], 'jit@example.com'
+    fake_meraki.batch_delay = 60
+    store.enqueue([_grant(1, org_id, email, 'read')])
+    run()
+    assert _status(store, (1, 0)) == 'submitted'
+
+    store.enqueue([_grant(2, org_id, email, 'write')])
+    run()
+    # Planning it now would be a second 'create' for the same email
+    assert _status(store, (2, 0)) == 'queued'
+
+    fake_meraki.batch_delay = 0
+    for batch_id, (batch_org, batch, result, _) in list(fake_meraki.action_batches.items()):
+        fake_meraki.action_batches[batch_id] = (batch_org, batch, result, 0)
+    run()
+    run()
+    assert _status(store, (1, 0)) == 'active' and _status(store, (2, 0)) == 'active'
+    assert _row(store, 2)['action'] == 'update'
+    assert [a['orgAccess'] for a in _admins(fake_meraki, org_id, email)] == ['full']
+
+
+@pytest.fixture
+def overlapping(store, run, fake_meraki):
+    """Request 1 creates a read-only admin; request 2 later raises it to full."""
+    org_id, email = fake_meraki.org_ids[0], 'jit@example.com'
+    store.enqueue([_grant(1, org_id, email, 'read')])
+    run()
+    store.enqueue([_grant(2, org_id, email, 'write')])
+    run()
+    assert _row(store, 1)['action'] == 'create' and _row(store, 2)['action'] == 'update'
+    return org_id, email
+
+
+def test_expiring_first_grant_hands_revert_to_survivor(store, run, fake_meraki, overlapping):
+    org_id, email = overlapping
+    _expire(store, 1)
+    run()
+    assert _status(store, (1, 0)) == 'expired'
+    assert [a['orgAccess'] for a in _admins(fake_meraki, org_id, email)] == ['full']
+    survivor = _row(store, 2)
+    assert survivor['status'] == 'active' and survivor['action'] == 'create'
+    assert survivor['previous_access'] is None
+
+    _expire(store, 2)
+    run()
+    assert _status(store, (2, 0)) == 'expired'
+    assert _admins(fake_meraki, org_id, email) == []
+
+
+def test_expiring_higher_grant_drops_to_surviving_access(store, run, fake_meraki, overlapping):
+    org_id, email = overlapping
+    _expire(store, 2)
+    run()
+    assert _status(store, (2, 0)) == 'expired' and _status(store, (1, 0)) == 'active'
+    assert [a['orgAccess'] for a in _admins(fake_meraki, org_id, email)] == ['read-only']
+
+    _expire(store, 1)
+    run()
+    assert _admins(fake_meraki, org_id, email) == []
+
+
+def test_overlapping_grants_expiring_together_revert_once(store, run, fake_meraki, overlapping):
+    org_id, email = overlapping
+    _expire(store, 1, 2)
+    run()
+    assert _status(store, (1, 0)) == 'expired' and _status(store, (2, 0)) == 'expired'
+    assert _row(store, 1)['error'] is None and _row(store, 2)['error'] is None
+    assert _admins(fake_meraki, org_id, email) == []
+
+
+def test_revert_restores_pre_existing_access(store, run, fake_meraki):
+    org_id = fake_meraki.org_ids[0]
+    existing = next(a for a in fake_meraki.data[org_id]['admins'] if a['orgAccess'] == 'read-only')
+    email = existing['email'].lower()
+    store.enqueue([_grant(1, org_id, email, 'write')])
+    run()
+    store.enqueue([_grant(2, org_id, email, 'write')])
+    run()
+    assert _row(store, 2)['action'] is None and _row(store, 2)['previous_access'] == 'full'
+
+    _expire(store, 1)
+    run()
+    assert [a['orgAccess'] for a in _admins(fake_meraki, org_id, email)] == ['full']
+    assert (_row(store, 2)['action'], _row(store, 2)['previous_access']) == ('update', 'read-only')
+
+    _expire(store, 2)
+    run()
+    assert [a['orgAccess'] for a in _admins(fake_meraki, org_id, email)] == ['read-only']
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from services.rate_limit import (
+    MemoryBuckets, RateLimiter, RateLimitTimeout, RedisBuckets, org_id_from_url, parse_retry_after,
+)
+
+
+@pytest.fixture
+def redis_buckets(fake_redis):
+    return lambda: RedisBuckets('redis://test')
+
+
+@pytest.mark.parametrize('backend', ['memory', 'redis'])
+def test_take_is_all_or_nothing(backend, redis_buckets):
+    buckets = MemoryBuckets() if backend == 'memory' else redis_buckets()
+    specs = [('key:k', 10, 2), ('org:o', 1, 1)]
+    assert buckets.take(specs, 100.0) == (0.0, None)
+    wait, name = buckets.take(specs, 100.0)
+    assert name == 'org:o' and wait == pytest.approx(1.0)
+    # The key bucket was not charged for the refused call
+    assert buckets.take([('key:k', 10, 2)], 100.0) == (0.0, None)
+
+
+def test_redis_buckets_are_shared_between_limiters(redis_buckets):
+    first = RateLimiter(key_rate=1, org_rate=100, max_wait=0.05, buckets=redis_buckets())
+    second = RateLimiter(key_rate=1, org_rate=100, max_wait=0.05, buckets=redis_buckets())
+    first.acquire('k')
+    with pytest.raises(RateLimitTimeout):
+        second.acquire('k')
+    assert second.stats()['timeouts'] == 1
+
+
+def test_retry_after_blocks_org_bucket():
+    limiter = RateLimiter(key_rate=100, org_rate=100, max_wait=0.05)
+    limiter.retry_after('k', 'o', seconds=10)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire('k', 'o')
+    limiter.acquire('k', 'other-org')
+    assert limiter.stats()['throttled'] == 1
+
+
+def test_acquire_async_with_redis(redis_buckets):
+    limiter = RateLimiter(key_rate=100, org_rate=2, buckets=redis_buckets())
+
+    async def main():
+        await asyncio.gather(*(limiter.acquire_async('k', 'o') for _ in range(3)))
+    asyncio.run(main())
+    assert limiter.stats()['acquired'] == 3
+
+
+def test_helpers():
+    assert org_id_from_url('https://api.meraki.com/api/v1/organizations/123/admins') == '123'
+    assert org_id_from_url('/networks/N_1') is None
+    assert parse_retry_after('2') == 2.0
+    assert parse_retry_after(None, default=3) == 3
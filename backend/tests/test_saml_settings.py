@@ -0,0 +1,73 @@
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from config import saml_settings
+from config.saml_settings import clear_saml_settings_cache, get_saml_settings_object, get_sp_metadata
+from tools.fake_idp import FakeIdP
+
+APP_URL = 'http://localhost:5001'
+REQUEST = {'https': 'off', 'http_host': 'localhost:5001'}
+
+
+@pytest.fixture(scope='module')
+def fake_idp():
+    return FakeIdP()
+
+
+@pytest.fixture
+def idp_env(fake_idp, monkeypatch):
+    for name, value in {**fake_idp.env(), 'APP_URL': APP_URL}.items():
+        monkeypatch.setenv(name, value)
+    clear_saml_settings_cache()
+    yield fake_idp
+    clear_saml_settings_cache()
+
+
+def test_settings_object_shared_until_environment_changes(idp_env, monkeypatch):
+    first = get_saml_settings_object(REQUEST)
+    assert get_saml_settings_object(dict(REQUEST)) is first
+    assert first.get_idp_data()['singleSignOnService']['url'] == idp_env.sso_url
+
+    # A different external host gets its own object
+    assert get_saml_settings_object({**REQUEST, 'http_host': 'other:5001'}) is not first
+
+    monkeypatch.setenv('DUO_SSO_URL', 'https://fake-idp.local/sso2')
+    rebuilt = get_saml_settings_object(REQUEST)
+    assert rebuilt is not first
+    assert rebuilt.get_idp_data()['singleSignOnService']['url'] == 'https://fake-idp.local/sso2'
+
+
+def test_cache_is_bounded(idp_env, monkeypatch):
+    monkeypatch.setattr(saml_settings, '_SETTINGS_CACHE_MAX_ENTRIES', 2)
+    for host in ('a', 'b', 'c'):
+        get_saml_settings_object({**REQUEST, 'http_host': host})
+    assert len(saml_settings._settings_cache) == 2
+
+
+def test_metadata_generated_once(idp_env, monkeypatch):
+    xml, errors = get_sp_metadata(REQUEST)
+    assert errors == [] and 'urn:meraki-admin-jit:saml' in xml
+
+    settings = get_saml_settings_object(REQUEST)
+    monkeypatch.setattr(settings, 'get_sp_metadata', lambda: pytest.fail('metadata rebuilt'))
+    assert get_sp_metadata(REQUEST) == (xml, errors)
+
+
+def test_login_and_acs_use_cached_settings(idp_env, client):
+    login = client.get('/api/auth/saml/login', base_url=APP_URL)
+    assert login.status_code == 302 and login.headers['Location'].startswith(idp_env.sso_url)
+
+    acs_url = f"{APP_URL}/api/auth/saml/acs"
+    response = client.post(
+        '/api/auth/saml/acs',
+        data={'SAMLResponse': idp_env.saml_response('user@example.com', acs_url)},
+        base_url=APP_URL,
+    )
+    assert response.status_code == 302
+    assert parse_qs(urlparse(response.headers['Location']).query)['code']
+    assert len(saml_settings._settings_cache) == 1
+
+    forged = FakeIdP(entity_id=idp_env.entity_id).saml_response('user@example.com', acs_url)
+    rejected = client.post('/api/auth/saml/acs', data={'SAMLResponse': forged}, base_url=APP_URL)
+    assert rejected.status_code == 401
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from services import scheduler as scheduler_module
+from services.scheduler import Scheduler
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_job_reruns_after_returned_delay_until_done():
+    scheduler = Scheduler('test')
+    runs = []
+
+    def job():
+        runs.append(time.monotonic())
+        return 0.01 if len(runs) < 3 else None
+
+    scheduler.schedule('job', job)
+    assert _wait_for(lambda: not scheduler.has_job('job'))
+    assert len(runs) == 3
+    scheduler.stop(1)
+
+
+def test_schedule_replaces_existing_job():
+    scheduler = Scheduler('test')
+    ran = []
+    scheduler.schedule('job', lambda: ran.append('old'), delay=0.2)
+    scheduler.schedule('job', lambda: ran.append('new'), delay=0.01)
+    assert _wait_for(lambda: ran)
+    time.sleep(0.3)
+    assert ran == ['new']
+    scheduler.stop(1)
+
+
+def test_run_soon_pulls_existing_job_forward():
+    scheduler = Scheduler('test')
+    ran = threading.Event()
+    scheduler.schedule('job', ran.set, delay=60)
+    scheduler.run_soon('job', lambda: None)  # keeps the original callable
+    assert ran.wait(5)
+    scheduler.stop(1)
+
+
+def test_cancel():
+    scheduler = Scheduler('test')
+    ran = []
+    scheduler.schedule('job', lambda: ran.append(1), delay=0.05)
+    scheduler.cancel('job')
+    time.sleep(0.15)
+    assert ran == [] and not scheduler.has_job('job')
+    scheduler.stop(1)
+
+
+def test_failing_job_is_retried(monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'JOB_ERROR_RETRY_SECONDS', 0.01)
+    scheduler = Scheduler('test')
+    calls = []
+
+    def job():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return None
+
+    scheduler.schedule('job', job)
+    assert _wait_for(lambda: len(calls) == 2 and not scheduler.has_job('job'))
+    scheduler.stop(1)
+
+
+def test_stop_keeps_jobs_and_ensure_started_resumes():
+    scheduler = Scheduler('test')
+    scheduler.schedule('idle', lambda: None, delay=60)
+    scheduler.stop(1)
+    assert not scheduler._thread.is_alive()
+    ran = threading.Event()
+    with scheduler._cond:
+        scheduler._push('job', ran.set, 0)
+    assert not ran.wait(0.1)
+    scheduler.ensure_started()
+    assert ran.wait(5)
+    assert scheduler.has_job('idle')
+    scheduler.stop(1)
+
+
+def test_hold_queues_jobs_without_a_thread():
+    scheduler = Scheduler('test')
+    scheduler.hold()
+    runs = []
+    scheduler.schedule('job', lambda: runs.append(1))
+    scheduler.run_soon('other', lambda: runs.append(2))
+    time.sleep(0.05)
+    assert scheduler._thread is None and runs == []
+
+    scheduler.ensure_started()
+    assert _wait_for(lambda: sorted(runs) == [1, 2])
+    scheduler.stop(1)
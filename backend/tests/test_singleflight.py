@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.singleflight import RedisSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls, started, release = [], threading.Event(), threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'orgs'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', fetch)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('k', fetch))) for _ in range(5)]
+    for t in followers:
+        t.start()
+    time.sleep(0.05)
+    assert flight.in_flight() == 1
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+    assert calls == [1]
+    assert results == ['orgs'] * 6
+    assert flight.in_flight() == 0
+
+
+def test_followers_get_the_leaders_error():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise RuntimeError('upstream down')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('k', fetch)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert errors == ['upstream down', 'upstream down']
+
+
+def test_sequential_calls_are_not_cached():
+    flight = SingleFlight()
+    assert flight.do('k', lambda: 1) == 1
+    assert flight.do('k', lambda: 2) == 2
+
+
+def test_redis_leader_runs_fn_and_releases_lock(fake_redis):
+    flight = RedisSingleFlight('redis://test', 'flight:')
+    assert flight.do('k', lambda: 'fetched', poll=lambda: None) == 'fetched'
+    assert fake_redis.get('flight:k') is None
+
+
+def test_redis_follower_waits_for_published_result(fake_redis):
+    flight = RedisSingleFlight('redis://test', 'flight:', poll_interval=0.01)
+    fake_redis.set('flight:k', 'other-worker')
+    published = iter([None, None, 'cached'])
+
+    def fetch():
+        pytest.fail('follower must not fetch')
+
+    assert flight.do('k', fetch, poll=lambda: next(published)) == 'cached'
+
+
+def test_redis_follower_fetches_itself_after_timeout(fake_redis):
+    flight = RedisSingleFlight('redis://test', 'flight:', wait_timeout=0.05, poll_interval=0.01)
+    fake_redis.set('flight:k', 'stuck-worker')
+    assert flight.do('k', lambda: 'fetched', poll=lambda: None) == 'fetched'
+    # The other worker's lock is left alone
+    assert fake_redis.get('flight:k') == b'stuck-worker'
+
+
+def test_redis_leader_uses_result_published_before_it_won(fake_redis):
+    flight = RedisSingleFlight('redis://test', 'flight:')
+    assert flight.do('k', lambda: 'fetched', poll=lambda: 'cached') == 'cached'
+
+
+def test_redis_errors_fall_back_to_fetching():
+    flight = RedisSingleFlight('redis://127.0.0.1:1/0', 'flight:')
+    assert flight.do('k', lambda: 'fetched', poll=lambda: None) == 'fetched'
+
+
+def test_async_callers_share_one_call_and_survive_cancellation():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'orgs'
+
+    async def main():
+        tasks = [asyncio.ensure_future(flight.do_async('k', fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        tasks[0].cancel()  # the leader's caller goes away; the call carries on for the others
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert isinstance(results[0], asyncio.CancelledError) and results[1:] == ['orgs', 'orgs']
+    assert flight.in_flight() == 0
+
+
+def test_async_and_thread_callers_join_each_other():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        return 'from-thread'
+
+    async def must_not_run():
+        pytest.fail('joined call must not run')
+
+    leader = threading.Thread(target=flight.do, args=('k', fetch))
+    leader.start()
+    started.wait(5)
+
+    async def follow():
+        asyncio.get_running_loop().call_later(0.05, release.set)
+        return await flight.do_async('k', must_not_run)
+
+    assert asyncio.run(follow()) == 'from-thread'
+    leader.join(5)
+
+    async def lead():
+        async def fetch_async():
+            await asyncio.sleep(0.05)
+            raise RuntimeError('upstream down')
+
+        task = asyncio.ensure_future(flight.do_async('k', fetch_async))
+        await asyncio.sleep(0.01)
+        errors = []
+        follower = threading.Thread(target=lambda: errors.append(pytest.raises(RuntimeError, flight.do, 'k', fetch)))
+        follower.start()
+        with pytest.raises(RuntimeError):
+            await task
+        await asyncio.to_thread(follower.join, 5)
+        return errors
+
+    assert str(asyncio.run(lead())[0].value) == 'upstream down'
+
+
+def test_redis_async_follower_waits_for_published_result(fake_redis):
+    flight = RedisSingleFlight('redis://test', 'flight:', poll_interval=0.01)
+    fake_redis.set('flight:k', 'other-worker')
+    published = iter([None, None, 'cached'])
+
+    async def fetch():
+        pytest.fail('follower must not fetch')
+
+    assert asyncio.run(flight.do_async('k', fetch, poll=lambda: next(published))) == 'cached'
+
+
+def test_redis_async_leader_runs_fn_and_releases_lock(fake_redis):
+    flight = RedisSingleFlight('redis://test', 'flight:')
+
+    async def fetch():
+        assert fake_redis.get('flight:k') is not None
+        return 'fetched'
+
+    assert asyncio.run(flight.do_async('k', fetch, poll=lambda: None)) == 'fetched'
+    assert fake_redis.get('flight:k') is None
@@ -0,0 +1,81 @@
+import time
+
+import jwt
+import pytest
+
+from routes import auth as auth_routes
+from services.token_cache import VerifiedTokenCache
+
+USER = {'email': 'user@example.com', 'name': 'user'}
+
+
+def test_get_returns_a_copy_until_exp():
+    cache = VerifiedTokenCache(4)
+    cache.put('token', 'secret', USER, time.time() + 60)
+    cached = cache.get('token', 'secret')
+    assert cached == USER
+    cached['email'] = 'changed'
+    assert cache.get('token', 'secret') == USER
+
+    cache.put('old', 'secret', USER, time.time() - 1)
+    assert cache.get('old', 'secret') is None
+    assert len(cache) == 1
+
+
+def test_keyed_on_secret_and_bounded():
+    cache = VerifiedTokenCache(2)
+    cache.put('a', 'secret', USER, None)
+    assert cache.get('a', 'rotated') is None
+    cache.put('b', 'secret', USER, None)
+    cache.get('a', 'secret')  # a is now most recently used
+    cache.put('c', 'secret', USER, None)
+    assert cache.get('b', 'secret') is None
+    assert cache.get('a', 'secret') == USER and cache.get('c', 'secret') == USER
+
+
+def test_zero_size_disables_cache():
+    cache = VerifiedTokenCache(0)
+    cache.put('a', 'secret', USER, None)
+    assert cache.get('a', 'secret') is None and len(cache) == 0
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Count jwt.decode calls made by the auth routes."""
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    auth_routes._verified_tokens.clear()
+    monkeypatch.setattr(auth_routes.jwt, 'decode', counting_decode)
+    yield calls
+    auth_routes._verified_tokens.clear()
+
+
+def test_route_verifies_each_token_once(client, auth_headers, decodes):
+    headers = auth_headers('user@example.com')
+    for _ in range(3):
+        response = client.get('/api/auth/me', headers=headers)
+        assert response.status_code == 200 and response.get_json()['email'] == 'user@example.com'
+    assert len(decodes) == 1
+
+
+def test_route_rejects_expired_and_forged_tokens(client, auth_headers, decodes):
+    expired = client.get('/api/auth/me', headers=auth_headers('user@example.com', expires_in=-10))
+    assert expired.status_code == 401 and expired.get_json()['error'] == 'Token expired'
+
+    forged = client.get('/api/auth/me', headers=auth_headers('user@example.com', secret='not-the-secret'))
+    assert forged.status_code == 401 and forged.get_json()['error'] == 'Invalid token'
+    assert len(auth_routes._verified_tokens) == 0
+
+
+def test_rotating_secret_key_invalidates_cached_tokens(app, client, auth_headers, decodes, monkeypatch):
+    headers = auth_headers('user@example.com')
+    assert client.get('/api/auth/me', headers=headers).status_code == 200
+
+    monkeypatch.setitem(app.config, 'SECRET_KEY', 'rotated-secret')
+    assert client.get('/api/auth/me', headers=headers).status_code == 401
+    assert len(decodes) == 2
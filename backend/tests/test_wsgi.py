@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+from config import settings as settings_module
+from config.settings import Settings, freeze_settings, get_settings, settings_frozen
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_settings_from_env():
+    settings = Settings.from_env({
+        'APP_URL': 'https://jit.example.com', 'APPROVER_EMAILS': ' A@Example.com, ,b@example.com',
+        'MERAKI_DASHBOARD_API_KEY': 'dashboard', 'MERAKI_USER_API_KEY': 'user',
+    })
+    assert settings.approver_emails == frozenset({'a@example.com', 'b@example.com'})
+    assert settings.user_api_key == 'user' and settings.service_api_key == 'dashboard'
+    assert settings.provisioning_api_key == 'dashboard'
+    assert 'dashboard' not in repr(settings)
+    assert settings.saml_fingerprint != Settings.from_env({'APP_URL': 'https://other.example.com'}).saml_fingerprint
+
+
+def test_settings_follow_the_environment_until_frozen(monkeypatch):
+    monkeypatch.setattr(settings_module, '_frozen', None)
+    monkeypatch.setenv('FRONTEND_URL', 'https://one.example.com')
+    assert get_settings().frontend_url == 'https://one.example.com' and not settings_frozen()
+
+    frozen = freeze_settings()
+    monkeypatch.setenv('FRONTEND_URL', 'https://two.example.com')
+    assert get_settings() is frozen and get_settings().frontend_url == 'https://one.example.com'
+
+
+def test_preload_leaves_no_threads_running(fake_meraki, tmp_path):
+    # Every background feature on: their threads must wait for post_fork(), or preload fails
+    env = {
+        **os.environ,
+        'DATABASE_PATH': str(tmp_path / 'preload.sqlite3'),
+        'MERAKI_BASE_URL': fake_meraki.base_url,
+        'ORGANIZATIONS_REFRESH_ENABLED': 'true',
+        'MEMBERSHIP_INDEX_ENABLED': 'true',
+        'PROVISIONING_ENABLED': 'true',
+    }
+    result = subprocess.run([sys.executable, '-m', 'wsgi'], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report['modules_imported'] > 0 and report['total_ms'] >= report['warm_organizations_ms']
+    assert fake_meraki.request_counts['get_organizations'] == 1
+    # The membership crawl is queued for the workers, not run in the master
+    assert fake_meraki.request_counts['get_admins'] == 0
@@ -0,0 +1 @@
+# Developer tools package (local fakes and benchmarks; not imported by the app)
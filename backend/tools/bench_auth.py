@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: per-request Bearer auth overhead in _user_from_request.
+
+Compares full verification (jwt.decode + _safe_user, cache disabled) with
+the verified-token cache, both for the bare function inside a request
+context and for a full GET /api/auth/me through the Flask test client.
+
+    cd backend
+    python -m tools.bench_auth --iterations 20000
+"""
+
+import argparse
+import os
+import time
+
+
+def _bench(fn, iterations: int) -> float:
+    """Mean microseconds per call."""
+    fn()  # warm-up (and prime the cache when enabled)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Bearer token verification')
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ.setdefault('SECRET_KEY', 'bench-' + 'x' * 58)
+    os.environ.setdefault('ORGANIZATIONS_REFRESH_ENABLED', 'false')
+
+    import jwt
+    from app import create_app
+    from routes import auth
+
+    app = create_app()
+    now = int(time.time())
+    token = jwt.encode(
+        {'email': 'bench@example.com', 'name': 'Bench User', 'sub': 'bench@example.com',
+         'role': 'user', 'iat': now, 'exp': now + 3600},
+        app.config['SECRET_KEY'],
+        algorithm='HS256',
+    )
+    headers = {'Authorization': f'Bearer {token}'}
+    client = app.test_client()
+    cache_size = auth._verified_tokens.max_entries
+
+    def verify():
+        user, err = auth._user_from_request()
+        assert user and not err
+
+    def me():
+        assert client.get('/api/auth/me', headers=headers).status_code == 200
+
+    results = []
+    with app.test_request_context('/api/auth/me', headers=headers):
+        for label, size in (('uncached', 0), ('cached', cache_size or 4096)):
+            auth._verified_tokens.max_entries = size
+            auth._verified_tokens.clear()
+            results.append((f'_user_from_request ({label})', _bench(verify, args.iterations)))
+    for label, size in (('uncached', 0), ('cached', cache_size or 4096)):
+        auth._verified_tokens.max_entries = size
+        auth._verified_tokens.clear()
+        results.append((f'GET /api/auth/me ({label})', _bench(me, max(1, args.iterations // 10))))
+    auth._verified_tokens.max_entries = cache_size
+
+    width = max(len(label) for label, _ in results)
+    print(f"{'benchmark':<{width}}  us/op")
+    for label, micros in results:
+        print(f"{label:<{width}}  {micros:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
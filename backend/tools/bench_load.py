@@ -0,0 +1,281 @@
+"""
+Offline load and latency benchmark for the backend.
+
+Starts a fake Meraki Dashboard API (tools/fake_meraki.py, tunable latency
+and 429 rate limits), a fake Duo IdP (tools/fake_idp.py, signed SAML
+assertions) and the Flask app on a local threaded HTTP server, then drives
+each scenario over real HTTP at the given concurrency:
+
+- me             GET /api/auth/me with a Bearer token
+- token          POST /api/auth/token (a fresh one-time code per request)
+- organizations  GET /api/meraki/organizations with a Bearer token
+- acs            POST /api/auth/saml/acs with a signed SAMLResponse
+
+and reports throughput and p50/p90/p99 latency per scenario. Write results
+with --json and compare a later run (e.g. on another commit) with --compare:
+
+    cd backend
+    python -m tools.bench_load --concurrency 16 --duration 10 --json before.json
+    git checkout other-branch
+    python -m tools.bench_load --concurrency 16 --duration 10 --compare before.json
+
+Signing assertions and minting one-time codes happen before the timed
+requests, so they do not count against the server.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import platform
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+SCENARIOS = ('me', 'token', 'organizations', 'acs')
+# Signed SAMLResponses generated up front and replayed (the app keeps no replay cache)
+ACS_POOL_SIZE = 64
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        'requests': count,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(sum(values) / count * 1000, 3) if count else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p90_ms': round(percentile(values, 90) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+class _Client:
+    """One keep-alive HTTP connection per worker thread."""
+
+    def __init__(self, base_url: str):
+        parsed = urlparse(base_url)
+        self.host, self.port = parsed.hostname, parsed.port
+        self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def request(self, method: str, path: str, body=None, headers=None) -> int:
+        try:
+            self.conn.request(method, path, body=body, headers=headers or {})
+            response = self.conn.getresponse()
+            response.read()
+            if response.getheader('Connection', '').lower() == 'close':
+                self.conn.close()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            raise
+
+
+def run_scenario(base_url: str, make_request, expected: int, concurrency: int, duration: float,
+                 max_requests: int = None) -> dict:
+    """
+    Call make_request() -> (method, path, body, headers) from concurrency threads
+    until duration elapses (or max_requests are sent). Returns summarize() output.
+    """
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    sent = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        client = _Client(base_url)
+        local, local_errors = [], 0
+        while time.perf_counter() < deadline:
+            if max_requests is not None and next(sent) >= max_requests:
+                break
+            method, path, body, headers = make_request()
+            start = time.perf_counter()
+            try:
+                status = client.request(method, path, body, headers)
+            except (http.client.HTTPException, OSError):
+                status = None
+            local.append(time.perf_counter() - start)
+            if status != expected:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_report(results: dict, baseline: dict = None):
+    header = f"{'scenario':<14} {'requests':>9} {'errors':>7} {'rps':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    print(header)
+    for name, r in results.items():
+        print(f"{name:<14} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} "
+              f"{r['p90_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}")
+    if not baseline:
+        return
+    base_results = baseline.get('results', {})
+    print(f"\nvs baseline {baseline.get('meta', {}).get('commit', '?')} (negative latency / positive rps = better)")
+    print(f"{'scenario':<14} {'rps':>9} {'p50':>9} {'p99':>9}")
+
+    def delta(new, old):
+        return f"{(new - old) / old * 100:+8.1f}%" if old else f"{'n/a':>9}"
+
+    for name, r in results.items():
+        old = base_results.get(name)
+        if old:
+            print(f"{name:<14} {delta(r['rps'], old['rps'])} {delta(r['p50_ms'], old['p50_ms'])} "
+                  f"{delta(r['p99_ms'], old['p99_ms'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline load/latency benchmark (fake Meraki + fake IdP)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per scenario')
+    parser.add_argument('--requests', type=int, default=None, help='stop each scenario after this many requests')
+    parser.add_argument('--warmup', type=float, default=1.0, help='untimed seconds per scenario before measuring')
+    parser.add_argument('--orgs', type=int, default=1000, help='organizations in the fake Meraki API')
+    parser.add_argument('--meraki-latency', type=float, default=0.05, help='seconds added to each fake Meraki call')
+    parser.add_argument('--meraki-org-rate-limit', type=float, default=10.0)
+    parser.add_argument('--meraki-key-rate-limit', type=float, default=None)
+    parser.add_argument('--json', dest='json_path', help='write results to this file')
+    parser.add_argument('--compare', help='baseline results file (from --json) to compare against')
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    from tools.fake_idp import FakeIdP
+    from tools.fake_meraki import FakeMerakiServer
+
+    meraki = FakeMerakiServer(
+        org_count=args.orgs, latency=args.meraki_latency,
+        org_rate_limit=args.meraki_org_rate_limit, key_rate_limit=args.meraki_key_rate_limit,
+    ).start()
+    idp = FakeIdP()
+    workdir = tempfile.mkdtemp(prefix='bench-load-')
+    os.environ.update(idp.env())
+    os.environ.update({
+        'SECRET_KEY': os.getenv('SECRET_KEY') or secrets.token_hex(32),
+        'MERAKI_BASE_URL': meraki.base_url,
+        'MERAKI_DASHBOARD_API_KEY': 'bench-key',
+        'ORGANIZATIONS_REFRESH_ENABLED': 'false',
+        'PROVISIONING_ENABLED': 'false',
+        'DATABASE_PATH': os.path.join(workdir, 'bench.sqlite3'),
+        'SESSION_FILE_DIR': os.path.join(workdir, 'sessions'),
+        'LOG_LEVEL': os.getenv('LOG_LEVEL', 'WARNING'),
+    })
+
+    from werkzeug.serving import make_server
+
+    from app import create_app
+    from routes import auth
+
+    app = create_app()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-app', daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    acs_path = '/api/auth/saml/acs'
+    acs_url = os.getenv('APP_URL', 'http://localhost:5001') + acs_path
+
+    # A real token via the real flow (ACS -> one-time code -> /token)
+    client = app.test_client()
+    form = {'SAMLResponse': idp.saml_response('bench@example.com', acs_url)}
+    location = client.post(acs_path, data=form).headers.get('Location', '')
+    if 'code=' not in location:
+        sys.exit('ACS did not accept the fake IdP assertion; check APP_URL / SAML settings')
+    code = location.split('code=', 1)[1].split('&', 1)[0]
+    token = client.post('/api/auth/token', json={'code': code}).get_json()['access_token']
+    bearer = {'Authorization': f'Bearer {token}'}
+
+    acs_bodies = [
+        urlencode({'SAMLResponse': idp.saml_response(f'user{i}@example.com', acs_url)})
+        for i in range(ACS_POOL_SIZE if 'acs' in scenarios else 0)
+    ]
+    acs_cycle = itertools.cycle(acs_bodies)
+    user_data = {'email': 'bench@example.com', 'name': 'Bench', 'role': 'user'}
+
+    def token_request():
+        # Mint the code the way ACS does, so only the exchange is timed
+        one_time = secrets.token_urlsafe(32)
+        auth._one_time_codes.put(one_time, {'user_data': user_data, 'expires_at': time.time() + 60}, 60)
+        return 'POST', '/api/auth/token', json.dumps({'code': one_time}), {'Content-Type': 'application/json'}
+
+    requests = {
+        'me': (lambda: ('GET', '/api/auth/me', None, bearer), 200),
+        'token': (token_request, 200),
+        'organizations': (lambda: ('GET', '/api/meraki/organizations', None, bearer), 200),
+        'acs': (lambda: ('POST', acs_path, next(acs_cycle),
+                         {'Content-Type': 'application/x-www-form-urlencoded'}), 302),
+    }
+
+    results = {}
+    try:
+        for name in scenarios:
+            make_request, expected = requests[name]
+            if args.warmup > 0:
+                run_scenario(base_url, make_request, expected, args.concurrency, args.warmup)
+            results[name] = run_scenario(base_url, make_request, expected, args.concurrency, args.duration,
+                                         args.requests)
+    finally:
+        server.shutdown()
+        meraki.stop()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.json_path:
+        meta = {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'orgs': args.orgs,
+            'meraki_latency': args.meraki_latency,
+            'meraki_org_rate_limit': args.meraki_org_rate_limit,
+            'meraki_key_rate_limit': args.meraki_key_rate_limit,
+            'upstream_calls': dict(meraki.request_counts),
+        }
+        with open(args.json_path, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
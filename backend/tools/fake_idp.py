@@ -0,0 +1,148 @@
+"""
+Fake Duo SAML identity provider for local testing and benchmarks.
+
+Generates a throwaway RSA key and self-signed certificate, and builds SAML
+2.0 Responses whose Response and Assertion are both signed (RSA-SHA256), as
+Duo sends them, so POST /api/auth/saml/acs can be exercised end to end
+without Duo. Point the app at it with the environment from env():
+
+    idp = FakeIdP()
+    os.environ.update(idp.env())
+    form = {'SAMLResponse': idp.saml_response('alice@example.com', acs_url)}
+
+or print the environment and a sample response:
+
+    python -m tools.fake_idp --email alice@example.com --acs-url http://127.0.0.1:5001/api/auth/saml/acs
+"""
+
+import argparse
+import base64
+import datetime
+import uuid
+from xml.sax.saxutils import escape, quoteattr
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from onelogin.saml2.constants import OneLogin_Saml2_Constants
+from onelogin.saml2.utils import OneLogin_Saml2_Utils
+
+SP_ENTITY_ID = 'urn:meraki-admin-jit:saml'
+_NAMEID_EMAIL = 'urn:oasis:names:tc:SAML:1.1:nameid-format:emailAddress'
+
+
+def _instant(dt: datetime.datetime) -> str:
+    return dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FakeIdP:
+    """Signs SAML Responses with its own key; env() configures the app to trust it."""
+
+    def __init__(self, entity_id: str = 'https://fake-idp.local/saml2', sso_url: str = 'https://fake-idp.local/sso'):
+        self.entity_id = entity_id
+        self.sso_url = sso_url
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'fake-idp.local')])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=365))
+            .sign(key, hashes.SHA256())
+        )
+        self.private_key_pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ).decode()
+        self.cert_pem = cert.public_bytes(serialization.Encoding.PEM).decode()
+
+    @property
+    def cert_single_line(self) -> str:
+        """Certificate body as DUO_X509_CERT expects it (no BEGIN/END lines, no newlines)."""
+        return ''.join(line for line in self.cert_pem.splitlines() if '-----' not in line)
+
+    def env(self) -> dict:
+        """Environment variables that make the app's SAML settings trust this IdP."""
+        return {
+            'DUO_ENTITY_ID': self.entity_id,
+            'DUO_SSO_URL': self.sso_url,
+            'DUO_SLO_URL': '',
+            'DUO_X509_CERT': self.cert_single_line,
+        }
+
+    def saml_response(self, email: str, acs_url: str, attributes: dict = None,
+                      audience: str = SP_ENTITY_ID, in_response_to: str = None, lifetime: int = 300) -> str:
+        """Base64 SAMLResponse form value for email, signed like Duo's (Response and Assertion)."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        issued, not_after = _instant(now), _instant(now + datetime.timedelta(seconds=lifetime))
+        not_before = _instant(now - datetime.timedelta(seconds=30))
+        response_id, assertion_id = f"_{uuid.uuid4().hex}", f"_{uuid.uuid4().hex}"
+        in_response = f' InResponseTo={quoteattr(in_response_to)}' if in_response_to else ''
+        attributes = attributes if attributes is not None else {
+            'displayName': email.split('@')[0].title(), 'givenName': email.split('@')[0].title(),
+        }
+        attribute_xml = ''.join(
+            f'<saml:Attribute Name={quoteattr(name)}>'
+            + ''.join(f'<saml:AttributeValue>{escape(str(v))}</saml:AttributeValue>'
+                      for v in (values if isinstance(values, (list, tuple)) else [values]))
+            + '</saml:Attribute>'
+            for name, values in attributes.items()
+        )
+        assertion = (
+            f'<saml:Assertion xmlns:saml="urn:oasis:names:tc:SAML:2.0:assertion" ID="{assertion_id}" '
+            f'Version="2.0" IssueInstant="{issued}">'
+            f'<saml:Issuer>{escape(self.entity_id)}</saml:Issuer>'
+            f'<saml:Subject><saml:NameID Format="{_NAMEID_EMAIL}">{escape(email)}</saml:NameID>'
+            f'<saml:SubjectConfirmation Method="urn:oasis:names:tc:SAML:2.0:cm:bearer">'
+            f'<saml:SubjectConfirmationData NotOnOrAfter="{not_after}" Recipient={quoteattr(acs_url)}{in_response}/>'
+            f'</saml:SubjectConfirmation></saml:Subject>'
+            f'<saml:Conditions NotBefore="{not_before}" NotOnOrAfter="{not_after}">'
+            f'<saml:AudienceRestriction><saml:Audience>{escape(audience)}</saml:Audience>'
+            f'</saml:AudienceRestriction></saml:Conditions>'
+            f'<saml:AuthnStatement AuthnInstant="{issued}" SessionIndex="{assertion_id}" '
+            f'SessionNotOnOrAfter="{not_after}"><saml:AuthnContext><saml:AuthnContextClassRef>'
+            f'urn:oasis:names:tc:SAML:2.0:ac:classes:PasswordProtectedTransport'
+            f'</saml:AuthnContextClassRef></saml:AuthnContext></saml:AuthnStatement>'
+            f'<saml:AttributeStatement>{attribute_xml}</saml:AttributeStatement>'
+            f'</saml:Assertion>'
+        )
+        signed_assertion = self._sign(assertion)
+        response = (
+            f'<samlp:Response xmlns:samlp="urn:oasis:names:tc:SAML:2.0:protocol" '
+            f'xmlns:saml="urn:oasis:names:tc:SAML:2.0:assertion" ID="{response_id}" Version="2.0" '
+            f'IssueInstant="{issued}" Destination={quoteattr(acs_url)}{in_response}>'
+            f'<saml:Issuer>{escape(self.entity_id)}</saml:Issuer>'
+            f'<samlp:Status><samlp:StatusCode Value="urn:oasis:names:tc:SAML:2.0:status:Success"/></samlp:Status>'
+            f'{signed_assertion}</samlp:Response>'
+        )
+        return base64.b64encode(self._sign(response).encode()).decode()
+
+    def _sign(self, xml: str) -> str:
+        signed = OneLogin_Saml2_Utils.add_sign(
+            xml, self.private_key_pem, self.cert_pem,
+            sign_algorithm=OneLogin_Saml2_Constants.RSA_SHA256,
+            digest_algorithm=OneLogin_Saml2_Constants.SHA256,
+        )
+        signed = signed.decode() if isinstance(signed, bytes) else signed
+        # add_sign returns a full document; drop the XML declaration when nesting
+        return signed.split('?>', 1)[1].lstrip() if signed.startswith('<?xml') else signed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Duo SAML IdP: print app env and a signed SAMLResponse')
+    parser.add_argument('--email', default='alice@example.com')
+    parser.add_argument('--acs-url', default='http://127.0.0.1:5001/api/auth/saml/acs')
+    args = parser.parse_args()
+    idp = FakeIdP()
+    for name, value in idp.env().items():
+        print(f"{name}={value}")
+    print()
+    print(idp.saml_response(args.email, args.acs_url))
+
+
+if __name__ == '__main__':
+    main()
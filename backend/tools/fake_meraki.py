@@ -0,0 +1,382 @@
+"""
+Fake Meraki Dashboard API server for local development and testing.
+
+Serves a deterministic set of organizations with admins, networks and
+inventory, so the sync client pool and the async fan-out engine can be
+exercised without a real API key or network access. Action batches of admin
+create/update/destroy actions are applied atomically and report completion
+after batch_delay seconds, like asynchronous batches on the real API.
+
+Run standalone (then set MERAKI_BASE_URL=http://127.0.0.1:8089/api/v1 and any
+MERAKI_DASHBOARD_API_KEY):
+
+    python -m tools.fake_meraki --orgs 500 --latency 0.05 --port 8089
+
+or in-process:
+
+    server = FakeMerakiServer(org_count=50).start()
+    ... use server.base_url ...
+    server.stop()
+"""
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = '/api/v1'
+
+
+def _build_dataset(org_count: int, admins_per_org: int, networks_per_org: int, devices_per_org: int):
+    """Deterministic fake dashboard data: org_id -> { org, admins, networks, devices }."""
+    data = {}
+    for i in range(org_count):
+        org_id = str(100000 + i)
+        data[org_id] = {
+            'org': {
+                'id': org_id,
+                'name': f"Org {i:05d}",
+                'url': f"https://n1.meraki.com/o/fake{i}/manage/organization/overview",
+                'api': {'enabled': True},
+            },
+            'admins': [
+                {
+                    'id': f"{org_id}-{a}",
+                    'name': f"Admin {(i + a) % 50}",
+                    'email': f"admin{(i + a) % 50}@example.com",
+                    'orgAccess': 'full' if a == 0 else 'read-only',
+                    'networks': [],
+                    'tags': [],
+                }
+                for a in range(admins_per_org)
+            ],
+            'networks': [
+                {'id': f"N_{org_id}_{n}", 'organizationId': org_id, 'name': f"Network {n}"}
+                for n in range(networks_per_org)
+            ],
+            'devices': [
+                {'serial': f"Q2XX-{i:04d}-{d:04d}", 'networkId': f"N_{org_id}_0", 'model': 'MR46'}
+                for d in range(devices_per_org)
+            ],
+        }
+    return data
+
+
+class FakeMerakiServer:
+    """Threaded HTTP server emulating a subset of the Dashboard API v1."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, org_count: int = 100,
+                 latency: float = 0.0, api_keys=None, admins_per_org: int = 3,
+                 networks_per_org: int = 2, devices_per_org: int = 2, batch_delay: float = 0.0,
+                 org_rate_limit: float = None, key_rate_limit: float = None):
+        """
+        latency: seconds added to every response. api_keys: accepted keys
+        (None accepts any non-empty key). batch_delay: seconds before an
+        action batch reports completion. org_rate_limit: requests per second
+        allowed per organization (like Meraki's budget); key_rate_limit:
+        requests per second per API key, on every endpoint. Excess requests
+        get 429 with Retry-After.
+        """
+        self.latency = latency
+        self.org_rate_limit = org_rate_limit
+        self.key_rate_limit = key_rate_limit
+        self._buckets = {}  # 'org:<id>' / 'key:<key>' -> (tokens, updated_at)
+        self.batch_delay = batch_delay
+        self.action_batches = {}  # batch id -> (org_id, batch dict, completes_at)
+        self._batch_ids = itertools.count(1)
+        self._data_lock = threading.Lock()
+        self.api_keys = set(api_keys) if api_keys else None
+        self.data = _build_dataset(org_count, admins_per_org, networks_per_org, devices_per_org)
+        self.org_ids = list(self.data)
+        self.request_counts = Counter()
+        self._counts_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-meraki', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def take_org_token(self, org_id: str) -> float:
+        """0 if a request for org_id is within its budget, else seconds to wait."""
+        return self._take_token(f"org:{org_id}", self.org_rate_limit)
+
+    def take_key_token(self, api_key: str) -> float:
+        """0 if a request with api_key is within its budget, else seconds to wait."""
+        return self._take_token(f"key:{api_key}", self.key_rate_limit)
+
+    def _take_token(self, bucket: str, rate: float) -> float:
+        if not rate:
+            return 0.0
+        now = time.monotonic()
+        with self._counts_lock:
+            tokens, updated = self._buckets.get(bucket, (rate, now))
+            tokens = min(rate, tokens + (now - updated) * rate)
+            if tokens < 1:
+                self._buckets[bucket] = (tokens, now)
+                self.request_counts['rate_limited'] += 1
+                return (1 - tokens) / rate
+            self._buckets[bucket] = (tokens - 1, now)
+            return 0.0
+
+    def count(self, route: str):
+        with self._counts_lock:
+            self.request_counts[route] += 1
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    # (method, regex, handler name)
+    ROUTES = [
+        ('GET', re.compile(r'^/organizations$'), 'get_organizations'),
+        ('GET', re.compile(r'^/organizations/([^/]+)$'), 'get_organization'),
+        ('GET', re.compile(r'^/organizations/([^/]+)/admins$'), 'get_admins'),
+        ('GET', re.compile(r'^/organizations/([^/]+)/networks$'), 'get_networks'),
+        ('GET', re.compile(r'^/organizations/([^/]+)/inventory/devices$'), 'get_devices'),
+        ('POST', re.compile(r'^/organizations/([^/]+)/actionBatches$'), 'create_action_batch'),
+        ('GET', re.compile(r'^/organizations/([^/]+)/actionBatches/([^/]+)$'), 'get_action_batch'),
+    ]
+
+    def log_message(self, format, *args):
+        pass  # keep test and benchmark output quiet
+
+    @property
+    def fake(self) -> FakeMerakiServer:
+        return self.server.fake
+
+    def _send_json(self, status: int, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _api_key(self) -> str:
+        auth = self.headers.get('Authorization', '')
+        return auth[7:].strip() if auth.startswith('Bearer ') else self.headers.get('X-Cisco-Meraki-API-Key', '')
+
+    def _authorized(self) -> bool:
+        key = self._api_key()
+        if not key:
+            return False
+        return self.fake.api_keys is None or key in self.fake.api_keys
+
+    def _dispatch(self, method: str):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if not path.startswith(API_PREFIX):
+            return self._send_json(404, {'errors': ['Not found']})
+        path = path[len(API_PREFIX):]
+        self._query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        self._body = json.loads(raw) if raw else {}
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+        if not self._authorized():
+            return self._send_json(401, {'errors': ['Invalid API key']})
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match:
+                wait = self.fake.take_key_token(self._api_key())
+                if not wait and name != 'get_organizations':
+                    wait = self.fake.take_org_token(match.group(1))
+                if wait:
+                    return self._send_json(429, {'errors': ['Too many requests']},
+                                           {'Retry-After': str(max(1, round(wait)))})
+                self.fake.count(name)
+                return getattr(self, name)(*match.groups())
+        return self._send_json(404, {'errors': ['Not found']})
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _org_or_404(self, org_id):
+        entry = self.fake.data.get(org_id)
+        if entry is None:
+            self._send_json(404, {'errors': ['Organization not found']})
+        return entry
+
+    # ---- endpoints ----
+
+    def get_organizations(self):
+        orgs = [entry['org'] for entry in self.fake.data.values()]
+        per_page = int(self._query.get('perPage', 9000))
+        start = 0
+        if 'startingAfter' in self._query:
+            after = self._query['startingAfter']
+            ids = self.fake.org_ids
+            start = ids.index(after) + 1 if after in ids else len(ids)
+        page = orgs[start:start + per_page]
+        headers = {}
+        if start + per_page < len(orgs) and page:
+            host = self.headers.get('Host')
+            next_url = (f"http://{host}{API_PREFIX}/organizations"
+                        f"?perPage={per_page}&startingAfter={page[-1]['id']}")
+            headers['Link'] = f'<{next_url}>; rel=next'
+        self._send_json(200, page, headers)
+
+    def get_organization(self, org_id):
+        entry = self._org_or_404(org_id)
+        if entry:
+            self._send_json(200, entry['org'])
+
+    def get_admins(self, org_id):
+        entry = self._org_or_404(org_id)
+        if entry:
+            self._send_json(200, entry['admins'])
+
+    def get_networks(self, org_id):
+        entry = self._org_or_404(org_id)
+        if entry:
+            self._send_json(200, entry['networks'])
+
+    def get_devices(self, org_id):
+        entry = self._org_or_404(org_id)
+        if entry:
+            self._send_json(200, entry['devices'])
+
+    def create_action_batch(self, org_id):
+        entry = self._org_or_404(org_id)
+        if not entry:
+            return
+        fake = self.fake
+        actions = self._body.get('actions') or []
+        with fake._data_lock:
+            batch_id = str(next(fake._batch_ids))
+            errors, created = _apply_admin_actions(entry, org_id, batch_id, actions)
+            batch = {
+                'id': batch_id,
+                'organizationId': org_id,
+                'confirmed': bool(self._body.get('confirmed')),
+                'synchronous': bool(self._body.get('synchronous')),
+                'actions': actions,
+                'status': {
+                    'completed': False,
+                    'failed': False,
+                    'errors': [],
+                    'createdResources': [],
+                },
+            }
+            result = {'failed': bool(errors), 'errors': errors, 'createdResources': created}
+            fake.action_batches[batch_id] = (org_id, batch, result, time.time() + fake.batch_delay)
+        self._send_json(201, _batch_view(batch, result, time.time() + fake.batch_delay))
+
+    def get_action_batch(self, org_id, batch_id):
+        with self.fake._data_lock:
+            found = self.fake.action_batches.get(batch_id)
+        if found is None or found[0] != org_id:
+            return self._send_json(404, {'errors': ['Action batch not found']})
+        _, batch, result, completes_at = found
+        self._send_json(200, _batch_view(batch, result, completes_at))
+
+
+def _apply_admin_actions(entry: dict, org_id: str, batch_id: str, actions: list):
+    """
+    Validate then apply admin actions all-or-nothing (like a real action batch).
+    Returns (errors, created_resources).
+    """
+    admins = {a['id']: dict(a) for a in entry['admins']}
+    errors, created = [], []
+    prefix = f"/organizations/{org_id}/admins"
+    for action in actions:
+        resource, operation, body = action.get('resource', ''), action.get('operation'), action.get('body') or {}
+        if resource == prefix and operation == 'create':
+            email = (body.get('email') or '').lower()
+            if any(a['email'].lower() == email for a in admins.values()):
+                errors.append(f"Email {body.get('email')} has already been taken")
+                continue
+            admin_id = f"{org_id}-jit-{batch_id}-{len(created)}"
+            admins[admin_id] = {
+                'id': admin_id, 'name': body.get('name', ''), 'email': body.get('email', ''),
+                'orgAccess': body.get('orgAccess', 'none'), 'networks': [], 'tags': [],
+            }
+            created.append({'id': admin_id, 'uri': f"/api/v1{prefix}/{admin_id}"})
+        elif resource.startswith(prefix + '/') and operation in ('update', 'destroy'):
+            admin_id = resource[len(prefix) + 1:]
+            if admin_id not in admins:
+                errors.append(f"Admin {admin_id} not found")
+            elif operation == 'update':
+                admins[admin_id].update({k: v for k, v in body.items() if k in ('name', 'orgAccess')})
+            else:
+                del admins[admin_id]
+        else:
+            errors.append(f"Unsupported action {operation} {resource}")
+    if errors:
+        return errors, []
+    entry['admins'] = list(admins.values())
+    return [], created
+
+
+def _batch_view(batch: dict, result: dict, completes_at: float) -> dict:
+    """Batch as the API shows it: running until completes_at, then completed or failed."""
+    view = dict(batch)
+    if time.time() >= completes_at:
+        view['status'] = {
+            'completed': not result['failed'],
+            'failed': result['failed'],
+            'errors': result['errors'],
+            'createdResources': result['createdResources'],
+        }
+    return view
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Meraki Dashboard API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--orgs', type=int, default=100, help='number of organizations')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to each response')
+    parser.add_argument('--batch-delay', type=float, default=1.0, help='seconds until an action batch completes')
+    parser.add_argument('--org-rate-limit', type=float, default=None,
+                        help='requests per second per organization before answering 429')
+    parser.add_argument('--key-rate-limit', type=float, default=None,
+                        help='requests per second per API key before answering 429')
+    args = parser.parse_args()
+
+    server = FakeMerakiServer(args.host, args.port, org_count=args.orgs, latency=args.latency,
+                              batch_delay=args.batch_delay, org_rate_limit=args.org_rate_limit,
+                              key_rate_limit=args.key_rate_limit)
+    print(f"Fake Meraki API on {server.base_url} ({args.orgs} orgs, {args.latency}s latency)")
+    print(f"  export MERAKI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
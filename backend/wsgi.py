@@ -0,0 +1,149 @@
+"""
+Production WSGI entry point (pre-fork).
+
+    gunicorn -c gunicorn.conf.py
+
+gunicorn.conf.py sets preload_app, so the master imports this module once
+before forking workers. Importing it:
+
+1. freezes the request-time settings (config/settings.py);
+2. imports the routes and services and builds the app with create_app(),
+   with the refresh, membership-crawl and provisioning schedulers and the
+   Redis event relay held: their jobs are queued, but no thread starts;
+3. warms what each worker would otherwise build on its first requests:
+   the SAML settings object and SP metadata for APP_URL, and the
+   organization lists (with their search index and serialized payloads)
+   for the configured Meraki keys;
+4. stops any background thread the warm-up started (the async Meraki engine
+   loop, the audit writer after writing what it queued) and fails the boot
+   if a thread is still running, since a worker forked while it holds a lock
+   would inherit that lock held forever; then gc.freeze()s the heap so
+   workers share the warm objects copy-on-write instead of touching (and
+   copying) them on their first collection.
+
+Each phase is timed into STARTUP_REPORT and logged once. In each worker,
+post_fork() starts the refresh, provisioning and event-relay threads; the
+async engine and the audit writer start on first use.
+`python -m wsgi` runs the same preload without serving and prints the report
+as JSON (add `-X importtime` to break the import phase down by module).
+"""
+
+import gc
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+_started = time.perf_counter()
+_modules_before = len(sys.modules)
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from config.settings import freeze_settings
+
+logger = logging.getLogger('wsgi')
+
+STARTUP_REPORT = {}
+_phase_started = time.perf_counter()
+_forked_at = None
+
+
+def _phase(name: str):
+    """Record the time since the previous phase ended as `name` (milliseconds)."""
+    global _phase_started
+    now = time.perf_counter()
+    STARTUP_REPORT[name] = round((now - _phase_started) * 1000, 1)
+    _phase_started = now
+
+
+def _warm_saml(app_url: str):
+    """Build the SAML settings object and SP metadata the ACS/metadata routes will look up."""
+    from config.saml_settings import get_saml_settings_object, get_sp_metadata
+    parsed = urlparse(app_url)
+    req = {
+        'https': 'on' if parsed.scheme == 'https' else 'off',
+        'http_host': parsed.netloc,
+        'server_port': parsed.port or (443 if parsed.scheme == 'https' else 80),
+        'script_name': '/api/auth/metadata',
+        'get_data': {},
+        'post_data': {},
+        'query_string': '',
+    }
+    try:
+        get_saml_settings_object(req)
+        get_sp_metadata(req)
+    except Exception as e:
+        logger.warning(f"SAML settings not warmed (check DUO_* settings): {e}")
+
+
+def _assert_no_background_threads():
+    """Raise if any thread besides this one is still running (the master is about to fork)."""
+    running = [t.name for t in threading.enumerate() if t is not threading.current_thread() and t.is_alive()]
+    if running:
+        raise RuntimeError(f"Background threads still running before fork: {', '.join(sorted(running))}")
+
+
+def preload():
+    """Freeze settings, build and warm the app, then quiesce the master for fork. Returns the app."""
+    settings = freeze_settings()
+    _phase('settings_ms')
+
+    from app import create_app
+    from routes.meraki import hold_background_jobs, stop_background_jobs, warm_organizations_cache
+    from services.audit import get_audit_log
+    from services.events import hold_event_relay, stop_event_relay
+    STARTUP_REPORT['modules_imported'] = len(sys.modules) - _modules_before
+    _phase('imports_ms')
+
+    # Jobs create_app() schedules wait for post_fork() instead of running here
+    hold_background_jobs()
+    hold_event_relay()
+    flask_app = create_app()
+    _phase('create_app_ms')
+
+    _warm_saml(settings.app_url)
+    _phase('warm_saml_ms')
+
+    if os.getenv('ORGANIZATIONS_REFRESH_ENABLED', 'true').lower() == 'true':
+        warm_organizations_cache()
+    _phase('warm_organizations_ms')
+
+    stop_background_jobs()
+    stop_event_relay()
+    get_audit_log().stop()
+    _assert_no_background_threads()
+    gc.collect()
+    gc.freeze()
+    _phase('quiesce_ms')
+
+    STARTUP_REPORT['total_ms'] = round((time.perf_counter() - _started) * 1000, 1)
+    logger.info('Startup: ' + ', '.join(f"{name} {value}" for name, value in STARTUP_REPORT.items()))
+    return flask_app
+
+
+def post_fork():
+    """gunicorn post_fork hook (in the new worker): restart per-process background threads."""
+    global _forked_at
+    _forked_at = time.perf_counter()
+    from routes.meraki import resume_background_jobs
+    from services.events import resume_event_relay
+    resume_background_jobs()
+    resume_event_relay()
+
+
+def worker_ready():
+    """gunicorn post_worker_init hook: log how long the worker took to boot after fork."""
+    if _forked_at is not None:
+        logger.info(f"Worker {os.getpid()} ready {(time.perf_counter() - _forked_at) * 1000:.1f} ms after fork")
+
+
+application = preload()
+
+
+if __name__ == '__main__':
+    print(json.dumps(STARTUP_REPORT, indent=2))